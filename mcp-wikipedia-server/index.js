@@ -16,11 +16,172 @@ import {
   ReadResourceRequestSchema,
 } from "@modelcontextprotocol/sdk/types.js";
 
+import { createHash } from "node:crypto";
+import { mkdir, readFile, rename, writeFile } from "node:fs/promises";
+import path from "node:path";
+
 // Node 18+ has native fetch available globally
 // node-fetch is included as a dependency for compatibility, but native fetch is used
 
 const WIKIPEDIA_API_BASE = process.env.WIKI_API_URL || "https://en.wikipedia.org/api/rest_v1";
 const WIKI_LANG = process.env.WIKI_LANG || "en";
+// MediaWiki Action API used for full-text search (point both URLs at a local mock to test offline)
+const WIKI_ACTION_API_URL =
+  process.env.WIKI_ACTION_API_URL || `https://${WIKI_LANG}.wikipedia.org/w/api.php`;
+
+// Response cache: in-memory LRU, optionally backed by a directory on disk
+const CACHE_MAX_ENTRIES = envNumber("WIKI_CACHE_MAX_ENTRIES", 500);
+const CACHE_DIR = process.env.WIKI_CACHE_DIR || null;
+// Time-to-live per tool, in seconds
+const CACHE_TTL_SECONDS = {
+  search: envNumber("WIKI_CACHE_TTL_SEARCH", 60 * 60),
+  summary: envNumber("WIKI_CACHE_TTL_SUMMARY", 24 * 60 * 60),
+  content: envNumber("WIKI_CACHE_TTL_CONTENT", 24 * 60 * 60),
+  page_info: envNumber("WIKI_CACHE_TTL_PAGE_INFO", 24 * 60 * 60),
+};
+
+function envNumber(name, fallback) {
+  const value = Number(process.env[name]);
+  return Number.isFinite(value) && process.env[name] !== "" ? value : fallback;
+}
+
+/**
+ * Caches upstream responses by URL.
+ *
+ * - Fresh entries are served from memory (LRU order, bounded by maxEntries),
+ *   then from the optional disk cache.
+ * - Concurrent requests for the same URL share one in-flight fetch.
+ * - Successful responses and 404s are cached; other errors are not.
+ * - Freshness is checked against the TTL of the tool asking, so tools that
+ *   share an endpoint (summary / page info) also share cached responses.
+ */
+class ResponseCache {
+  constructor({ maxEntries, dir }) {
+    this.maxEntries = maxEntries;
+    this.dir = dir;
+    this.entries = new Map();
+    this.inflight = new Map();
+    this.stats = {};
+  }
+
+  counters(tool) {
+    if (!this.stats[tool]) {
+      this.stats[tool] = { hits: 0, disk_hits: 0, misses: 0, coalesced: 0, errors: 0 };
+    }
+    return this.stats[tool];
+  }
+
+  /**
+   * Fetch a URL through the cache. `as` is "json" or "text".
+   * Resolves to { status, ok, statusText, body }.
+   */
+  async fetch(tool, url, as = "json") {
+    const key = `${as} ${url}`;
+    const ttlMs = (CACHE_TTL_SECONDS[tool] ?? 0) * 1000;
+    const counters = this.counters(tool);
+
+    const entry = this.entries.get(key);
+    if (entry && Date.now() - entry.storedAt < ttlMs) {
+      // Move to the most-recently-used end
+      this.entries.delete(key);
+      this.entries.set(key, entry);
+      counters.hits++;
+      return entry.response;
+    }
+
+    const pending = this.inflight.get(key);
+    if (pending) {
+      counters.coalesced++;
+      return pending;
+    }
+
+    const promise = this.load(key, url, as, ttlMs, counters).finally(() => {
+      this.inflight.delete(key);
+    });
+    this.inflight.set(key, promise);
+    return promise;
+  }
+
+  async load(key, url, as, ttlMs, counters) {
+    const stored = await this.readDisk(key);
+    if (stored && Date.now() - stored.storedAt < ttlMs) {
+      this.remember(key, stored);
+      counters.disk_hits++;
+      return stored.response;
+    }
+
+    counters.misses++;
+    let response;
+    try {
+      const upstream = await fetch(url);
+      let body = null;
+      if (upstream.ok) {
+        body = as === "json" ? await upstream.json() : await upstream.text();
+      }
+      response = {
+        status: upstream.status,
+        ok: upstream.ok,
+        statusText: upstream.statusText,
+        body,
+      };
+    } catch (error) {
+      counters.errors++;
+      throw error;
+    }
+
+    if (response.ok || response.status === 404) {
+      const entry = { url, storedAt: Date.now(), response };
+      this.remember(key, entry);
+      await this.writeDisk(key, entry);
+    }
+    return response;
+  }
+
+  remember(key, entry) {
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+    }
+  }
+
+  diskPath(key) {
+    const digest = createHash("sha1").update(key).digest("hex");
+    return path.join(this.dir, `${digest}.json`);
+  }
+
+  async readDisk(key) {
+    if (!this.dir) return null;
+    try {
+      return JSON.parse(await readFile(this.diskPath(key), "utf8"));
+    } catch {
+      return null;
+    }
+  }
+
+  async writeDisk(key, entry) {
+    if (!this.dir) return;
+    const file = this.diskPath(key);
+    try {
+      await mkdir(this.dir, { recursive: true });
+      await writeFile(`${file}.tmp`, JSON.stringify(entry));
+      await rename(`${file}.tmp`, file);
+    } catch (error) {
+      console.error(`[Cache] Failed to write ${file}: ${error.message}`);
+    }
+  }
+
+  snapshot() {
+    return {
+      entries: this.entries.size,
+      max_entries: this.maxEntries,
+      inflight: this.inflight.size,
+      disk_cache: this.dir,
+      ttl_seconds: CACHE_TTL_SECONDS,
+      tools: this.stats,
+    };
+  }
+}
 
 class WikipediaServer {
   constructor() {
@@ -37,6 +198,8 @@ class WikipediaServer {
       }
     );
 
+    this.cache = new ResponseCache({ maxEntries: CACHE_MAX_ENTRIES, dir: CACHE_DIR });
+
     this.setupToolHandlers();
     this.setupResourceHandlers();
     this.setupErrorHandling();
@@ -173,6 +336,12 @@ class WikipediaServer {
             description: "Search Wikipedia articles",
             mimeType: "application/json",
           },
+          {
+            uri: "wikipedia://cache/stats",
+            name: "Wikipedia Cache Statistics",
+            description: "Cache hit/miss counters per tool",
+            mimeType: "application/json",
+          },
         ],
       };
     });
@@ -180,6 +349,18 @@ class WikipediaServer {
     // Handle resource reading
     this.server.setRequestHandler(ReadResourceRequestSchema, async (request) => {
       const uri = request.params.uri;
+
+      if (uri === "wikipedia://cache/stats") {
+        return {
+          contents: [
+            {
+              uri,
+              mimeType: "application/json",
+              text: JSON.stringify(this.cache.snapshot(), null, 2),
+            },
+          ],
+        };
+      }
       
       if (uri.startsWith("wikipedia://search?q=")) {
         const query = decodeURIComponent(uri.split("?q=")[1]);
@@ -202,13 +383,16 @@ class WikipediaServer {
   async searchWikipedia(query, limit = 10) {
     try {
       const url = `${WIKIPEDIA_API_BASE}/page/summary/${encodeURIComponent(query)}`;
-      const response = await fetch(url);
+      const response = await this.cache.fetch("search", url);
 
       if (response.status === 404) {
         // If exact match not found, try search
-        const searchUrl = `https://${WIKI_LANG}.wikipedia.org/w/api.php?action=query&list=search&srsearch=${encodeURIComponent(query)}&format=json&srlimit=${limit}`;
-        const searchResponse = await fetch(searchUrl);
-        const searchData = await searchResponse.json();
+        const searchUrl = `${WIKI_ACTION_API_URL}?action=query&list=search&srsearch=${encodeURIComponent(query)}&format=json&srlimit=${limit}`;
+        const searchResponse = await this.cache.fetch("search", searchUrl);
+        if (!searchResponse.ok) {
+          throw new Error(`Wikipedia API error: ${searchResponse.statusText}`);
+        }
+        const searchData = searchResponse.body;
 
         if (searchData.query?.search?.length > 0) {
           const results = searchData.query.search.map((item) => ({
@@ -247,7 +431,7 @@ class WikipediaServer {
         throw new Error(`Wikipedia API error: ${response.statusText}`);
       }
 
-      const data = await response.json();
+      const data = response.body;
       return {
         content: [
           {
@@ -264,7 +448,7 @@ class WikipediaServer {
   async getSummary(title) {
     try {
       const url = `${WIKIPEDIA_API_BASE}/page/summary/${encodeURIComponent(title)}`;
-      const response = await fetch(url);
+      const response = await this.cache.fetch("summary", url);
 
       if (!response.ok) {
         if (response.status === 404) {
@@ -273,7 +457,7 @@ class WikipediaServer {
         throw new Error(`Wikipedia API error: ${response.statusText}`);
       }
 
-      const data = await response.json();
+      const data = response.body;
       return {
         content: [
           {
@@ -290,7 +474,7 @@ class WikipediaServer {
   async getContent(title) {
     try {
       const url = `${WIKIPEDIA_API_BASE}/page/html/${encodeURIComponent(title)}`;
-      const response = await fetch(url);
+      const response = await this.cache.fetch("content", url, "text");
 
       if (!response.ok) {
         if (response.status === 404) {
@@ -299,7 +483,7 @@ class WikipediaServer {
         throw new Error(`Wikipedia API error: ${response.statusText}`);
       }
 
-      const html = await response.text();
+      const html = response.body;
       return {
         content: [
           {
@@ -316,7 +500,7 @@ class WikipediaServer {
   async getPageInfo(title) {
     try {
       const url = `${WIKIPEDIA_API_BASE}/page/summary/${encodeURIComponent(title)}`;
-      const response = await fetch(url);
+      const response = await this.cache.fetch("page_info", url);
 
       if (!response.ok) {
         if (response.status === 404) {
@@ -325,7 +509,7 @@ class WikipediaServer {
         throw new Error(`Wikipedia API error: ${response.statusText}`);
       }
 
-      const data = await response.json();
+      const data = response.body;
       const info = {
         title: data.title,
         extract: data.extract,
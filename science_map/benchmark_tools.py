@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+数据维护脚本的基准测试。
+
+1. generate: 用固定的随机种子生成与真实数据结构一致的合成语料库
+   (中英双语文本、带扇入/扇出的 influence_chain、personId / personIds、
+   文本中的反引号引用、悬空 ID 和存根事件)。
+2. run: 在 1k / 10k / 100k 事件规模的合成语料库上运行每个脚本
+   (冷缓存和热缓存各一次)，记录耗时、主进程峰值内存 (RSS) 和每秒处理的文件数，
+   结果写入 JSON 文件，便于在不同提交之间对比。
+   各脚本通过 --report (见 diagnostics.py) 报告的分阶段耗时和计数器一并记录。
+
+会修改语料库的脚本 (create_stub.py, standardize_fields.py) 在语料库的副本上运行。
+
+用法:
+    python benchmark_tools.py generate --events 10000 --out .bench/corpus_10000
+    python benchmark_tools.py run --sizes 1000 10000 100000 --results benchmark_results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from standardize_fields import STANDARD_FIELDS_EN, STANDARD_FIELDS_ZH
+
+# --- 配置 ---
+BENCH_DIR = Path(".bench")
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_SEED = 20240601
+SCRIPT_DIR = Path(__file__).resolve().parent
+# (脚本, 参数, 是否会修改语料库)
+TOOLS = [
+    ("verify_data_links.py", [], False),
+    ("create_stub.py", [], True),
+    ("find_missing_events_people.py", [], False),
+    ("list_all_fields.py", [], False),
+    ("standardize_fields.py", [], True),
+]
+# --- 结束配置 ---
+
+CITIES = [
+    ("巴黎", "Paris", "法国", "France", 48.8566, 2.3522),
+    ("剑桥", "Cambridge", "英国", "United Kingdom", 52.2053, 0.1218),
+    ("哥廷根", "Göttingen", "德国", "Germany", 51.5413, 9.9158),
+    ("雅典", "Athens", "希腊", "Greece", 37.9838, 23.7275),
+    ("亚历山大", "Alexandria", "埃及", "Egypt", 31.2001, 29.9187),
+    ("巴格达", "Baghdad", "伊拉克", "Iraq", 33.3152, 44.3661),
+    ("佛罗伦萨", "Florence", "意大利", "Italy", 43.7696, 11.2558),
+    ("柏林", "Berlin", "德国", "Germany", 52.52, 13.405),
+    ("纽约", "New York", "美国", "United States", 40.7128, -74.006),
+    ("东京", "Tokyo", "日本", "Japan", 35.6762, 139.6503),
+    ("北京", "Beijing", "中国", "China", 39.9042, 116.4074),
+    ("维也纳", "Vienna", "奥地利", "Austria", 48.2082, 16.3738),
+]
+WORDS_ZH = "引力 光学 实验 理论 定律 原子 能量 运动 天体 几何 方程 元素 细胞 电磁 热力学 观测".split()
+WORDS_EN = (
+    "gravity optics experiment theory law atom energy motion celestial "
+    "geometry equation element cell electromagnetism heat observation"
+).split()
+
+
+def _year_suffix(year: int) -> str:
+    return f"BC{-year}" if year < 0 else str(year)
+
+
+def _sentence(rng: random.Random, words: list, refs: list, sep: str) -> str:
+    parts = [rng.choice(words) for _ in range(rng.randint(8, 20))]
+    for ref in refs:
+        parts.insert(rng.randrange(len(parts) + 1), f"`{ref}`")
+    return sep.join(parts)
+
+
+def generate_corpus(out_dir: Path, n_events: int, seed: int = DEFAULT_SEED):
+    """生成一个合成语料库 (目录结构与 science_map 相同)。"""
+    rng = random.Random(seed)
+    events_dir = out_dir / "assets" / "events"
+    people_dir = out_dir / "assets" / "people"
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    events_dir.mkdir(parents=True)
+    people_dir.mkdir(parents=True)
+
+    n_people = max(1, n_events // 2)
+    person_ids = [f"person_{i}" for i in range(n_people)]
+    years = sorted(rng.randint(-600, 2024) for _ in range(n_events))
+    event_ids = [f"event_{i}_{_year_suffix(y)}" for i, y in enumerate(years)]
+    # 约 2% 的引用指向不存在的 ID
+    dangling = [
+        f"missing_{i}_{rng.randint(1000, 2000)}" for i in range(n_events // 50 + 1)
+    ]
+
+    def pick_ref(i: int) -> str:
+        if rng.random() < 0.02:
+            return rng.choice(dangling)
+        return event_ids[rng.randrange(n_events)]
+
+    person_events = {pid: [] for pid in person_ids}
+    index = []
+    for i, (event_id, year) in enumerate(zip(event_ids, years)):
+        index.append(event_id)
+        if rng.random() < 0.3:
+            # 约 30% 为存根
+            event = {
+                "id": event_id,
+                "title": event_id,
+                "title_en": event_id,
+                "year": year,
+                "is_stub": True,
+            }
+        else:
+            city = rng.choice(CITIES)
+            n_fields = rng.randint(1, 3)
+            field_idx = rng.sample(range(len(STANDARD_FIELDS_ZH)), n_fields)
+            # 扇入/扇出服从重尾分布: 少数事件有大量影响关系
+            fan_in = min(20, int(rng.paretovariate(1.5)))
+            fan_out = min(20, int(rng.paretovariate(1.5)))
+            persons = rng.sample(
+                person_ids, min(len(person_ids), rng.choice([1, 1, 1, 2]))
+            )
+            for pid in persons:
+                person_events[pid].append(event_id)
+            event = {
+                "id": event_id,
+                "title": f"{rng.choice(WORDS_ZH)}{rng.choice(WORDS_ZH)}",
+                "title_en": f"{rng.choice(WORDS_EN).title()} {rng.choice(WORDS_EN)}",
+                "year": year,
+                "lat": city[4] + rng.uniform(-0.05, 0.05),
+                "lng": city[5] + rng.uniform(-0.05, 0.05),
+                "city": city[0],
+                "city_en": city[1],
+                "country": city[2],
+                "country_en": city[3],
+                "field": [STANDARD_FIELDS_ZH[k] for k in field_idx],
+                "field_en": [STANDARD_FIELDS_EN[k] for k in field_idx],
+                "media": {"event_image": f"https://example.org/{event_id}.jpg"},
+                "summary": {
+                    "text": _sentence(rng, WORDS_ZH, [pick_ref(i)], ""),
+                    "text_en": _sentence(rng, WORDS_EN, [], " "),
+                    "key_points": [rng.choice(WORDS_ZH) for _ in range(3)],
+                    "key_points_en": [rng.choice(WORDS_EN) for _ in range(3)],
+                },
+                "story": {
+                    "text": _sentence(rng, WORDS_ZH, [], ""),
+                    "text_en": _sentence(rng, WORDS_EN, [pick_ref(i)], " "),
+                },
+                "fun_facts": [{"icon": "💡", "text": _sentence(rng, WORDS_ZH, [], "")}],
+                "quiz": {
+                    "question": _sentence(rng, WORDS_ZH, [], ""),
+                    "question_en": _sentence(rng, WORDS_EN, [], " "),
+                    "options": [
+                        _sentence(rng, WORDS_ZH, [pick_ref(i)], ""),
+                        _sentence(rng, WORDS_ZH, [], ""),
+                    ],
+                    "options_en": [
+                        _sentence(rng, WORDS_EN, [], " "),
+                        _sentence(rng, WORDS_EN, [], " "),
+                    ],
+                    "answer": rng.randrange(2),
+                },
+                "influence_chain": {
+                    "influenced_by": [
+                        {
+                            "id": pick_ref(i),
+                            "contribution": rng.choice(WORDS_ZH),
+                            "contribution_en": rng.choice(WORDS_EN),
+                        }
+                        for _ in range(fan_in)
+                    ],
+                    "influenced": [
+                        {
+                            "id": pick_ref(i),
+                            "contribution": rng.choice(WORDS_ZH),
+                            "contribution_en": rng.choice(WORDS_EN),
+                        }
+                        for _ in range(fan_out)
+                    ],
+                },
+            }
+            if len(persons) > 1:
+                event["personIds"] = persons
+            elif rng.random() < 0.01:
+                event["personId"] = persons  # 列表形式的 personId
+            else:
+                event["personId"] = persons[0]
+
+        with open(events_dir / f"{event_id}.json", "w", encoding="utf-8") as f:
+            json.dump(event, f, ensure_ascii=False, indent=4)
+
+    for pid in person_ids:
+        events = person_events[pid]
+        if rng.random() < 0.05:
+            events = events + [rng.choice(dangling)]
+        person = {
+            "name": f"人物{pid}",
+            "name_en": f"Person {pid}",
+            "bio_short": _sentence(rng, WORDS_ZH, events[:1], ""),
+            "bio_short_en": _sentence(rng, WORDS_EN, [], " "),
+            "events": events,
+        }
+        with open(people_dir / f"{pid}.json", "w", encoding="utf-8") as f:
+            json.dump(person, f, ensure_ascii=False, indent=2)
+
+    # 少量人物不在索引中，模拟缺失的人物
+    people_index = [pid for pid in person_ids if rng.random() > 0.01]
+    with open(out_dir / "assets" / "events_index.json", "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    with open(out_dir / "assets" / "people_index.json", "w", encoding="utf-8") as f:
+        json.dump(people_index, f, indent=2)
+    with open(out_dir / "assets" / "storylines.json", "w", encoding="utf-8") as f:
+        json.dump({}, f)
+
+    return n_events + n_people
+
+
+def run_tool(script: str, args: list, cwd: Path, report_file: Path = None) -> dict:
+    """运行一个脚本，返回耗时、峰值 RSS (KB) 和退出码。
+
+    给出 report_file 时通过 --report 收集脚本自己记录的分阶段耗时和计数器。
+    """
+    if report_file is not None:
+        report_file = report_file.resolve()
+        report_file.unlink(missing_ok=True)
+        args = args + ["--report", str(report_file)]
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(SCRIPT_DIR / script)] + args,
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    _, status, rusage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # Linux 上 ru_maxrss 单位为 KB，macOS 上为字节
+    peak_rss = (
+        rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+    )
+    result = {
+        "wall_seconds": wall,
+        "peak_rss_kb": peak_rss,
+        "exit_code": process.returncode,
+    }
+    if report_file is not None:
+        try:
+            with open(report_file, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            report = {}
+        result["phases"] = report.get("timings", {})
+        result["counters"] = report.get("counters", {})
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=SCRIPT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _prepare_work_dir(corpus_dir: Path, with_cache: bool) -> Path:
+    """复制一份语料库供会修改文件的脚本使用 (copy2 保留 mtime，缓存仍然命中)。"""
+    work_dir = corpus_dir.with_name(corpus_dir.name + "_work")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    ignore = None if with_cache else shutil.ignore_patterns(".corpus_cache")
+    shutil.copytree(corpus_dir, work_dir, ignore=ignore)
+    return work_dir
+
+
+def run_benchmarks(sizes: list, seed: int, tools: list) -> list:
+    results = []
+    for size in sizes:
+        corpus_dir = BENCH_DIR / f"corpus_{size}_{seed}"
+        print(f"[INFO] 生成 {size} 个事件的合成语料库: {corpus_dir}")
+        n_files = generate_corpus(corpus_dir, size, seed)
+
+        for mode in ("cold", "warm"):
+            cache_dir = corpus_dir / ".corpus_cache"
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            if mode == "warm":
+                # 预先填充解析缓存和引用缓存 (不计时)
+                run_tool("references.py", [], corpus_dir)
+
+            for script, args, mutates in tools:
+                if mutates:
+                    work_dir = _prepare_work_dir(corpus_dir, mode == "warm")
+                else:
+                    work_dir = corpus_dir
+                    if mode == "cold":
+                        shutil.rmtree(cache_dir, ignore_errors=True)
+
+                result = run_tool(
+                    script, args, work_dir, report_file=BENCH_DIR / "report.json"
+                )
+                if mutates:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+                result.update(
+                    {
+                        "tool": script,
+                        "events": size,
+                        "files": n_files,
+                        "mode": mode,
+                        "files_per_second": n_files / result["wall_seconds"],
+                    }
+                )
+                results.append(result)
+                print(
+                    f"  {script:<32} {mode:<5} {result['wall_seconds']:8.2f} s "
+                    f"{result['peak_rss_kb'] / 1024:8.1f} MB "
+                    f"{result['files_per_second']:10.0f} files/s"
+                    f"{'' if result['exit_code'] == 0 else ' (exit ' + str(result['exit_code']) + ')'}"
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据维护脚本的基准测试。")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate", help="生成合成语料库")
+    gen.add_argument("--events", type=int, required=True)
+    gen.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    gen.add_argument("--out", type=Path, required=True)
+    run = sub.add_parser("run", help="运行基准测试")
+    run.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    run.add_argument("--tools", nargs="+", help="只运行这些脚本")
+    run.add_argument("--results", type=Path, default=Path("benchmark_results.json"))
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        n_files = generate_corpus(args.out, args.events, args.seed)
+        print(f"[INFO] 已生成 {n_files} 个文件到 {args.out}")
+        return
+
+    tools = [t for t in TOOLS if not args.tools or t[0] in args.tools]
+    results = run_benchmarks(args.sizes, args.seed, tools)
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n[INFO] 结果已保存到 {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+把语料库编译成 App 启动时使用的 "热/冷" 分离数据包。
+
+输出 (assets/generated/):
+1. events_hot.json   —— 地图和筛选器需要的全部数据，一次读取:
+                        id, year, lat/lng, field/field_en, title/title_en,
+                        personIds, city/country 和 stub 标记。
+                        以列式存储，重复字符串 (学科、城市、国家、人物 ID)
+                        通过 strings 字典表编码为整数下标。
+2. events/<id>.json  —— 每个事件的 "冷" 详情分片 (summary, story, quiz,
+                        fun_facts, media ...)，在用户打开事件时按需加载。
+3. people.json       —— 所有人物数据合并为一个文件。
+
+只有内容真正变化的文件才会被重写；已被删除的事件的分片会被清理。
+输出目录是构建产物，不纳入版本控制；App 使用前需在 pubspec.yaml 中
+声明 assets/generated/ 和 assets/generated/events/。
+"""
+
+from pathlib import Path
+
+from corpus import event_person_ids, load_corpus, write_json
+
+# --- 配置 ---
+OUTPUT_DIR = Path("assets/generated")
+HOT_BUNDLE_FILE = OUTPUT_DIR / "events_hot.json"
+SHARDS_DIR = OUTPUT_DIR / "events"
+PEOPLE_BUNDLE_FILE = OUTPUT_DIR / "people.json"
+# --- 结束配置 ---
+
+BUNDLE_VERSION = 1
+
+# 直接存储的热字段
+HOT_SCALAR_FIELDS = ["id", "year", "lat", "lng", "title", "title_en"]
+# 通过字符串字典编码的热字段
+HOT_STRING_FIELDS = ["city", "city_en", "country", "country_en"]
+HOT_LIST_FIELDS = ["field", "field_en", "personIds"]
+# 这些键已经包含在热数据包中，不再写入冷分片 (id 除外)
+HOT_KEYS = set(HOT_SCALAR_FIELDS + HOT_STRING_FIELDS + HOT_LIST_FIELDS) | {
+    "personId",
+    "is_stub",
+}
+
+
+class StringTable:
+    """字符串字典: 每个不同的字符串只存储一次，引用处使用下标。"""
+
+    def __init__(self):
+        self.strings = []
+        self._index = {}
+
+    def encode(self, value):
+        if not isinstance(value, str):
+            return -1
+        index = self._index.get(value)
+        if index is None:
+            index = len(self.strings)
+            self._index[value] = index
+            self.strings.append(value)
+        return index
+
+
+def as_list(value) -> list:
+    """'field' 可能是列表、字符串或缺失。"""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        return [value]
+    return []
+
+
+def build_hot_bundle(events: list) -> dict:
+    """构建列式的热数据包。"""
+    strings = StringTable()
+    columns = {name: [] for name in HOT_SCALAR_FIELDS}
+    columns.update({name: [] for name in HOT_STRING_FIELDS + HOT_LIST_FIELDS})
+    columns["is_stub"] = []
+
+    for event_id, event in events:
+        columns["id"].append(event_id)
+        for name in HOT_SCALAR_FIELDS[1:]:
+            columns[name].append(event.get(name))
+        for name in HOT_STRING_FIELDS:
+            columns[name].append(strings.encode(event.get(name)))
+        columns["field"].append(
+            [strings.encode(f) for f in as_list(event.get("field"))]
+        )
+        columns["field_en"].append(
+            [strings.encode(f) for f in as_list(event.get("field_en"))]
+        )
+        columns["personIds"].append(
+            [strings.encode(pid) for pid in event_person_ids(event)]
+        )
+        columns["is_stub"].append(1 if event.get("is_stub") else 0)
+
+    return {
+        "version": BUNDLE_VERSION,
+        "count": len(events),
+        "strings": strings.strings,
+        "events": columns,
+    }
+
+
+def build_cold_shard(event_id: str, event: dict) -> dict:
+    shard = {"id": event_id}
+    shard.update({k: v for k, v in event.items() if k not in HOT_KEYS})
+    return shard
+
+
+def main():
+    print("=" * 60)
+    print("开始构建 App 数据包 (热/冷分离)...")
+    print("=" * 60)
+
+    corpus = load_corpus()
+    if corpus.events_index is None or corpus.people_index is None:
+        print("[FATAL] 无法读取 events_index.json 或 people_index.json。")
+        raise SystemExit(1)
+
+    events = corpus.indexed_events()
+    people = corpus.indexed_people()
+    print(f"[INFO] 已加载 {len(events)} 个事件, {len(people)} 个人物。")
+
+    # 1. 热数据包
+    hot = build_hot_bundle(events)
+    changed = write_json(HOT_BUNDLE_FILE, hot)
+    size_kb = HOT_BUNDLE_FILE.stat().st_size / 1024
+    print(
+        f"[INFO] {HOT_BUNDLE_FILE}: {size_kb:.1f} KB, "
+        f"{len(hot['strings'])} 个字典字符串{' (已更新)' if changed else ''}"
+    )
+
+    # 2. 冷分片
+    written = 0
+    shard_names = set()
+    for event_id, event in events:
+        shard_file = SHARDS_DIR / f"{event_id}.json"
+        shard_names.add(shard_file.name)
+        if write_json(shard_file, build_cold_shard(event_id, event)):
+            written += 1
+
+    removed = 0
+    if SHARDS_DIR.exists():
+        for shard_file in SHARDS_DIR.glob("*.json"):
+            if shard_file.name not in shard_names:
+                shard_file.unlink()
+                removed += 1
+    print(
+        f"[INFO] {SHARDS_DIR}/: {len(events)} 个详情分片, "
+        f"更新 {written} 个, 删除 {removed} 个过期分片。"
+    )
+
+    # 3. 人物数据
+    write_json(PEOPLE_BUNDLE_FILE, dict(people))
+    print(f"[INFO] {PEOPLE_BUNDLE_FILE}: {len(people)} 个人物。")
+
+    print("\n" + "=" * 60)
+    print("✅ 数据包构建完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
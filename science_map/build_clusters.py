@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+为地图预计算按缩放级别和世纪分桶的层级聚类。
+
+App 目前每次拖动年份滑块或切换学科时，都由 flutter_map_marker_cluster 在设备上
+重新聚类全部可见标记；点击聚类后还要用 "lat_lng" 字符串回查事件。
+本脚本离线完成这些几何计算，输出 assets/generated/clusters.json:
+
+- ids / rows: 参与聚类的事件 (非存根、有年份和坐标) 及其在 events_hot.json 中的下标。
+- 聚类网格是 Web 墨卡托像素坐标上的四叉树: 缩放级别 z 的格子边长为 CELL_PIXELS 像素，
+  即四叉树第 z + log2(TILE_SIZE / CELL_PIXELS) 层的节点，z 级的格子 (x, y) 恰好
+  由 z + 1 级的 (2x..2x+1, 2y..2y+1) 四个格子组成。
+- buckets[世纪起始年份][z] 为该世纪在缩放级别 z 上的聚类，列式存储:
+      x, y        格子坐标
+      lat, lng    成员坐标的质心
+      masks       成员学科位掩码的按位或 (与 filter_index.json 相同的位定义)
+      offsets     members[offsets[i]:offsets[i + 1]] 为第 i 个聚类的成员 (ids 下标)
+  当某个世纪的所有聚类都只包含同一坐标的事件时，继续放大也不会再拆分，
+  之后的缩放级别不再输出，App 使用该世纪最深的一级即可。
+
+App 的时间窗口 (selectedYear - 100, selectedYear] 跨越两个世纪桶: 把两个桶中
+x、y 相同的聚类合并 (成员拼接、质心按成员数加权) 即得到窗口内的聚类；
+学科筛选可以先用 masks 跳过整个聚类，再逐个成员检查。
+
+依赖 NumPy (pip install numpy)。
+
+用法:
+    python build_clusters.py
+"""
+
+import math
+
+import numpy as np
+
+from build_bundle import OUTPUT_DIR
+from build_filter_index import BUCKET_YEARS
+from corpus import write_json
+from model import EventColumns, load_model
+
+# --- 配置 ---
+CLUSTERS_FILE = OUTPUT_DIR / "clusters.json"
+TILE_SIZE = 256
+# 2 的幂，保证各级格子严格嵌套；与 App 的 maxClusterRadius (80 像素) 大致相当
+CELL_PIXELS = 64
+MIN_ZOOM = 0
+MAX_ZOOM = 18
+# --- 结束配置 ---
+
+# Web 墨卡托的纬度范围
+MAX_LATITUDE = 85.05112878
+
+
+def mercator(lat: np.ndarray, lng: np.ndarray) -> tuple:
+    """经纬度 -> [0, 1) 区间内的 Web 墨卡托坐标。"""
+    x = (lng + 180.0) / 360.0
+    phi = np.radians(np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE))
+    y = (1.0 - np.log(np.tan(phi) + 1.0 / np.cos(phi)) / math.pi) / 2.0
+    return np.clip(x, 0.0, np.nextafter(1.0, 0)), np.clip(y, 0.0, np.nextafter(1.0, 0))
+
+
+def cluster_level(x, y, lat, lng, masks, level: int) -> dict:
+    """在四叉树第 level 层上聚类 (输入已按世纪筛选)，返回列式聚类数据。"""
+    scale = 1 << level
+    cx = (x * scale).astype(np.int64)
+    cy = (y * scale).astype(np.int64)
+    order = np.lexsort((cx, cy))
+    cell = cy[order] * scale + cx[order]
+    starts = np.flatnonzero(np.r_[True, cell[1:] != cell[:-1]])
+    offsets = np.r_[starts, len(order)]
+    counts = np.diff(offsets)
+
+    return {
+        "x": cx[order][starts].tolist(),
+        "y": cy[order][starts].tolist(),
+        "lat": np.round(np.add.reduceat(lat[order], starts) / counts, 6).tolist(),
+        "lng": np.round(np.add.reduceat(lng[order], starts) / counts, 6).tolist(),
+        "masks": np.bitwise_or.reduceat(masks[order], starts).tolist(),
+        "offsets": offsets.tolist(),
+        "members": order.tolist(),
+    }, _splittable(lat[order], lng[order], starts)
+
+
+def _splittable(lat, lng, starts) -> bool:
+    """是否还有聚类包含不同坐标的事件 (继续放大还能拆分)。"""
+    for values in (lat, lng):
+        if np.any(
+            np.maximum.reduceat(values, starts) > np.minimum.reduceat(values, starts)
+        ):
+            return True
+    return False
+
+
+def build_clusters(events: list) -> dict:
+    """events 为 events_hot.json 顺序的 Event 列表。"""
+    columns = EventColumns(events)
+    usable = columns.has_year & columns.has_coordinates & ~columns.is_stub
+    rows = np.flatnonzero(usable)
+
+    lat, lng = columns.lat[rows], columns.lng[rows]
+    years = columns.year[rows].astype(np.int64)
+    masks = columns.field_mask[rows].astype(np.int64)
+    x, y = mercator(lat, lng)
+    level_offset = int(math.log2(TILE_SIZE // CELL_PIXELS))
+
+    buckets = {}
+    bucket_of = (years // BUCKET_YEARS) * BUCKET_YEARS
+    for bucket in np.unique(bucket_of):
+        (in_bucket,) = np.nonzero(bucket_of == bucket)
+        zooms = {}
+        for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+            level, splittable = cluster_level(
+                x[in_bucket],
+                y[in_bucket],
+                lat[in_bucket],
+                lng[in_bucket],
+                masks[in_bucket],
+                zoom + level_offset,
+            )
+            # 成员下标从桶内位置换算为 ids 下标
+            level["members"] = in_bucket[level["members"]].tolist()
+            zooms[str(zoom)] = level
+            if not splittable:
+                break
+        buckets[str(int(bucket))] = zooms
+
+    return {
+        "version": 1,
+        "tile_size": TILE_SIZE,
+        "cell_pixels": CELL_PIXELS,
+        "bucket_years": BUCKET_YEARS,
+        "min_zoom": MIN_ZOOM,
+        "max_zoom": MAX_ZOOM,
+        "ids": [columns.ids[i] for i in rows],
+        "rows": rows.tolist(),
+        "buckets": buckets,
+    }
+
+
+def main():
+    model = load_model()
+    data = build_clusters(model.indexed_events())
+    changed = write_json(CLUSTERS_FILE, data)
+
+    n_clusters = sum(
+        len(level["x"])
+        for zooms in data["buckets"].values()
+        for level in zooms.values()
+    )
+    print(
+        f"[INFO] {CLUSTERS_FILE}: {len(data['ids'])} 个事件, "
+        f"{len(data['buckets'])} 个世纪桶, 共 {n_clusters} 个聚类"
+        f"{' (已更新)' if changed else ''}"
+    )
+
+    # 打印每个世纪在初始缩放级别上最密集的聚类
+    initial = str(max(MIN_ZOOM, 2))
+    for bucket, zooms in data["buckets"].items():
+        zoom = initial if initial in zooms else max(zooms, key=int)
+        level = zooms[zoom]
+        sizes = np.diff(level["offsets"])
+        densest = int(np.argmax(sizes))
+        print(
+            f"  {bucket:>6}: {len(zooms)} 级, 最深 z={max(map(int, zooms))}; "
+            f"z={zoom} 最大聚类 {sizes[densest]} 个事件 "
+            f"@ ({level['lat'][densest]:.2f}, {level['lng'][densest]:.2f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+为 App 的 getFilteredEvents 生成预计算的 年份/学科 筛选索引。
+
+输出 assets/generated/filter_index.json:
+- fields / fields_en: 11 个标准学科 (来自 standardize_fields)，第 i 个学科对应掩码的第 i 位。
+- ids / years / masks / rows: 所有非存根事件按年份排序后的 ID、年份、学科位掩码，
+  以及该事件在 events_hot.json 列中的下标。
+- bucket_start / bucket_offsets: 每 100 年一个桶，记录桶内第一个事件在排序数组中的位置。
+
+App 可以用二分查找 (或直接查桶) 定位 (selectedYear - 100, selectedYear] 的时间窗口，
+再用整数掩码按位与来筛选学科，不再每帧遍历所有事件、比较字符串。
+
+用法:
+    python build_filter_index.py
+    python build_filter_index.py --query 1700 --fields 物理学 数学
+"""
+
+import argparse
+from bisect import bisect_right
+
+from build_bundle import OUTPUT_DIR, as_list
+from corpus import load_corpus, write_json
+from standardize_fields import STANDARD_FIELDS_EN, STANDARD_FIELDS_ZH
+
+# --- 配置 ---
+FILTER_INDEX_FILE = OUTPUT_DIR / "filter_index.json"
+# 与 main.dart 中 getFilteredEvents 的时间窗口一致
+WINDOW_YEARS = 100
+BUCKET_YEARS = 100
+# --- 结束配置 ---
+
+FIELD_BITS = {field: 1 << i for i, field in enumerate(STANDARD_FIELDS_ZH)}
+
+
+def field_mask(event: dict, warnings: list) -> int:
+    """按照 _getFieldsFromEvent 的规则计算事件的学科位掩码。
+
+    缺失或空的 field 视为 ["综合"]。非标准学科没有对应的位 (App 的学科筛选
+    同样无法选中它们)，会被报告出来，请运行 standardize_fields.py 修复。
+    """
+    fields = as_list(event.get("field")) or ["综合"]
+    mask = 0
+    for field in fields:
+        if field in FIELD_BITS:
+            mask |= FIELD_BITS[field]
+        else:
+            warnings.append(f"事件 '{event.get('id')}' 使用了非标准学科: {field}")
+    return mask
+
+
+def build_filter_index(events: list, warnings: list) -> dict:
+    """events 为 events_hot.json 中的事件顺序 [(ID, 数据)]。"""
+    rows = [
+        (event["year"], row, event_id, field_mask(event, warnings))
+        for row, (event_id, event) in enumerate(events)
+        if not event.get("is_stub") and isinstance(event.get("year"), int)
+    ]
+    rows.sort(key=lambda r: (r[0], r[1]))
+
+    years = [r[0] for r in rows]
+    bucket_start = (years[0] // BUCKET_YEARS) * BUCKET_YEARS if years else 0
+    bucket_offsets = []
+    if years:
+        last_bucket = (years[-1] - bucket_start) // BUCKET_YEARS
+        position = 0
+        for bucket in range(last_bucket + 2):
+            bucket_year = bucket_start + bucket * BUCKET_YEARS
+            while position < len(years) and years[position] < bucket_year:
+                position += 1
+            bucket_offsets.append(position)
+
+    return {
+        "version": 1,
+        "window_years": WINDOW_YEARS,
+        "fields": STANDARD_FIELDS_ZH,
+        "fields_en": STANDARD_FIELDS_EN,
+        "ids": [r[2] for r in rows],
+        "years": years,
+        "masks": [r[3] for r in rows],
+        "rows": [r[1] for r in rows],
+        "bucket_years": BUCKET_YEARS,
+        "bucket_start": bucket_start,
+        "bucket_offsets": bucket_offsets,
+    }
+
+
+def query(index: dict, selected_year: float, selected_fields=()) -> list:
+    """参考实现: 返回时间窗口内、且属于任一选中学科的事件 ID (按年份排序)。"""
+    years = index["years"]
+    lo = bisect_right(years, selected_year - index["window_years"])
+    hi = bisect_right(years, selected_year)
+    wanted = 0
+    for field in selected_fields:
+        if field in FIELD_BITS:
+            wanted |= FIELD_BITS[field]
+        elif field in STANDARD_FIELDS_EN:
+            wanted |= 1 << STANDARD_FIELDS_EN.index(field)
+    ids, masks = index["ids"], index["masks"]
+    if not selected_fields:
+        return ids[lo:hi]
+    return [ids[i] for i in range(lo, hi) if masks[i] & wanted]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成年份/学科筛选索引。")
+    parser.add_argument("--query", type=float, metavar="YEAR", help="查询某一年的窗口")
+    parser.add_argument("--fields", nargs="*", default=[], help="与 --query 一起使用")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    warnings = []
+    index = build_filter_index(corpus.indexed_events(), warnings)
+    for warning in dict.fromkeys(warnings):
+        print(f"  [WARN] {warning}")
+
+    if args.query is not None:
+        for event_id in query(index, args.query, args.fields):
+            print(event_id)
+        return
+
+    changed = write_json(FILTER_INDEX_FILE, index)
+    print(
+        f"[INFO] {FILTER_INDEX_FILE}: {len(index['ids'])} 个事件, "
+        f"{len(index['bucket_offsets'])} 个年份桶{' (已更新)' if changed else ''}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+为 Firebase Hosting 生成按内容哈希命名的数据文件，使浏览器可以永久缓存。
+
+语料库原来以固定文件名提供 (assets/events/<id>.json、events_index.json ...)，
+浏览器每次访问都要重新验证每个文件，否则可能读到过期数据。本脚本在
+flutter build web 之后运行:
+
+1. 把 assets/ 下的语料库文件、图片和 assets/generated/ 中的构建产物复制到
+   <public>/data/<目录>/<文件名>.<哈希>.<扩展名> (哈希为内容 sha1 的前 12 位)。
+   内容不变则文件名不变，已存在的文件不会重写。最近 KEEP_GENERATIONS 次构建
+   引用的文件都会保留 (记录在 data/.generations.json，以 . 开头的文件不会部署)，
+   仍在使用旧清单的客户端不会请求到已删除的文件；更早的文件会被删除。
+   只有网站目录在两次构建之间没有被清空时，旧文件才能保留下来。
+2. 写入 <public>/data/asset_manifest.json: {逻辑 ID: 哈希路径}，逻辑 ID 为相对
+   assets/ 的路径 (如 "events/newton_principia.json")，"hot" 列出启动时需要的文件。
+3. 写入 <public>/data_precache.js，供 service worker 用 importScripts 加载:
+   DATA_CACHE_NAME (随清单内容变化) 和 DATA_PRECACHE (热数据的哈希 URL)。
+4. 更新 firebase.json 的 hosting.headers: 哈希文件为
+   "public, max-age=31536000, immutable"，清单和预缓存列表为 "no-cache"。
+   其他已有的 header 规则保持不变。单页应用的 "**" 重写规则改为 "!/data/**"，
+   已删除的数据文件返回 404，而不是以 200 返回 index.html。
+
+<public> 为 firebase.json 中 hosting.public 指定的目录 (build/web)。
+
+注意: 本脚本目前只生成上述产物，还没有任何代码使用它们。App (lib/main.dart)
+仍通过 rootBundle.loadString 按固定文件名读取 Flutter 打包的 assets/，web/ 中
+也没有 importScripts 预缓存列表的 service worker。要让回访用户直接使用永久缓存
+的数据，还需要让 App 先读取 data/asset_manifest.json 并按哈希路径加载文件，
+并在 service worker 中预缓存 DATA_PRECACHE、删除旧的 DATA_CACHE_NAME 缓存。
+在此之前，部署这些文件只会多占用网站空间，不会改变 App 的加载方式。
+
+用法:
+    python build_hashed_assets.py
+    python build_hashed_assets.py --dry-run       # 只打印将要复制和删除的文件
+    python build_hashed_assets.py --web-dir DIR   # 输出到其他目录
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from build_images import write_bytes_atomic
+from corpus import write_json
+
+# --- 配置 ---
+ASSETS_DIR = Path("assets")
+FIREBASE_FILE = Path("firebase.json")
+# 哈希文件在网站中的目录
+DATA_PREFIX = "data"
+MANIFEST_NAME = "asset_manifest.json"
+GENERATIONS_NAME = ".generations.json"
+# 保留最近几次构建 (包括本次) 引用的哈希文件
+KEEP_GENERATIONS = 3
+PRECACHE_NAME = "data_precache.js"
+HASH_LENGTH = 12
+CACHE_NAME_PREFIX = "science-map-data"
+# 不发布到网站的文件 (相对 assets/ 的通配符)
+EXCLUDE_PATTERNS = ["generated/corpus.sqlite", "*.tmp", ".*", "*/.*"]
+# 启动时需要的热数据 (相对 assets/ 的通配符)。
+# 当前 App 在启动时读取全部事件和人物文件，所以它们也属于热数据。
+HOT_PATTERNS = [
+    "events_index.json",
+    "people_index.json",
+    "storylines.json",
+    "story_modes.json",
+    "events/*.json",
+    "people/*.json",
+    "generated/events_hot.json",
+    "generated/events_core.json",
+    "generated/people.json",
+    "generated/filter_index.json",
+    "generated/clusters.json",
+    "generated/image_manifest.json",
+    "generated/storylines.json",
+    "generated/locales/*/events_hot.json",
+    "generated/images/*_thumb.webp",
+]
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# --- 结束配置 ---
+
+MANIFEST_VERSION = 1
+
+
+def hashed_name(logical_id: str, digest: str) -> str:
+    """逻辑 ID 对应的哈希路径: events/a.json -> data/events/a.<哈希>.json。"""
+    path = Path(logical_id)
+    name = f"{path.stem}.{digest[:HASH_LENGTH]}{path.suffix}"
+    return f"{DATA_PREFIX}/{path.with_name(name).as_posix()}"
+
+
+def _matches(logical_id: str, patterns: list) -> bool:
+    # fnmatch 的 * 可以匹配 /，这里要求层级一致
+    depth = logical_id.count("/")
+    return any(
+        p.count("/") == depth and fnmatch.fnmatchcase(logical_id, p) for p in patterns
+    )
+
+
+def collect_assets(assets_dir: Path = ASSETS_DIR) -> dict:
+    """{逻辑 ID: 文件路径}，按逻辑 ID 排序。"""
+    assets = {}
+    for path in sorted(assets_dir.rglob("*")):
+        if not path.is_file():
+            continue
+        logical_id = path.relative_to(assets_dir).as_posix()
+        if not _matches(logical_id, EXCLUDE_PATTERNS):
+            assets[logical_id] = path
+    return assets
+
+
+def build_manifest(assets: dict) -> tuple:
+    """哈希所有文件，返回 (清单, {哈希路径: 源文件})。"""
+    mapping = {}
+    sources = {}
+    for logical_id, path in assets.items():
+        digest = hashlib.sha1(path.read_bytes()).hexdigest()
+        target = hashed_name(logical_id, digest)
+        mapping[logical_id] = target
+        sources[target] = path
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "assets": mapping,
+        "hot": [i for i in mapping if _matches(i, HOT_PATTERNS)],
+    }
+    return manifest, sources
+
+
+def precache_script(manifest: dict) -> str:
+    """service worker 用 importScripts 加载的预缓存列表 (尚未接入，见模块说明)。"""
+    text = json.dumps(manifest, ensure_ascii=False, sort_keys=True)
+    version = hashlib.sha1(text.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+    urls = [manifest["assets"][i] for i in manifest["hot"]]
+    return (
+        "// 由 build_hashed_assets.py 生成，请勿手动修改。\n"
+        f'self.DATA_CACHE_NAME = "{CACHE_NAME_PREFIX}-{version}";\n'
+        f"self.DATA_MANIFEST = {json.dumps(f'{DATA_PREFIX}/{MANIFEST_NAME}')};\n"
+        f"self.DATA_PRECACHE = {json.dumps(urls, ensure_ascii=False, indent=2)};\n"
+    )
+
+
+def header_rules() -> list:
+    """本脚本负责的 hosting.headers 规则。"""
+    no_cache = [{"key": "Cache-Control", "value": "no-cache"}]
+    return [
+        {
+            "regex": rf"^/{DATA_PREFIX}/.+\.[0-9a-f]{{{HASH_LENGTH}}}\.[^/.]+$",
+            "headers": [{"key": "Cache-Control", "value": IMMUTABLE_CACHE_CONTROL}],
+        },
+        {"source": f"/{DATA_PREFIX}/{MANIFEST_NAME}", "headers": no_cache},
+        {"source": f"/{PRECACHE_NAME}", "headers": no_cache},
+    ]
+
+
+def update_firebase_config(config: dict) -> dict:
+    """替换 hosting.headers 中本脚本负责的规则，保留其他规则；
+    "**" 重写规则不再匹配 /data/ 下的文件。"""
+    rules = header_rules()
+    owned = {rule.get("regex") or rule.get("source") for rule in rules}
+    hosting = config.setdefault("hosting", {})
+    headers = [
+        rule
+        for rule in hosting.get("headers", [])
+        if (rule.get("regex") or rule.get("source")) not in owned
+    ]
+    hosting["headers"] = headers + rules
+    for rule in hosting.get("rewrites", []):
+        if rule.get("source") == "**":
+            rule["source"] = f"!/{DATA_PREFIX}/**"
+    return config
+
+
+def load_generations(path: Path) -> list:
+    """之前各次构建引用的哈希路径，最近的在前。"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            generations = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if not isinstance(generations, list):
+        return []
+    return [g for g in generations if isinstance(g, list)]
+
+
+def write_text(path: Path, text: str) -> bool:
+    """内容不变时不写入，返回是否真正写入。"""
+    raw = text.encode("utf-8")
+    try:
+        if path.read_bytes() == raw:
+            return False
+    except OSError:
+        pass
+    write_bytes_atomic(path, raw)
+    return True
+
+
+def read_public_dir() -> Path:
+    try:
+        with open(FIREBASE_FILE, "r", encoding="utf-8") as f:
+            return Path(json.load(f)["hosting"]["public"])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"[FATAL] 无法从 {FIREBASE_FILE} 读取 hosting.public: {e}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成按内容哈希命名的网站数据文件。")
+    parser.add_argument(
+        "--web-dir", help="网站目录 (默认为 firebase.json 的 hosting.public)"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="只打印，不写入")
+    args = parser.parse_args()
+
+    web_dir = Path(args.web_dir) if args.web_dir else read_public_dir()
+    data_dir = web_dir / DATA_PREFIX
+    manifest_file = data_dir / MANIFEST_NAME
+    generations_file = data_dir / GENERATIONS_NAME
+
+    assets = collect_assets()
+    if not assets:
+        print(f"[FATAL] {ASSETS_DIR} 中没有可发布的文件。")
+        sys.exit(1)
+    manifest, sources = build_manifest(assets)
+
+    copied = 0
+    for target, source in sources.items():
+        out_file = web_dir / target
+        if out_file.exists():
+            continue
+        copied += 1
+        if args.dry_run:
+            print(f"  [DRY-RUN] {source} -> {out_file}")
+        else:
+            write_bytes_atomic(out_file, source.read_bytes())
+
+    current = sorted(sources)
+    generations = [g for g in load_generations(generations_file) if g != current]
+    generations = [current] + generations[: KEEP_GENERATIONS - 1]
+
+    removed = 0
+    if data_dir.is_dir():
+        keep = {web_dir / target for g in generations for target in g}
+        keep |= {manifest_file, generations_file}
+        for path in sorted(data_dir.rglob("*")):
+            if path.is_file() and path not in keep:
+                removed += 1
+                if args.dry_run:
+                    print(f"  [DRY-RUN] 删除 {path}")
+                else:
+                    path.unlink()
+
+    with open(FIREBASE_FILE, "r", encoding="utf-8") as f:
+        config = update_firebase_config(json.load(f))
+    firebase_text = json.dumps(config, ensure_ascii=False, indent=2) + "\n"
+
+    hot_bytes = sum(
+        sources[manifest["assets"][i]].stat().st_size for i in manifest["hot"]
+    )
+    if args.dry_run:
+        print(
+            f"[DRY-RUN] {len(sources)} 个文件, 复制 {copied} 个, 删除 {removed} 个; "
+            f"预缓存 {len(manifest['hot'])} 个 ({hot_bytes / 1e6:.1f} MB)"
+        )
+        return
+
+    write_json(generations_file, generations)
+    write_json(manifest_file, manifest)
+    write_text(web_dir / PRECACHE_NAME, precache_script(manifest))
+    firebase_changed = write_text(FIREBASE_FILE, firebase_text)
+
+    print(
+        f"[INFO] {data_dir}: {len(sources)} 个文件, 新复制 {copied} 个, "
+        f"删除 {removed} 个过期文件 (保留最近 {len(generations)} 次构建)"
+    )
+    print(
+        f"[INFO] {web_dir / PRECACHE_NAME}: 预缓存 {len(manifest['hot'])} 个文件 "
+        f"({hot_bytes / 1e6:.1f} MB)"
+    )
+    if firebase_changed:
+        print(f"[INFO] 已更新 {FIREBASE_FILE} 的缓存规则")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+图片资源优化流水线。
+
+1. 找出语料库引用的所有图片 (事件的 media.event_image、story/simple_explanation
+   的 diagram、人物的 portrait 等)，以及 assets/images 中的所有本地图片。
+2. 为每张图片生成三种尺寸的 WebP 变体: thumb (头像、聚类列表)、card (详情卡片)、
+   full (全屏)，从不放大原图。
+3. 写入 assets/generated/image_manifest.json: 原图 -> 尺寸、blurhash 占位符、
+   各变体的路径/尺寸/字节数。
+
+结果以原图内容哈希为键缓存: 原图未变化且变体文件存在时不会重新编码。
+远程图片通过可替换的 fetcher 获取，下载的原图缓存在 .corpus_cache/image_sources/；
+--source-dir 可以用一个本地目录 (按 URL 的文件名查找) 代替网络。
+
+依赖 Pillow (pip install pillow)。
+
+用法:
+    python build_images.py
+    python build_images.py --local-only          # 只处理本地图片
+    python build_images.py --source-dir DIR      # 远程图片从本地目录读取
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import sys
+import urllib.parse
+import urllib.request
+from io import BytesIO
+from pathlib import Path
+
+from build_bundle import OUTPUT_DIR
+from corpus import CACHE_DIR, load_corpus, write_json
+
+# --- 配置 ---
+IMAGES_DIR = Path("assets/images")
+IMAGE_OUTPUT_DIR = OUTPUT_DIR / "images"
+IMAGE_MANIFEST_FILE = OUTPUT_DIR / "image_manifest.json"
+SOURCE_CACHE_DIR = CACHE_DIR / "image_sources"
+# 变体名 -> 最长边像素
+VARIANTS = {"thumb": 128, "card": 480, "full": 1600}
+WEBP_QUALITY = 80
+USER_AGENT = "science-map-image-pipeline/1.0"
+# --- 结束配置 ---
+
+# 这些键的字符串值是图片地址
+IMAGE_KEYS = {"event_image", "diagram", "image", "portrait"}
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp"}
+# 矢量图不需要栅格化变体
+VECTOR_SUFFIXES = {".svg"}
+
+
+# ---------- 图片发现 ----------
+
+
+def find_image_references(documents) -> dict:
+    """documents 为 [(来源 ID, 数据)]，返回 {图片地址: [引用它的来源 ID]}。"""
+    refs = {}
+    for source_id, data in documents:
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    if key in IMAGE_KEYS and isinstance(value, str) and value:
+                        refs.setdefault(value, []).append(source_id)
+                    else:
+                        stack.append(value)
+            elif isinstance(node, list):
+                stack.extend(node)
+    return refs
+
+
+def is_remote(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+# ---------- 获取原图 ----------
+
+
+class HttpFetcher:
+    """通过 HTTP 下载远程图片。"""
+
+    def __init__(self, timeout: float = 30):
+        self.timeout = timeout
+
+    def fetch(self, url: str) -> bytes:
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+
+class DirectoryFetcher:
+    """用本地目录代替网络: 按 URL 路径中的文件名查找。"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def fetch(self, url: str) -> bytes:
+        name = urllib.parse.unquote(urllib.parse.urlparse(url).path.rsplit("/", 1)[-1])
+        return (self.directory / name).read_bytes()
+
+
+class CachingFetcher:
+    """在任意 fetcher 外面加一层磁盘缓存，已下载的原图不会重复获取。"""
+
+    def __init__(self, fetcher, cache_dir: Path = SOURCE_CACHE_DIR):
+        self.fetcher = fetcher
+        self.cache_dir = cache_dir
+
+    def fetch(self, url: str) -> bytes:
+        cache_file = self.cache_dir / hashlib.sha1(url.encode("utf-8")).hexdigest()
+        if cache_file.exists():
+            return cache_file.read_bytes()
+        raw = self.fetcher.fetch(url)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(".tmp")
+        tmp_file.write_bytes(raw)
+        tmp_file.replace(cache_file)
+        return raw
+
+
+# ---------- blurhash ----------
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(
+        _BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length)
+    )
+
+
+def _srgb_to_linear(value: int) -> float:
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+_SRGB_TO_LINEAR = [_srgb_to_linear(v) for v in range(256)]
+
+
+def _linear_to_srgb(value: float) -> int:
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exp: float) -> float:
+    return math.copysign(abs(value) ** exp, value)
+
+
+def blurhash(image, x_components: int = 4, y_components: int = 3) -> str:
+    """按 blurhash 规范编码一张 (已缩小的) RGB 图片。"""
+    width, height = image.size
+    data = [_SRGB_TO_LINEAR[v] for v in image.tobytes()]
+    pixels = [tuple(data[i : i + 3]) for i in range(0, len(data), 3)]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            norm = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                cos_y = math.cos(math.pi * j * y / height)
+                row = y * width
+                for x in range(width):
+                    basis = norm * math.cos(math.pi * i * x / width) * cos_y
+                    pr, pg, pb = pixels[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = 1 / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(c) for factor in ac for c in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _base83(0, 1)
+
+    result += _base83(
+        (_linear_to_srgb(dc[0]) << 16)
+        + (_linear_to_srgb(dc[1]) << 8)
+        + _linear_to_srgb(dc[2]),
+        4,
+    )
+    for factor in ac:
+        r, g, b = (
+            max(0, min(18, int(_sign_pow(c / max_value, 0.5) * 9 + 9.5)))
+            for c in factor
+        )
+        result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+# ---------- 编码 ----------
+
+
+def encode_variants(raw: bytes, digest: str) -> dict:
+    """生成所有变体并返回清单条目。"""
+    from PIL import Image
+
+    with Image.open(BytesIO(raw)) as image:
+        image.seek(0)  # GIF 动画只取第一帧
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        width, height = image.size
+
+        small = image.convert("RGB")
+        small.thumbnail((32, 32))
+        entry = {
+            "hash": digest,
+            "width": width,
+            "height": height,
+            "blurhash": blurhash(small),
+            "variants": {},
+        }
+
+        for name, max_side in VARIANTS.items():
+            variant = image.copy()
+            variant.thumbnail((max_side, max_side), Image.LANCZOS)
+            out_file = IMAGE_OUTPUT_DIR / f"{digest[:16]}_{name}.webp"
+            buffer = BytesIO()
+            variant.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+            write_bytes_atomic(out_file, buffer.getvalue())
+            entry["variants"][name] = {
+                "path": out_file.as_posix(),
+                "width": variant.width,
+                "height": variant.height,
+                "bytes": len(buffer.getvalue()),
+            }
+    return entry
+
+
+def write_bytes_atomic(path: Path, raw: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(f".{path.name}.tmp")
+    tmp_file.write_bytes(raw)
+    tmp_file.replace(path)
+
+
+def _variants_exist(entry: dict) -> bool:
+    return all(Path(v["path"]).exists() for v in entry.get("variants", {}).values())
+
+
+def load_manifest() -> dict:
+    try:
+        with open(IMAGE_MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get("images", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片资源优化流水线。")
+    parser.add_argument("--local-only", action="store_true", help="跳过远程图片")
+    parser.add_argument(
+        "--source-dir", type=Path, help="用本地目录代替网络获取远程图片"
+    )
+    args = parser.parse_args()
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("[FATAL] 需要 Pillow: pip install pillow")
+        sys.exit(1)
+
+    corpus = load_corpus()
+    documents = list(corpus.events.items()) + list(corpus.people.items())
+    references = find_image_references(documents)
+    for path in sorted(IMAGES_DIR.glob("*")):
+        if path.suffix.lower() in IMAGE_SUFFIXES | VECTOR_SUFFIXES:
+            references.setdefault(path.as_posix(), [])
+
+    fetcher = CachingFetcher(
+        DirectoryFetcher(args.source_dir) if args.source_dir else HttpFetcher()
+    )
+    previous = load_manifest()
+    images = {}
+    encoded = reused = failed = 0
+    used_files = set()
+
+    def keep_previous(source):
+        """获取或解码失败时沿用上次的结果，避免一次网络错误删掉可用的变体。"""
+        entry = previous.get(source)
+        if entry:
+            images[source] = dict(entry, referenced_by=references[source])
+            used_files.update(
+                Path(v["path"]).name for v in entry.get("variants", {}).values()
+            )
+
+    for source in sorted(references):
+        if is_remote(source) and args.local_only:
+            if source in previous:
+                images[source] = previous[source]
+            continue
+        suffix = Path(urllib.parse.urlparse(source).path).suffix.lower()
+        if suffix in VECTOR_SUFFIXES:
+            images[source] = {"vector": True, "referenced_by": references[source]}
+            continue
+
+        try:
+            raw = (
+                fetcher.fetch(source)
+                if is_remote(source)
+                else Path(source).read_bytes()
+            )
+        except Exception as e:
+            print(
+                f"  [ERROR] 无法获取图片 {source} (被 {references[source]} 引用): {e}"
+            )
+            failed += 1
+            keep_previous(source)
+            continue
+
+        digest = hashlib.sha1(raw).hexdigest()
+        entry = previous.get(source)
+        if entry and entry.get("hash") == digest and _variants_exist(entry):
+            reused += 1
+        else:
+            try:
+                entry = encode_variants(raw, digest)
+            except Exception as e:
+                print(f"  [ERROR] 无法解码图片 {source}: {e}")
+                failed += 1
+                keep_previous(source)
+                continue
+            encoded += 1
+
+        entry = dict(entry, referenced_by=references[source])
+        images[source] = entry
+        used_files.update(Path(v["path"]).name for v in entry["variants"].values())
+
+    # 清理不再被任何图片使用的变体
+    removed = 0
+    if IMAGE_OUTPUT_DIR.exists() and not args.local_only:
+        for path in IMAGE_OUTPUT_DIR.glob("*.webp"):
+            if path.name not in used_files:
+                path.unlink()
+                removed += 1
+
+    write_json(IMAGE_MANIFEST_FILE, {"version": 1, "images": images}, indent=2)
+
+    original = sum(
+        Path(s).stat().st_size for s in images if not is_remote(s) and Path(s).exists()
+    )
+    variant_bytes = sum(
+        v["bytes"] for e in images.values() for v in e.get("variants", {}).values()
+    )
+    print(
+        f"[INFO] {len(images)} 张图片: 编码 {encoded} 张, 复用 {reused} 张, "
+        f"失败 {failed} 张, 删除 {removed} 个过期变体。"
+    )
+    print(
+        f"[INFO] 本地原图 {original / 1024:.0f} KB, "
+        f"全部变体 {variant_bytes / 1024:.0f} KB。清单: {IMAGE_MANIFEST_FILE}"
+    )
+
+
+if __name__ == "__main__":
+    main()
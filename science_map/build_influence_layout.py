@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+为影响链焦点视图离线计算分层布局。
+
+对影响链图 (influence_graph.py) 的每个弱连通分量做 Sugiyama 式分层布局:
+1. 分层: 分量内每个不同的年份为一层 (按年份排序)，没有年份的事件取前驱的
+   最大年份 (没有前驱时取后继的最小年份)。
+2. 跨越多层的边在中间每一层插入一个虚拟节点，作为边的折点。
+   目标年份不晚于源年份的边 (同年或逆时序) 不参与排序，直接连线。
+3. 交叉最小化: 重心法 (barycenter) 自上而下、自下而上交替扫描，
+   保留交叉数最少的排列。初始顺序为 (年份, ID)，结果是确定的。
+
+输出 assets/generated/influence_layout.json:
+    nodes       {事件 ID: [分量, 层, 层内位置]}
+    components  每个分量:
+        years   每层的年份
+        widths  每层的节点数 (含虚拟节点)
+        edges   [源 ID, 目标 ID, [中间各层的层内位置]]
+                折点依次位于源层 + 1、源层 + 2 ... 层；列表为空表示直接连线
+        crossings  布局中剩余的交叉数
+App 聚焦某个事件时，只需取出它所在分量的布局，隐藏焦点链以外的节点即可，
+每次显示的位置都相同。只有一个事件的分量不输出。
+
+用法:
+    python build_influence_layout.py
+"""
+
+from collections import defaultdict
+
+from build_bundle import OUTPUT_DIR
+from corpus import load_corpus, write_json
+from influence_graph import InfluenceGraph
+
+# --- 配置 ---
+INFLUENCE_LAYOUT_FILE = OUTPUT_DIR / "influence_layout.json"
+MAX_SWEEPS = 24
+# --- 结束配置 ---
+
+
+def connected_components(graph: InfluenceGraph) -> list:
+    """弱连通分量 (忽略边的方向)，每个分量为排序后的节点列表，按首个节点排序。"""
+    n = len(graph.ids)
+    component = [-1] * n
+    components = []
+    for start in range(n):
+        if component[start] != -1:
+            continue
+        component[start] = len(components)
+        members = [start]
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for nxt in graph.successors(node) + graph.predecessors(node):
+                if component[nxt] == -1:
+                    component[nxt] = component[start]
+                    members.append(nxt)
+                    stack.append(nxt)
+        components.append(sorted(members))
+    return components
+
+
+def assign_years(graph: InfluenceGraph, members: list, years: dict) -> dict:
+    """返回 {节点: 年份}，缺失的年份由前驱 / 后继推出。"""
+    known = {v: years[v] for v in members if years.get(v) is not None}
+    fallback = min(known.values()) if known else 0
+    result = {}
+    for v in members:
+        if v in known:
+            result[v] = known[v]
+            continue
+        before = [known[u] for u in graph.predecessors(v) if u in known]
+        after = [known[w] for w in graph.successors(v) if w in known]
+        result[v] = max(before) if before else min(after) if after else fallback
+    return result
+
+
+def count_crossings(upper: list, lower: list, down: dict) -> int:
+    """相邻两层之间的交叉数 (按上层位置排序后，下层位置序列的逆序对数)。"""
+    position = {v: i for i, v in enumerate(lower)}
+    targets = []
+    for u in upper:
+        targets.extend(sorted(position[w] for w in down[u]))
+    # 树状数组统计逆序对
+    size = len(lower)
+    tree = [0] * (size + 1)
+    crossings = 0
+    for seen, p in enumerate(targets):
+        i = p + 1
+        below = 0
+        while i > 0:
+            below += tree[i]
+            i -= i & -i
+        crossings += seen - below
+        i = p + 1
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+    return crossings
+
+
+def total_crossings(layers: list, down: dict) -> int:
+    return sum(
+        count_crossings(layers[i], layers[i + 1], down) for i in range(len(layers) - 1)
+    )
+
+
+def _reorder(layer: list, fixed: list, neighbours: dict) -> list:
+    """按相邻层中邻居位置的平均值排序；没有邻居的节点保持原位置。"""
+    position = {v: i for i, v in enumerate(fixed)}
+    keys = []
+    for i, v in enumerate(layer):
+        adjacent = [position[w] for w in neighbours[v]]
+        keys.append(sum(adjacent) / len(adjacent) if adjacent else i)
+    order = sorted(range(len(layer)), key=lambda i: (keys[i], i))
+    return [layer[i] for i in order]
+
+
+def minimize_crossings(layers: list, down: dict, up: dict) -> tuple:
+    """重心法交替扫描，返回 (最佳排列, 交叉数)。"""
+    best = [list(layer) for layer in layers]
+    best_crossings = total_crossings(best, down)
+    current = [list(layer) for layer in layers]
+    for sweep in range(MAX_SWEEPS):
+        if best_crossings == 0:
+            break
+        if sweep % 2 == 0:
+            for i in range(1, len(current)):
+                current[i] = _reorder(current[i], current[i - 1], up)
+        else:
+            for i in range(len(current) - 2, -1, -1):
+                current[i] = _reorder(current[i], current[i + 1], down)
+        crossings = total_crossings(current, down)
+        if crossings < best_crossings:
+            best = [list(layer) for layer in current]
+            best_crossings = crossings
+    return best, best_crossings
+
+
+def layout_component(graph: InfluenceGraph, members: list, years: dict) -> dict:
+    """对一个分量做分层布局。节点用稠密 ID，虚拟节点用 ("dummy", 边序号, 层)。"""
+    year_of = assign_years(graph, members, years)
+    layer_years = sorted(set(year_of.values()))
+    layer_index = {year: i for i, year in enumerate(layer_years)}
+    layer_of = {v: layer_index[year_of[v]] for v in members}
+
+    layers = [[] for _ in layer_years]
+    for v in sorted(members, key=lambda v: (year_of[v], graph.ids[v])):
+        layers[layer_of[v]].append(v)
+
+    down = defaultdict(list)
+    up = defaultdict(list)
+    edges = []
+    for u in members:
+        for v in graph.successors(u):
+            chain = [u]
+            if layer_of[v] > layer_of[u]:
+                for layer in range(layer_of[u] + 1, layer_of[v]):
+                    dummy = ("dummy", len(edges), layer)
+                    layers[layer].append(dummy)
+                    chain.append(dummy)
+                chain.append(v)
+                for a, b in zip(chain, chain[1:]):
+                    down[a].append(b)
+                    up[b].append(a)
+            edges.append((u, v, chain[1:-1]))
+
+    layers, crossings = minimize_crossings(layers, down, up)
+    position = {
+        v: (i, j) for i, layer in enumerate(layers) for j, v in enumerate(layer)
+    }
+    return {
+        "nodes": {graph.ids[v]: position[v] for v in members},
+        "years": layer_years,
+        "widths": [len(layer) for layer in layers],
+        "edges": [
+            [graph.ids[u], graph.ids[v], [position[d][1] for d in route]]
+            for u, v, route in edges
+        ],
+        "crossings": crossings,
+    }
+
+
+def build_layout(graph: InfluenceGraph, events: dict) -> dict:
+    years = {}
+    for i, event_id in enumerate(graph.ids):
+        year = events.get(event_id, {}).get("year")
+        years[i] = year if isinstance(year, int) else None
+
+    nodes = {}
+    components = []
+    for members in connected_components(graph):
+        if len(members) < 2:
+            continue
+        layout = layout_component(graph, members, years)
+        for event_id, (layer, order) in layout.pop("nodes").items():
+            nodes[event_id] = [len(components), layer, order]
+        components.append(layout)
+
+    return {"version": 1, "nodes": nodes, "components": components}
+
+
+def main():
+    corpus = load_corpus()
+    graph = InfluenceGraph.from_events(corpus.indexed_events())
+    data = build_layout(graph, corpus.events)
+    changed = write_json(INFLUENCE_LAYOUT_FILE, data)
+
+    components = data["components"]
+    print(
+        f"[INFO] {INFLUENCE_LAYOUT_FILE}: {len(components)} 个分量, "
+        f"{len(data['nodes'])} 个事件, "
+        f"{sum(len(c['edges']) for c in components)} 条边"
+        f"{' (已更新)' if changed else ''}"
+    )
+    for i, component in sorted(
+        enumerate(components), key=lambda item: -len(item[1]["edges"])
+    )[:5]:
+        print(
+            f"  分量 {i}: {len(component['years'])} 层, 最宽 {max(component['widths'])}, "
+            f"{len(component['edges'])} 条边, 剩余交叉 {component['crossings']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+按语言拆分 App 数据包: 一份与语言无关的核心数据，加上每种语言各一份文本数据。
+App 只需加载核心数据和当前语言的数据，新增语言不会增加其他语言的解析时间和内存。
+
+双语字段的约定: 无后缀 (或 _zh 后缀) 的键为主语言 (zh)，"键_en" 为英文。
+某个位置 (如 /summary/key_points、/quiz/options) 在语料库中任何一处出现过
+带语言后缀的版本，就视为需要翻译的字段；其余字段与语言无关，原样保留。
+
+输出 (assets/generated/):
+    events_core.json              列式核心数据: id, year, lat/lng, 学科位掩码
+                                  (与 filter_index.json 相同)、personIds、
+                                  influenced_by / influenced、storyline_ids、is_stub
+    locales/<语言>/events_hot.json 与核心数据逐行对应的 title, city, country, field
+    locales/<语言>/events/<id>.json 该语言的事件详情 (键名去掉语言后缀)
+    locales/<语言>/people.json     该语言的人物数据
+    locales/<语言>/storylines.json 该语言的故事线
+
+缺失的翻译用主语言 (其次是任一可用语言) 的文本代替，并作为
+missing-translation 报告；同一字段各语言列表长度不一致时报告 translation-mismatch。
+问题可以写入 --report / --sarif (见 diagnostics.py)。
+
+用法:
+    python build_locales.py
+    python build_locales.py --verbose        # 逐条打印缺失的翻译
+"""
+
+import argparse
+
+from build_bundle import OUTPUT_DIR, StringTable, as_list
+from build_filter_index import field_mask
+from corpus import STORYLINES_FILE, event_person_ids, load_corpus, write_json
+from diagnostics import Report, add_arguments
+
+# --- 配置 ---
+LOCALES = ["zh", "en"]
+# 无后缀的键属于这种语言
+PRIMARY_LOCALE = "zh"
+CORE_FILE = OUTPUT_DIR / "events_core.json"
+LOCALES_DIR = OUTPUT_DIR / "locales"
+# --- 结束配置 ---
+
+LOCALE_BUNDLE_VERSION = 1
+
+# 逐行存入各语言 events_hot.json 的字段 (其余字段进入详情分片)
+LOCALE_HOT_FIELDS = ["title", "city", "country", "field"]
+# 只存在于核心数据中的事件字段
+CORE_KEYS = {
+    "id",
+    "year",
+    "lat",
+    "lng",
+    "personId",
+    "personIds",
+    "is_stub",
+    "storyline_ids",
+}
+
+
+def split_key(key: str) -> tuple:
+    """把 "title_en" 拆成 ("title", "en")；无语言后缀时返回 (key, None)。"""
+    for locale in LOCALES:
+        suffix = f"_{locale}"
+        if key.endswith(suffix) and len(key) > len(suffix):
+            return key[: -len(suffix)], locale
+    return key, None
+
+
+def _child(shape: str, key) -> str:
+    return f"{shape}/{'*' if isinstance(key, int) else key}"
+
+
+def translatable_shapes(documents) -> set:
+    """收集出现过语言后缀的位置 (列表下标记为 *)，如 "event/summary/key_points"。"""
+    shapes = set()
+
+    def walk(value, shape):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                base, locale = split_key(key)
+                if locale is not None:
+                    shapes.add(_child(shape, base))
+                walk(item, _child(shape, key))
+        elif isinstance(value, list):
+            for item in value:
+                walk(item, f"{shape}/*")
+
+    for kind, document in documents:
+        walk(document, kind)
+    return shapes
+
+
+class Localizer:
+    """把双语文档转换为单一语言的文档，同时记录缺失的翻译。"""
+
+    def __init__(self, shapes: set, report: Report):
+        self.shapes = shapes
+        self.report = report
+
+    def localize(self, document, kind: str, locale: str, file) -> dict:
+        return self._value(document, kind, "", locale, file)
+
+    def _value(self, value, shape, pointer, locale, file):
+        if isinstance(value, list):
+            return [
+                self._value(item, f"{shape}/*", f"{pointer}/{i}", locale, file)
+                for i, item in enumerate(value)
+            ]
+        if not isinstance(value, dict):
+            return value
+
+        # 按基础键分组: {基础键: {语言: 原键}}，保持首次出现的顺序
+        groups = {}
+        for key in value:
+            base, key_locale = split_key(key)
+            if key_locale is None and _child(shape, base) in self.shapes:
+                key_locale = PRIMARY_LOCALE
+            variants = groups.setdefault(base, {})
+            # 同时有 "title" 和 "title_zh" 时优先使用带后缀的
+            if key_locale not in variants or key != base:
+                variants[key_locale] = key
+
+        result = {}
+        for base, variants in groups.items():
+            child_shape = _child(shape, base)
+            if None in variants:
+                key = variants[None]
+                result[base] = self._value(
+                    value[key], child_shape, f"{pointer}/{key}", locale, file
+                )
+                continue
+
+            key = variants.get(locale)
+            if key is None:
+                fallback = variants.get(PRIMARY_LOCALE) or next(iter(variants.values()))
+                missing = base if locale == PRIMARY_LOCALE else f"{base}_{locale}"
+                self.report.add(
+                    "missing-translation",
+                    "warning",
+                    f"缺少 {locale} 翻译 (使用 {fallback} 代替)",
+                    file=file,
+                    pointer=f"{pointer}/{missing}",
+                )
+                key = fallback
+            elif locale == PRIMARY_LOCALE:
+                self._check_lengths(value, variants, file, pointer)
+            result[base] = self._value(
+                value[key], child_shape, f"{pointer}/{key}", locale, file
+            )
+        return result
+
+    def _check_lengths(self, value, variants, file, pointer):
+        """各语言的列表长度应一致 (只在处理主语言时检查一次)。"""
+        lengths = {
+            key: len(value[key])
+            for key in variants.values()
+            if isinstance(value[key], list)
+        }
+        if len(set(lengths.values())) > 1:
+            detail = ", ".join(f"{key}={n}" for key, n in lengths.items())
+            self.report.add(
+                "translation-mismatch",
+                "warning",
+                f"各语言的列表长度不一致: {detail}",
+                file=file,
+                pointer=f"{pointer}/{next(iter(lengths))}",
+            )
+
+
+def _influence_ids(event: dict, direction: str) -> list:
+    chain = event.get("influence_chain")
+    if not isinstance(chain, dict):
+        return []
+    return [
+        item["id"]
+        for item in chain.get(direction) or []
+        if isinstance(item, dict) and isinstance(item.get("id"), str)
+    ]
+
+
+def build_core(events: list, warnings: list) -> dict:
+    """与语言无关的列式核心数据。"""
+    strings = StringTable()
+    columns = {
+        name: []
+        for name in (
+            "id",
+            "year",
+            "lat",
+            "lng",
+            "field_mask",
+            "personIds",
+            "influenced_by",
+            "influenced",
+            "storyline_ids",
+            "is_stub",
+        )
+    }
+    for event_id, event in events:
+        columns["id"].append(event_id)
+        for name in ("year", "lat", "lng"):
+            columns[name].append(event.get(name))
+        columns["field_mask"].append(field_mask(event, warnings))
+        columns["personIds"].append(
+            [strings.encode(pid) for pid in event_person_ids(event)]
+        )
+        for direction in ("influenced_by", "influenced"):
+            columns[direction].append(_influence_ids(event, direction))
+        columns["storyline_ids"].append(
+            [strings.encode(s) for s in as_list(event.get("storyline_ids"))]
+        )
+        columns["is_stub"].append(1 if event.get("is_stub") else 0)
+    return {
+        "version": LOCALE_BUNDLE_VERSION,
+        "locales": LOCALES,
+        "count": len(events),
+        "strings": strings.strings,
+        "events": columns,
+    }
+
+
+def build_locale_hot(localized: list) -> dict:
+    """某种语言逐行对应核心数据的热字段。"""
+    strings = StringTable()
+    columns = {name: [] for name in LOCALE_HOT_FIELDS}
+    for event in localized:
+        columns["title"].append(event.get("title"))
+        columns["city"].append(strings.encode(event.get("city")))
+        columns["country"].append(strings.encode(event.get("country")))
+        columns["field"].append(
+            [strings.encode(f) for f in as_list(event.get("field"))]
+        )
+    return {
+        "version": LOCALE_BUNDLE_VERSION,
+        "count": len(localized),
+        "strings": strings.strings,
+        "events": columns,
+    }
+
+
+def write_locale(
+    locale: str, events: list, localized: list, people: dict, storylines: dict
+) -> dict:
+    """写出一种语言的全部文件，返回 {"written": 更新的文件数, "removed": 删除的分片数}。"""
+    locale_dir = LOCALES_DIR / locale
+    shards_dir = locale_dir / "events"
+    written = 0
+    written += write_json(locale_dir / "events_hot.json", build_locale_hot(localized))
+    written += write_json(locale_dir / "people.json", people)
+    written += write_json(locale_dir / "storylines.json", storylines)
+
+    shard_names = set()
+    for (event_id, _), event in zip(events, localized):
+        shard = {"id": event_id}
+        shard.update(
+            (k, v)
+            for k, v in event.items()
+            if k not in CORE_KEYS and k not in LOCALE_HOT_FIELDS
+        )
+        shard_file = shards_dir / f"{event_id}.json"
+        shard_names.add(shard_file.name)
+        written += write_json(shard_file, shard)
+
+    removed = 0
+    for shard_file in shards_dir.glob("*.json"):
+        if shard_file.name not in shard_names:
+            shard_file.unlink()
+            removed += 1
+    return {"written": written, "removed": removed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按语言拆分 App 数据包。")
+    parser.add_argument("--verbose", action="store_true", help="逐条打印缺失的翻译")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    report = Report("build_locales")
+    with report.session(args):
+        build(args, report)
+
+
+def build(args, report: Report):
+    with report.phase("parse"):
+        corpus = load_corpus()
+    report.record_corpus(corpus)
+    if corpus.events_index is None or corpus.people_index is None:
+        print("[FATAL] 无法读取 events_index.json 或 people_index.json。")
+        raise SystemExit(1)
+
+    events = corpus.indexed_events()
+    people = corpus.indexed_people()
+    storylines = corpus.storylines if isinstance(corpus.storylines, dict) else {}
+
+    with report.phase("localize"):
+        shapes = translatable_shapes(
+            [("event", e) for _, e in events]
+            + [("person", p) for _, p in people]
+            + [("storyline", s) for s in storylines.values()]
+        )
+        localizer = Localizer(shapes, report)
+        localized = {}
+        for locale in LOCALES:
+            localized[locale] = (
+                [
+                    localizer.localize(
+                        event, "event", locale, corpus.event_path(event_id)
+                    )
+                    for event_id, event in events
+                ],
+                {
+                    person_id: localizer.localize(
+                        person, "person", locale, corpus.person_path(person_id)
+                    )
+                    for person_id, person in people
+                },
+                {
+                    story_id: localizer.localize(
+                        story, "storyline", locale, STORYLINES_FILE
+                    )
+                    for story_id, story in storylines.items()
+                },
+            )
+
+    warnings = []
+    with report.phase("write"):
+        changed = write_json(CORE_FILE, build_core(events, warnings))
+        print(
+            f"[INFO] {CORE_FILE}: {len(events)} 个事件"
+            f"{' (已更新)' if changed else ''}"
+        )
+        for locale in LOCALES:
+            stats = write_locale(locale, events, *localized[locale])
+            print(
+                f"[INFO] {LOCALES_DIR / locale}/: 更新 {stats['written']} 个文件, "
+                f"删除 {stats['removed']} 个过期分片"
+            )
+    for warning in warnings:
+        print(f"  [WARNING] {warning}")
+
+    # 按 (规则, 缺失的键) 汇总翻译问题
+    summary = {}
+    for finding in report.findings:
+        if finding.rule in ("missing-translation", "translation-mismatch"):
+            key = finding.pointer.rsplit("/", 1)[-1]
+            summary[(finding.rule, key)] = summary.get((finding.rule, key), 0) + 1
+            if args.verbose:
+                print(
+                    f"  [WARNING] {finding.file}#{finding.pointer}: {finding.message}"
+                )
+    print(f"\n[INFO] 翻译问题: {sum(summary.values())} 处")
+    for (rule, key), count in sorted(summary.items(), key=lambda item: -item[1]):
+        print(f"  {rule:<22} {key:<24} {count}")
+
+
+if __name__ == "__main__":
+    main()
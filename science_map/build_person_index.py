@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+从事件一侧推导人物 <-> 事件的双向索引。
+
+事件中的 personId / personIds 是唯一可信的来源；人物文件里手工维护的
+events 数组只用于对照。一次哈希连接 (按人物 ID 分组) 得到:
+- person_events: 人物 ID -> 按年份排序的事件 ID 列表 (App 的人物页面可直接使用)
+- event_people:  事件 ID -> 人物 ID 列表
+
+输出 assets/generated/person_index.json，并报告与 person.events 的不一致:
+- 事件引用了该人物，但人物的 events 中没有这个事件
+- 人物的 events 中列出了某个事件，但该事件并没有引用这个人物
+
+用法:
+    python build_person_index.py            # 构建并报告不一致
+    python build_person_index.py --strict   # 存在不一致时以错误码退出 (用于 CI)
+"""
+
+import argparse
+import sys
+
+from build_bundle import OUTPUT_DIR
+from corpus import event_person_ids, load_corpus, write_json
+
+# --- 配置 ---
+PERSON_INDEX_FILE = OUTPUT_DIR / "person_index.json"
+# --- 结束配置 ---
+
+
+def build_person_index(events: list) -> dict:
+    """events 为 [(事件 ID, 事件数据)]，返回双向索引。"""
+    event_people = {}
+    grouped = {}
+    for event_id, event in events:
+        person_ids = list(dict.fromkeys(event_person_ids(event)))
+        if not person_ids:
+            continue
+        event_people[event_id] = person_ids
+        year = event.get("year") if isinstance(event.get("year"), int) else 0
+        for person_id in person_ids:
+            grouped.setdefault(person_id, []).append((year, event_id))
+
+    person_events = {
+        person_id: [event_id for _, event_id in sorted(rows)]
+        for person_id, rows in sorted(grouped.items())
+    }
+    return {
+        "version": 1,
+        "person_events": person_events,
+        "event_people": event_people,
+    }
+
+
+def find_asymmetries(index: dict, people: dict, known_events: set) -> list:
+    """与人物文件中手工维护的 events 数组对照，返回 [(人物 ID, 事件 ID, 说明)]。"""
+    findings = []
+    derived = index["person_events"]
+
+    for person_id, event_ids in derived.items():
+        person = people.get(person_id)
+        if person is None:
+            findings.append((person_id, None, "事件引用了该人物，但人物文件不存在"))
+            continue
+        listed = set(person.get("events") or [])
+        for event_id in event_ids:
+            if event_id not in listed:
+                findings.append(
+                    (
+                        person_id,
+                        event_id,
+                        "事件引用了该人物，但 person.events 中缺少此事件",
+                    )
+                )
+
+    for person_id, person in people.items():
+        derived_ids = set(derived.get(person_id, []))
+        for event_id in person.get("events") or []:
+            if event_id in derived_ids:
+                continue
+            if event_id in known_events:
+                reason = "person.events 列出了此事件，但事件没有引用该人物"
+            else:
+                reason = "person.events 列出了不存在的事件"
+            findings.append((person_id, event_id, reason))
+
+    return findings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建人物 <-> 事件双向索引。")
+    parser.add_argument(
+        "--strict", action="store_true", help="存在不一致时以错误码退出"
+    )
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    events = corpus.indexed_events()
+    people = dict(corpus.indexed_people())
+
+    index = build_person_index(events)
+    changed = write_json(PERSON_INDEX_FILE, index)
+    print(
+        f"[INFO] {PERSON_INDEX_FILE}: {len(index['person_events'])} 个人物, "
+        f"{len(index['event_people'])} 个有人物的事件{' (已更新)' if changed else ''}"
+    )
+
+    findings = find_asymmetries(index, people, {event_id for event_id, _ in events})
+    for person_id, event_id, reason in findings:
+        target = f" -> '{event_id}'" if event_id else ""
+        print(f"  [WARN] 人物 '{person_id}'{target}: {reason}")
+
+    if findings:
+        print(f"[INFO] 共发现 {len(findings)} 处与 person.events 不一致的链接。")
+        if args.strict:
+            sys.exit(1)
+    else:
+        print("✅ person.events 与事件中的 personId 完全一致。")
+
+
+if __name__ == "__main__":
+    main()
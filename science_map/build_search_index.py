@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+为 App 的搜索框构建每种语言的倒排索引。
+
+输出 assets/generated/search_zh.json 和 search_en.json:
+- ids:      行号 -> 事件 ID (与 events_hot.json 的行顺序一致)
+- terms:    排序后的词项列表 (支持二分查找做前缀查询)
+- postings: 与 terms 对应的倒排列表，存储为行号的差值编码
+
+索引范围: 标题、城市、summary 正文、key_points 以及关联人物的姓名。
+中文文本按 CJK 单字 + 双字 (bigram) 切分，其它文本按单词切分并转为小写。
+
+增量构建: 每个事件的词项集合缓存在 .corpus_cache/search_terms.pickle 中，
+以事件文件和其关联人物文件的内容哈希 (来自 corpus 的解析缓存) 为键，
+只有这些文件发生变化的事件才会重新切分；切分规则改变时递增 TOKENIZER_VERSION。
+
+用法:
+    python build_search_index.py
+    python build_search_index.py --query "引力" --locale zh
+"""
+
+import argparse
+import os
+import pickle
+import re
+from bisect import bisect_left
+
+from build_bundle import OUTPUT_DIR
+from corpus import CACHE_DIR, event_person_ids, load_corpus, write_json
+
+# --- 配置 ---
+SEARCH_INDEX_FILES = {
+    "zh": OUTPUT_DIR / "search_zh.json",
+    "en": OUTPUT_DIR / "search_en.json",
+}
+TERMS_CACHE_FILE = CACHE_DIR / "search_terms.pickle"
+# --- 结束配置 ---
+
+# 切分规则或索引字段 (tokenize / LOCALE_FIELDS) 变化时递增，使缓存失效
+TOKENIZER_VERSION = 1
+
+# 每种语言索引的字段: (事件字段, summary 中的子字段, 人物姓名字段)
+LOCALE_FIELDS = {
+    "zh": {
+        "event": ["title", "city"],
+        "summary": ["text", "key_points"],
+        "person": "name",
+    },
+    "en": {
+        "event": ["title_en", "city_en"],
+        "summary": ["text_en", "key_points_en"],
+        "person": "name_en",
+    },
+}
+
+CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+WORD = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list:
+    """CJK 文本切分为单字和双字，其余部分切分为小写单词。"""
+    tokens = []
+    position = 0
+    for match in CJK_RUN.finditer(text):
+        tokens.extend(w.lower() for w in WORD.findall(text[position : match.start()]))
+        run = match.group()
+        tokens.extend(run)
+        tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        position = match.end()
+    tokens.extend(w.lower() for w in WORD.findall(text[position:]))
+    return tokens
+
+
+def _texts(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, str):
+                yield item
+
+
+def event_terms(event: dict, people: dict, locale: str) -> set:
+    """收集单个事件在某种语言下的所有词项。"""
+    fields = LOCALE_FIELDS[locale]
+    texts = []
+    for name in fields["event"]:
+        texts.extend(_texts(event.get(name)))
+    summary = event.get("summary")
+    if isinstance(summary, dict):
+        for name in fields["summary"]:
+            texts.extend(_texts(summary.get(name)))
+    for person_id in event_person_ids(event):
+        person = people.get(person_id)
+        if isinstance(person, dict):
+            texts.extend(_texts(person.get(fields["person"])))
+
+    terms = set()
+    for text in texts:
+        terms.update(tokenize(text))
+    return terms
+
+
+def _load_terms_cache() -> dict:
+    try:
+        with open(TERMS_CACHE_FILE, "rb") as f:
+            cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != TOKENIZER_VERSION:
+        return {}
+    return cache.get("entries", {})
+
+
+def _save_terms_cache(entries: dict):
+    TERMS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = TERMS_CACHE_FILE.with_suffix(".tmp")
+    try:
+        with open(tmp_file, "wb") as f:
+            pickle.dump(
+                {"version": TOKENIZER_VERSION, "entries": entries},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_file, TERMS_CACHE_FILE)
+    except OSError as e:
+        print(f"  (Warning: 无法写入搜索词项缓存 {TERMS_CACHE_FILE}: {e})")
+
+
+def collect_terms(corpus, events: list) -> tuple:
+    """返回 ({事件 ID: {语言: 词项集合}}, 重新切分的事件数)。"""
+    cache = _load_terms_cache()
+    result = {}
+    retokenized = 0
+    for event_id, event in events:
+        # 键包含事件文件和所有关联人物文件的哈希
+        key = (corpus.digests.get(corpus.event_path(event_id)),) + tuple(
+            corpus.digests.get(corpus.person_path(pid))
+            for pid in event_person_ids(event)
+        )
+        cached = cache.get(event_id)
+        if cached is not None and cached[0] == key:
+            result[event_id] = cached[1]
+            continue
+        result[event_id] = {
+            locale: event_terms(event, corpus.people, locale)
+            for locale in LOCALE_FIELDS
+        }
+        cache[event_id] = (key, result[event_id])
+        retokenized += 1
+
+    if retokenized or len(cache) != len(result):
+        _save_terms_cache({eid: cache[eid] for eid in result})
+    return result, retokenized
+
+
+def build_search_index(events: list, terms_by_event: dict, locale: str) -> dict:
+    inverted = {}
+    for row, (event_id, _) in enumerate(events):
+        for term in terms_by_event[event_id][locale]:
+            inverted.setdefault(term, []).append(row)
+
+    terms = sorted(inverted)
+    postings = []
+    for term in terms:
+        rows = inverted[term]
+        postings.append([rows[0]] + [b - a for a, b in zip(rows, rows[1:])])
+
+    return {
+        "version": 1,
+        "locale": locale,
+        "ids": [event_id for event_id, _ in events],
+        "terms": terms,
+        "postings": postings,
+    }
+
+
+def _decode(deltas: list) -> list:
+    rows, total = [], 0
+    for delta in deltas:
+        total += delta
+        rows.append(total)
+    return rows
+
+
+def search(index: dict, query: str) -> list:
+    """参考实现: 所有词项都必须命中，最后一个词项按前缀匹配。返回事件 ID。"""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    terms, postings = index["terms"], index["postings"]
+
+    matched = None
+    for i, token in enumerate(tokens):
+        rows = set()
+        start = bisect_left(terms, token)
+        if i == len(tokens) - 1:
+            end = start
+            while end < len(terms) and terms[end].startswith(token):
+                rows.update(_decode(postings[end]))
+                end += 1
+        elif start < len(terms) and terms[start] == token:
+            rows.update(_decode(postings[start]))
+        matched = rows if matched is None else matched & rows
+        if not matched:
+            return []
+    return [index["ids"][row] for row in sorted(matched)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建全文搜索索引。")
+    parser.add_argument("--query", help="在构建后的索引中搜索")
+    parser.add_argument("--locale", choices=sorted(LOCALE_FIELDS), default="zh")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    events = corpus.indexed_events()
+    terms_by_event, retokenized = collect_terms(corpus, events)
+
+    if args.query is not None:
+        index = build_search_index(events, terms_by_event, args.locale)
+        for event_id in search(index, args.query):
+            print(event_id)
+        return
+
+    print(f"[INFO] 共 {len(events)} 个事件, 重新切分 {retokenized} 个。")
+    for locale, index_file in SEARCH_INDEX_FILES.items():
+        index = build_search_index(events, terms_by_event, locale)
+        changed = write_json(index_file, index)
+        size_kb = index_file.stat().st_size / 1024
+        print(
+            f"[INFO] {index_file}: {len(index['terms'])} 个词项, "
+            f"{size_kb:.1f} KB{' (已更新)' if changed else ''}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+对整张影响链图做一致性检查 (verify_data_links.py 只检查 ID 是否存在)。
+
+所有检查合计 O(V + E):
+1. influence-cycle (error): 强连通分量 (Tarjan) 中包含多个事件，即影响链成环。
+   建议补丁: 把分量内的事件按 (年份, ID) 排序，删除所有从后指向前的边，
+   剩下的边都是从前指向后，环一定被打破。
+2. chronology (warning): 边 A -> B (A 影响了 B) 中 A 的年份晚于 B。
+   建议补丁: 删除这条边的声明 (也可能是方向写反了，需要人工确认)。
+3. missing-reverse-edge (warning): B 的 influenced_by 中有 A，但 A 的 influenced
+   中没有 B (或反过来)。建议补丁: 在另一端补上这条边，contribution 从已有的一端复制；
+   检查 1、2 已建议删除的边只报告，不再建议补上另一端。
+4. orphan-event (note): 从任何故事线中的事件出发，沿影响链 (不分方向) 都到达不了
+   的非存根事件。建议补丁: 加入年份范围最接近的故事线。
+
+每条问题都附带 JSON Patch (RFC 6902) 形式的建议修改 ("fix": {文件: [操作]})，
+--patch 把所有建议合并写入一个文件 (同一数组中的删除按下标从大到小排列)。
+问题可以写入 --report / --sarif (见 diagnostics.py)；有 error 时退出码为 1。
+
+用法:
+    python check_influence_graph.py
+    python check_influence_graph.py --patch influence_fixes.json
+"""
+
+import argparse
+import sys
+from collections import deque
+from pathlib import Path
+
+from corpus import EVENTS_DIR, STORYLINES_FILE, load_corpus, write_json
+from diagnostics import Report, add_arguments
+from influence_graph import InfluenceGraph
+
+DIRECTIONS = ("influenced_by", "influenced")
+
+
+def collect_declarations(events: list) -> dict:
+    """{(源 ID, 目标 ID): {方向: [(声明所在的事件 ID, 条目下标, 条目)]}}。
+
+    A 的 influenced 中的 B 和 B 的 influenced_by 中的 A 都声明了边 A -> B。
+    只收录两端事件都在索引中的边 (与 InfluenceGraph 一致)；同一文件重复声明时
+    按下标顺序全部保留。
+    """
+    known = {event_id for event_id, _ in events}
+    declarations = {}
+    for event_id, event in events:
+        chain = event.get("influence_chain")
+        if not isinstance(chain, dict):
+            continue
+        for direction in DIRECTIONS:
+            items = chain.get(direction)
+            for i, item in enumerate(items if isinstance(items, list) else []):
+                other = item.get("id") if isinstance(item, dict) else None
+                if other == event_id or other not in known:
+                    continue
+                edge = (
+                    (other, event_id)
+                    if direction == "influenced_by"
+                    else (event_id, other)
+                )
+                declarations.setdefault(edge, {}).setdefault(direction, []).append(
+                    (event_id, i, item)
+                )
+    return declarations
+
+
+def _event_file(event_id: str) -> str:
+    """与 corpus.event_path 相同，但不构造 Path (问题很多时更快)。"""
+    return f"{EVENTS_DIR.as_posix()}/{event_id}.json"
+
+
+def _remove_edge(declared: dict) -> dict:
+    """删除一条边的所有声明 (包括重复的条目) 的补丁。"""
+    fix = {}
+    for direction, entries in declared.items():
+        for event_id, i, _ in entries:
+            fix.setdefault(_event_file(event_id), []).append(
+                {"op": "remove", "path": f"/influence_chain/{direction}/{i}"}
+            )
+    return fix
+
+
+def _year(event: dict):
+    year = event.get("year")
+    return year if isinstance(year, int) and not isinstance(year, bool) else None
+
+
+def check_cycles(
+    corpus, graph: InfluenceGraph, declarations: dict, report: Report
+) -> set:
+    """返回建议删除的边。"""
+    removing = set()
+    comp = graph.strongly_connected_components()
+    members = {}
+    for node, c in enumerate(comp):
+        members.setdefault(c, []).append(node)
+
+    for nodes in members.values():
+        if len(nodes) < 2:
+            continue
+
+        def rank(node):
+            year = _year(corpus.events[graph.ids[node]])
+            return (year if year is not None else 0, graph.ids[node])
+
+        nodes.sort(key=rank)
+        ids = [graph.ids[node] for node in nodes]
+        in_component = set(nodes)
+        fix = {}
+        removed = 0
+        for node in nodes:
+            for nxt in graph.successors(node):
+                if nxt in in_component and rank(nxt) <= rank(node):
+                    edge = (graph.ids[node], graph.ids[nxt])
+                    for file, ops in _remove_edge(declarations[edge]).items():
+                        fix.setdefault(file, []).extend(ops)
+                    removing.add(edge)
+                    removed += 1
+        report.add(
+            "influence-cycle",
+            "error",
+            f"{len(ids)} 个事件构成影响环: {', '.join(ids)} (删除 {removed} 条逆序边可打破)",
+            file=_event_file(ids[0]),
+            pointer="/influence_chain",
+            fix=fix,
+        )
+    return removing
+
+
+def check_chronology(corpus, declarations: dict, report: Report) -> set:
+    """返回建议删除的边。"""
+    removing = set()
+    for (source, target), declared in sorted(declarations.items()):
+        source_year = _year(corpus.events[source])
+        target_year = _year(corpus.events[target])
+        if source_year is None or target_year is None or source_year <= target_year:
+            continue
+        direction, entries = next(iter(declared.items()))
+        event_id, i, _ = entries[0]
+        removing.add((source, target))
+        report.add(
+            "chronology",
+            "warning",
+            f"{source} ({source_year}) 晚于它影响的 {target} ({target_year})",
+            file=_event_file(event_id),
+            pointer=f"/influence_chain/{direction}/{i}",
+            fix=_remove_edge(declared),
+        )
+    return removing
+
+
+def check_symmetry(corpus, declarations: dict, report: Report, removing=()):
+    """removing 为其他检查建议删除的边: 这些边只报告问题，不建议补上另一端。"""
+    for (source, target), declared in sorted(declarations.items()):
+        if len(declared) == 2:
+            continue
+        ((direction, entries),) = declared.items()
+        event_id, i, item = entries[0]
+        # 缺少的一端: 另一个事件中的反方向
+        missing_direction = (
+            "influenced" if direction == "influenced_by" else "influenced_by"
+        )
+        other_id = source if direction == "influenced_by" else target
+        value = {"id": event_id}
+        value.update((k, v) for k, v in item.items() if k.startswith("contribution"))
+
+        chain = corpus.events[other_id].get("influence_chain")
+        if not isinstance(chain, dict):
+            op = {
+                "op": "add",
+                "path": "/influence_chain",
+                "value": {missing_direction: [value]},
+            }
+        elif not isinstance(chain.get(missing_direction), list):
+            op = {
+                "op": "add",
+                "path": f"/influence_chain/{missing_direction}",
+                "value": [value],
+            }
+        else:
+            op = {
+                "op": "add",
+                "path": f"/influence_chain/{missing_direction}/-",
+                "value": value,
+            }
+        report.add(
+            "missing-reverse-edge",
+            "warning",
+            f"{event_id} 的 {direction} 中有 {other_id}，但 {other_id} 的 "
+            f"{missing_direction} 中没有 {event_id}",
+            file=_event_file(event_id),
+            pointer=f"/influence_chain/{direction}/{i}",
+            fix=None if (source, target) in removing else {_event_file(other_id): [op]},
+        )
+
+
+def check_orphans(corpus, graph: InfluenceGraph, report: Report):
+    storylines = corpus.storylines if isinstance(corpus.storylines, dict) else {}
+    spans = {}
+    starts = []
+    for story_id, story in storylines.items():
+        entries = story.get("events") if isinstance(story, dict) else None
+        years = []
+        for event_id in entries if isinstance(entries, list) else []:
+            if event_id in graph.index:
+                starts.append(graph.index[event_id])
+                year = _year(corpus.events[event_id])
+                if year is not None:
+                    years.append(year)
+        if years:
+            spans[story_id] = (min(years), max(years))
+
+    # 不分方向的广度优先搜索
+    reached = [False] * len(graph.ids)
+    queue = deque()
+    for node in starts:
+        if not reached[node]:
+            reached[node] = True
+            queue.append(node)
+    while queue:
+        node = queue.popleft()
+        for nxt in graph.successors(node) + graph.predecessors(node):
+            if not reached[nxt]:
+                reached[nxt] = True
+                queue.append(nxt)
+
+    for node, event_id in enumerate(graph.ids):
+        event = corpus.events[event_id]
+        if reached[node] or event.get("is_stub"):
+            continue
+        fix = None
+        year = _year(event)
+        if spans and year is not None:
+            # 年份落在范围内的故事线距离为 0
+            story_id = min(
+                spans,
+                key=lambda s: (max(spans[s][0] - year, year - spans[s][1], 0), s),
+            )
+            fix = {
+                STORYLINES_FILE.as_posix(): [
+                    {"op": "add", "path": f"/{story_id}/events/-", "value": event_id}
+                ]
+            }
+        report.add(
+            "orphan-event",
+            "note",
+            f"事件 '{event_id}' 无法从任何故事线沿影响链到达",
+            file=_event_file(event_id),
+            fix=fix,
+        )
+
+
+def merge_fixes(findings: list) -> dict:
+    """合并所有建议: 去除重复的操作，同一数组中的删除按下标从大到小排列。
+
+    在同一个事件中新建 influence_chain (或其中的数组) 的多个 add 操作合并为一个，
+    否则后一个会覆盖前一个。
+    """
+    merged = {}
+    for finding in findings:
+        for file, ops in (finding.fix or {}).items():
+            bucket = merged.setdefault(file, [])
+            for op in ops:
+                same = next(
+                    (
+                        o
+                        for o in bucket
+                        if op["op"] == o["op"] == "add"
+                        and o["path"] == op["path"]
+                        and not op["path"].endswith("/-")
+                    ),
+                    None,
+                )
+                if same is None:
+                    # 复制一份: 合并时会改写 value，不能影响问题本身附带的建议
+                    if op not in bucket:
+                        bucket.append(dict(op))
+                elif isinstance(same["value"], list):
+                    same["value"] = same["value"] + op["value"]
+                else:
+                    value = dict(same["value"])
+                    for key, items in op["value"].items():
+                        value[key] = value.get(key, []) + items
+                    same["value"] = value
+
+    def order(op):
+        if op["op"] != "remove":
+            return (1, "", 0)
+        head, _, index = op["path"].rpartition("/")
+        return (0, head, -int(index))
+
+    return {file: sorted(ops, key=order) for file, ops in sorted(merged.items())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查影响链图的整体一致性。")
+    parser.add_argument(
+        "--patch", metavar="FILE", help="把所有建议的 JSON Patch 合并写入文件"
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    report = Report("check_influence_graph")
+    with report.session(args):
+        with report.phase("parse"):
+            corpus = load_corpus()
+        report.record_corpus(corpus)
+        with report.phase("graph"):
+            events = corpus.indexed_events()
+            graph = InfluenceGraph.from_events(events)
+            declarations = collect_declarations(events)
+        report.count("events", len(graph.ids))
+        report.count("edges", graph.edge_count)
+        with report.phase("check"):
+            removing = check_cycles(corpus, graph, declarations, report)
+            removing |= check_chronology(corpus, declarations, report)
+            check_symmetry(corpus, declarations, report, removing)
+            check_orphans(corpus, graph, report)
+        if args.patch:
+            with report.phase("write"):
+                write_json(Path(args.patch), merge_fixes(report.findings), indent=2)
+
+    tags = {"error": "ERROR", "warning": "WARNING", "note": "INFO"}
+    for finding in report.findings:
+        print(
+            f"  [{tags[finding.severity]}] {finding.file}#{finding.pointer}: {finding.message}"
+        )
+
+    counts = {}
+    for finding in report.findings:
+        counts[finding.rule] = counts.get(finding.rule, 0) + 1
+    print(f"\n[INFO] {len(graph.ids)} 个事件, {graph.edge_count} 条影响边:")
+    for rule in (
+        "influence-cycle",
+        "chronology",
+        "missing-reverse-edge",
+        "orphan-event",
+    ):
+        print(f"  {rule:<22} {counts.get(rule, 0)}")
+    if args.patch:
+        print(f"[INFO] 建议的修改已写入 {args.patch}")
+    if report.summary()["error"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+故事线编译器。
+
+1. 把 storylines.json 和 story_modes.json 中的每一项解析为真实的事件 ID:
+   - 完全匹配的事件 ID 直接使用；
+   - story_modes.json 使用 "newton"、"einstein" 这样的简称: 依次尝试
+     "简称_" 开头的事件 ID、ID 为简称或以 "_简称" 结尾的人物的事件，
+     只有唯一候选时才视为解析成功，否则报告为歧义或未知。
+   存根事件会被报告 (它们在地图上不显示)。
+2. 输出 assets/generated/storylines.json: 每条故事线按年份排好序的轨迹，
+   包括每一步的事件 ID、年份、坐标、上一步/下一步下标，以及整条轨迹的
+   坐标范围 (用于镜头适配)；event_storylines 为 事件 ID -> 所在故事线 的反查表。
+   App 切换故事、前后翻页都只需查表，不必每次排序和筛选。
+3. 按 storylines.json 回填每个事件的 storyline_ids (旧的 storyline_id 字段一并迁移)。
+   story_modes.json 目前未被 App 加载，只编译和报告，不参与回填。
+
+用法:
+    python compile_storylines.py
+    python compile_storylines.py --dry-run   # 只报告，不修改事件文件
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from build_bundle import OUTPUT_DIR
+from corpus import STORYLINES_FILE, load_corpus, write_json
+
+# --- 配置 ---
+STORY_MODES_FILE = Path("assets/story_modes.json")
+COMPILED_STORYLINES_FILE = OUTPUT_DIR / "storylines.json"
+# --- 结束配置 ---
+
+
+def load_story_modes() -> list:
+    """story_modes.json 为列表，缺失或损坏时返回 []。"""
+    try:
+        with open(STORY_MODES_FILE, "r", encoding="utf-8") as f:
+            modes = json.load(f)
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] 无法读取 {STORY_MODES_FILE}: {e}")
+        return []
+    return (
+        [mode for mode in modes if isinstance(mode, dict)]
+        if isinstance(modes, list)
+        else []
+    )
+
+
+class Resolver:
+    """把故事线条目解析为事件 ID。"""
+
+    def __init__(self, events: dict, people: dict):
+        self.events = events
+        self.people = people
+
+    def resolve(self, name: str) -> tuple:
+        """返回 (状态, 候选列表)，状态为 exact / alias / ambiguous / unknown。"""
+        if name in self.events:
+            return "exact", [name]
+
+        prefixed = sorted(eid for eid in self.events if eid.startswith(f"{name}_"))
+        candidates = prefixed or self._person_events(name)
+        # 有多个候选时优先排除存根
+        if len(candidates) > 1:
+            real = [eid for eid in candidates if not self.events[eid].get("is_stub")]
+            candidates = real or candidates
+        if len(candidates) == 1:
+            return "alias", candidates
+        return ("ambiguous" if candidates else "unknown"), candidates
+
+    def _person_events(self, name: str) -> list:
+        person_ids = [
+            pid for pid in self.people if pid == name or pid.endswith(f"_{name}")
+        ]
+        event_ids = []
+        for pid in person_ids:
+            events = self.people[pid].get("events")
+            if isinstance(events, list):
+                event_ids.extend(e for e in events if e in self.events)
+        return sorted(set(event_ids))
+
+
+def compile_track(
+    story_id: str, entries: list, resolver: Resolver, issues: list
+) -> dict:
+    """解析一条故事线并按年份排序 (年份相同时保持原顺序)。"""
+    steps = []
+    seen = set()
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, str):
+            issues.append((story_id, entry, "invalid", "条目不是字符串"))
+            continue
+        status, candidates = resolver.resolve(entry)
+        if status == "unknown":
+            issues.append((story_id, entry, "unknown", "找不到对应的事件"))
+            continue
+        if status == "ambiguous":
+            issues.append(
+                (story_id, entry, "ambiguous", f"有多个候选: {', '.join(candidates)}")
+            )
+            continue
+        event_id = candidates[0]
+        if status == "alias":
+            issues.append((story_id, entry, "alias", f"解析为 {event_id}"))
+        if event_id in seen:
+            issues.append((story_id, entry, "duplicate", f"{event_id} 重复出现"))
+            continue
+        seen.add(event_id)
+
+        event = resolver.events[event_id]
+        if event.get("is_stub"):
+            issues.append(
+                (story_id, entry, "stub", f"{event_id} 是存根，不会在地图上显示")
+            )
+        year = event.get("year")
+        if not isinstance(year, int):
+            issues.append(
+                (story_id, entry, "no_year", f"{event_id} 没有年份，无法排序")
+            )
+            continue
+        steps.append((year, position, event_id, event.get("lat"), event.get("lng")))
+
+    steps.sort()
+    n = len(steps)
+    coordinates = [
+        (lat, lng)
+        for _, _, _, lat, lng in steps
+        if isinstance(lat, (int, float)) and isinstance(lng, (int, float))
+    ]
+    bounds = None
+    if coordinates:
+        lats = [c[0] for c in coordinates]
+        lngs = [c[1] for c in coordinates]
+        bounds = [min(lats), min(lngs), max(lats), max(lngs)]
+
+    return {
+        "ids": [s[2] for s in steps],
+        "years": [s[0] for s in steps],
+        "lat": [s[3] if isinstance(s[3], (int, float)) else None for s in steps],
+        "lng": [s[4] if isinstance(s[4], (int, float)) else None for s in steps],
+        "prev": [i - 1 for i in range(n)],
+        "next": [i + 1 if i + 1 < n else -1 for i in range(n)],
+        "bounds": bounds,
+    }
+
+
+def compile_storylines(corpus, story_modes: list) -> tuple:
+    """返回 (编译结果, 问题列表)。问题为 (故事线 ID, 条目, 类型, 说明)。"""
+    resolver = Resolver(corpus.events, corpus.people)
+    issues = []
+    tracks = {}
+    sources = []
+    if isinstance(corpus.storylines, dict):
+        for story_id, story in corpus.storylines.items():
+            if isinstance(story, dict):
+                sources.append(("storylines", story_id, story))
+    for mode in story_modes:
+        if isinstance(mode.get("id"), str):
+            sources.append(("story_modes", mode["id"], mode))
+
+    for source, story_id, story in sources:
+        if story_id in tracks:
+            issues.append((story_id, None, "duplicate_story", f"{source} 中的 ID 重复"))
+            continue
+        entries = story.get("events") if isinstance(story.get("events"), list) else []
+        track = compile_track(story_id, entries, resolver, issues)
+        track["source"] = source
+        track["title"] = story.get("title_zh") or story.get("title")
+        track["title_en"] = story.get("title_en")
+        track["emoji"] = story.get("emoji")
+        tracks[story_id] = track
+
+    event_storylines = {}
+    for story_id, track in tracks.items():
+        for event_id in track["ids"]:
+            event_storylines.setdefault(event_id, []).append(story_id)
+
+    return {
+        "version": 1,
+        "storylines": tracks,
+        "event_storylines": event_storylines,
+    }, issues
+
+
+def storylines_error(corpus):
+    """storylines.json 无法作为回填依据时返回原因，否则返回 None。
+
+    文件缺失时 load_corpus 不记录错误、storylines 为 {}，若继续回填会清空
+    所有事件的 storyline_ids，因此必须在写入任何文件之前中止。
+    """
+    if not STORYLINES_FILE.exists():
+        return "文件不存在"
+    if STORYLINES_FILE in corpus.errors:
+        return f"无法解析: {corpus.errors[STORYLINES_FILE]}"
+    if not isinstance(corpus.storylines, dict):
+        return "顶层不是 JSON 对象"
+    return None
+
+
+def backfill_storyline_ids(corpus, compiled: dict) -> dict:
+    """按 storylines.json 计算每个事件应有的 storyline_ids。
+
+    返回 {事件 ID: (原值, 新值)}，只包含需要修改的事件。
+    """
+    expected = {}
+    for story_id, track in compiled["storylines"].items():
+        if track["source"] == "storylines":
+            for event_id in track["ids"]:
+                expected.setdefault(event_id, []).append(story_id)
+
+    changes = {}
+    for event_id, event in corpus.events.items():
+        current = event.get("storyline_ids")
+        if current is None and "storyline_id" in event:
+            current = event["storyline_id"]
+            if isinstance(current, str):
+                current = [current]
+        new = expected.get(event_id, [])
+        legacy = "storyline_id" in event
+        if (current or []) != new or legacy:
+            changes[event_id] = (current, new)
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="编译并校验故事线。")
+    parser.add_argument("--dry-run", action="store_true", help="只报告，不修改事件文件")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    error = storylines_error(corpus)
+    if error:
+        print(f"[FATAL] {STORYLINES_FILE} {error}，不编译也不回填 storyline_ids。")
+        sys.exit(1)
+    compiled, issues = compile_storylines(corpus, load_story_modes())
+
+    for story_id, entry, kind, message in issues:
+        tag = "INFO" if kind == "alias" else "WARNING"
+        label = f"'{entry}'" if entry is not None else ""
+        print(f"  [{tag}] {story_id} {label}: {message}")
+
+    changed = write_json(COMPILED_STORYLINES_FILE, compiled)
+    print(
+        f"\n[INFO] {COMPILED_STORYLINES_FILE}: {len(compiled['storylines'])} 条故事线, "
+        f"{len(compiled['event_storylines'])} 个事件"
+        f"{' (已更新)' if changed else ''}"
+    )
+    for story_id, track in compiled["storylines"].items():
+        print(f"  - {story_id} ({track['source']}): {len(track['ids'])} 步")
+
+    changes = backfill_storyline_ids(corpus, compiled)
+    for event_id, (old, new) in sorted(changes.items()):
+        if args.dry_run:
+            print(f"[DRY-RUN] {event_id}: storyline_ids {old} -> {new}")
+            continue
+        event = corpus.events[event_id]
+        event.pop("storyline_id", None)
+        if new:
+            event["storyline_ids"] = new
+        else:
+            event.pop("storyline_ids", None)
+        try:
+            write_json(corpus.event_path(event_id), event, indent=4)
+        except OSError as e:
+            print(f"❌ Error processing {corpus.event_path(event_id)}: {e}")
+            continue
+        print(f"✅ {event_id}: storyline_ids {old} -> {new}")
+
+    verb = "需要更新" if args.dry_run else "已更新"
+    print(f"\n[INFO] storyline_ids: {len(changes)} 个事件{verb}。")
+
+
+if __name__ == "__main__":
+    main()
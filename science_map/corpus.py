@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+科学地图语料库的共享加载器。
+
+所有维护脚本 (verify_data_links.py, create_stub.py, find_missing_events_people.py,
+list_all_fields.py, standardize_fields.py) 都通过 load_corpus() 读取
+assets/events、assets/people、两个索引文件和 storylines.json。
+
+- 解析在进程池中并行进行。
+- 解析结果缓存在磁盘上 (.corpus_cache/)，以 路径 + mtime + 内容哈希 为键：
+  mtime 和大小未变的文件不会被重新读取；mtime 变了但内容哈希相同的文件
+  也不会被重新解析。
+- 每个文档在缓存中单独保存为 pickle 字节串。读取缓存只得到这些字节串，
+  Corpus.events / people 中的文档在第一次访问时才反序列化，只用到哈希和
+  索引的脚本 (如增量验证) 不必还原整个语料库。
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# --- 配置 ---
+EVENTS_INDEX_FILE = Path("assets/events_index.json")
+PEOPLE_INDEX_FILE = Path("assets/people_index.json")
+STORYLINES_FILE = Path("assets/storylines.json")
+EVENTS_DIR = Path("assets/events")
+PEOPLE_DIR = Path("assets/people")
+CACHE_DIR = Path(".corpus_cache")
+CACHE_FILE = CACHE_DIR / "parse_cache.pickle"
+# --- 结束配置 ---
+
+# 缓存格式变化时递增，旧缓存会被整体丢弃
+CACHE_VERSION = 2
+
+# 少于这个数量的待解析文件直接在当前进程中解析 (进程池的启动开销更大)
+PARALLEL_THRESHOLD = 64
+
+
+class Documents(MutableMapping):
+    """ID -> 解析后的 JSON。从缓存载入的值先以 pickle 字节串保存，
+    第一次访问时反序列化并替换 (之后的修改作用于同一个对象)。"""
+
+    def __init__(self):
+        self._items = {}
+
+    def __getitem__(self, key):
+        value = self._items[key]
+        if type(value) is bytes:
+            value = self._items[key] = pickle.loads(value)
+        return value
+
+    def __setitem__(self, key, value):
+        self._items[key] = value
+
+    def __delitem__(self, key):
+        del self._items[key]
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return f"Documents({len(self._items)} items)"
+
+
+class PathDict(MutableMapping):
+    """以 Path 为键的 dict，内部以路径字符串为键 (不必为每个文件构造 Path)。"""
+
+    def __init__(self):
+        self._items = {}
+
+    def __getitem__(self, path):
+        return self._items[str(path)]
+
+    def __setitem__(self, path, value):
+        self._items[str(path)] = value
+
+    def __delitem__(self, path):
+        del self._items[str(path)]
+
+    def __contains__(self, path):
+        return str(path) in self._items
+
+    def __iter__(self):
+        return map(Path, self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return f"PathDict({len(self._items)} items)"
+
+
+class Corpus:
+    """内存中的语料库模型。
+
+    events / people 以文件名 (不含 .json) 为键，值为解析后的 JSON dict
+    (Documents，按需反序列化)。
+    events_index / people_index 为索引文件中的 ID 列表 (文件缺失或损坏时为 None)。
+    errors 记录所有无法解析的文件: {Path: 错误信息}。
+    digests 记录每个已读取文件的内容哈希: {Path: sha1}。
+    """
+
+    def __init__(self):
+        self.events = Documents()
+        self.people = Documents()
+        self.storylines = {}
+        self.events_index = None
+        self.people_index = None
+        self.errors = {}
+        self.digests = PathDict()
+        self.stats = {"files": 0, "parsed": 0, "cached": 0, "seconds": 0.0}
+
+    def indexed_events(self) -> list:
+        """按 events_index 的顺序返回 [(事件 ID, 事件数据)]，跳过缺失或无法解析的文件。"""
+        ids = dict.fromkeys(self.events_index or [])
+        return [(eid, self.events[eid]) for eid in ids if eid in self.events]
+
+    def indexed_people(self) -> list:
+        """按 people_index 的顺序返回 [(人物 ID, 人物数据)]，跳过缺失或无法解析的文件。"""
+        ids = dict.fromkeys(self.people_index or [])
+        return [(pid, self.people[pid]) for pid in ids if pid in self.people]
+
+    def event_path(self, event_id: str) -> Path:
+        return EVENTS_DIR / f"{event_id}.json"
+
+    def person_path(self, person_id: str) -> Path:
+        return PEOPLE_DIR / f"{person_id}.json"
+
+
+def event_person_ids(event: dict) -> list:
+    """返回事件关联的人物 ID 列表 (personIds 优先，personId 可以是字符串或列表)。"""
+    p_ids = event.get("personIds")
+    p_id = event.get("personId")
+    if isinstance(p_ids, list):
+        return [pid for pid in p_ids if isinstance(pid, str)]
+    if isinstance(p_id, str):
+        return [p_id]
+    if isinstance(p_id, list):
+        return [pid for pid in p_id if isinstance(pid, str)]
+    return []
+
+
+def _parse_file(path: str, raw: bytes = None):
+    """读取并解析单个 JSON 文件。
+
+    返回 (mtime_ns, size, digest, data, error)。
+    该函数在工作进程中运行，因此只使用可 pickle 的参数和返回值。
+    """
+    try:
+        st = os.stat(path)
+        if raw is None:
+            with open(path, "rb") as f:
+                raw = f.read()
+    except OSError as e:
+        return None, None, None, None, str(e)
+
+    digest = hashlib.sha1(raw).hexdigest()
+    try:
+        data = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        return st.st_mtime_ns, st.st_size, digest, None, str(e)
+    return st.st_mtime_ns, st.st_size, digest, data, None
+
+
+def _parse_entry(path: str, raw: bytes = None):
+    """与 _parse_file 相同，但 data 以 pickle 字节串返回 (缓存条目的格式)。"""
+    mtime, size, digest, data, error = _parse_file(path, raw)
+    if error is None:
+        data = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    return mtime, size, digest, data, error
+
+
+def _parse_batch(paths):
+    return [(path, _parse_entry(path)) for path in paths]
+
+
+def list_json(directory: Path) -> list:
+    """目录中所有 .json 文件的路径字符串，按文件名排序 (目录不存在时为 [])。
+
+    比 sorted(directory.glob("*.json")) 快得多: 只排序字符串，不构造 Path。
+    """
+    try:
+        with os.scandir(directory) as entries:
+            names = [
+                entry.name
+                for entry in entries
+                if entry.name.endswith(".json") and entry.is_file()
+            ]
+    except OSError:
+        return []
+    names.sort()
+    prefix = str(directory)
+    return [f"{prefix}/{name}" for name in names]
+
+
+def _load_cache(cache_file: Path) -> dict:
+    try:
+        with open(cache_file, "rb") as f:
+            cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("entries", {})
+
+
+def _save_cache(cache_file: Path, entries: dict):
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix(".tmp")
+    try:
+        with open(tmp_file, "wb") as f:
+            pickle.dump(
+                {"version": CACHE_VERSION, "entries": entries},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"  (Warning: 无法写入解析缓存 {cache_file}: {e})")
+
+
+def parse_files(paths, cache_file: Path = CACHE_FILE, use_cache: bool = True):
+    """解析一组 JSON 文件，尽可能复用磁盘缓存。
+
+    返回 ({路径字符串: 缓存条目}, 重新解析的文件数, 读取的字节数)。缓存条目为
+    (mtime_ns, size, digest, blob, error)，blob 为解析结果的 pickle 字节串。
+    """
+    entries = _load_cache(cache_file) if use_cache else {}
+    results = {}
+    to_check = []
+
+    # 1. mtime 和大小都未变: 直接使用缓存，不读文件
+    for path in paths:
+        key = str(path)
+        cached = entries.get(key)
+        try:
+            st = os.stat(key)
+        except OSError as e:
+            results[key] = (None, None, None, None, str(e))
+            continue
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            results[key] = cached
+        else:
+            to_check.append(key)
+
+    # 2. mtime 变了: 比较内容哈希，只有内容真正变化才重新解析
+    to_parse = []
+    parsed = 0
+    for key in to_check:
+        cached = entries.get(key)
+        if cached is None:
+            to_parse.append(key)
+            continue
+        try:
+            st = os.stat(key)
+            with open(key, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            results[key] = (None, None, None, None, str(e))
+            continue
+        if hashlib.sha1(raw).hexdigest() == cached[2]:
+            results[key] = (st.st_mtime_ns, st.st_size) + tuple(cached[2:])
+        else:
+            results[key] = _parse_entry(key, raw)
+            parsed += 1
+
+    # 3. 新文件: 数量多时并行解析
+    if len(to_parse) >= PARALLEL_THRESHOLD:
+        workers = os.cpu_count() or 1
+        chunk = max(1, len(to_parse) // (workers * 4))
+        batches = [to_parse[i : i + chunk] for i in range(0, len(to_parse), chunk)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for batch in pool.map(_parse_batch, batches):
+                results.update(batch)
+    else:
+        results.update(_parse_batch(to_parse))
+
+    parsed += len(to_parse)
+    # 第 1 步命中缓存的文件不读取内容
+    bytes_read = sum(results[key][1] or 0 for key in to_check + to_parse)
+
+    if use_cache:
+        # 只保留本次仍然存在的文件，被删除的文件自然从缓存中移除
+        new_entries = {
+            key: entry for key, entry in results.items() if entry[0] is not None
+        }
+        if to_check or new_entries.keys() != entries.keys():
+            _save_cache(cache_file, new_entries)
+
+    return results, parsed, bytes_read
+
+
+def write_json(path: Path, data, indent=None) -> bool:
+    """原子地写入 JSON 文件 (临时文件 + 重命名)。
+
+    内容与磁盘上的文件完全相同时不写入，返回是否真正写入。
+    indent 为 None 时使用紧凑格式 (供 App 加载的构建产物)。
+    """
+    if indent is None:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=indent)
+    raw = text.encode("utf-8")
+
+    try:
+        with open(path, "rb") as f:
+            if f.read() == raw:
+                return False
+    except OSError:
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(f".{path.name}.tmp")
+    with open(tmp_file, "wb") as f:
+        f.write(raw)
+    os.replace(tmp_file, path)
+    return True
+
+
+def load_corpus(use_cache: bool = True) -> Corpus:
+    """加载整个语料库 (事件、人物、故事线和两个索引)。"""
+    start = time.perf_counter()
+    corpus = Corpus()
+
+    event_files = list_json(EVENTS_DIR)
+    person_files = list_json(PEOPLE_DIR)
+    index_files = [str(EVENTS_INDEX_FILE), str(PEOPLE_INDEX_FILE), str(STORYLINES_FILE)]
+    all_files = event_files + person_files + index_files
+
+    results, parsed, bytes_read = parse_files(all_files, use_cache=use_cache)
+
+    def take(key: str):
+        """返回 pickle 字节串，无法读取或解析时返回 None。"""
+        _, _, digest, blob, error = results[key]
+        if digest is not None:
+            corpus.digests._items[key] = digest
+        if error is not None:
+            corpus.errors[Path(key)] = error
+            return None
+        return blob
+
+    for files, documents in (
+        (event_files, corpus.events),
+        (person_files, corpus.people),
+    ):
+        items = documents._items
+        for key in files:
+            blob = take(key)
+            if blob is not None:
+                # "assets/events/<id>.json" -> "<id>"
+                items[key[key.rindex("/") + 1 : -5]] = blob
+
+    def take_data(path: Path):
+        blob = take(str(path))
+        return None if blob is None else pickle.loads(blob)
+
+    # 索引文件缺失时不计入 errors，由调用脚本决定如何报告
+    if EVENTS_INDEX_FILE.exists():
+        corpus.events_index = take_data(EVENTS_INDEX_FILE)
+    if PEOPLE_INDEX_FILE.exists():
+        corpus.people_index = take_data(PEOPLE_INDEX_FILE)
+    if STORYLINES_FILE.exists():
+        corpus.storylines = take_data(STORYLINES_FILE) or {}
+
+    corpus.stats = {
+        "files": len(all_files),
+        "parsed": parsed,
+        "cached": len(all_files) - parsed,
+        "bytes_read": bytes_read,
+        "seconds": time.perf_counter() - start,
+    }
+    return corpus
+
+
+def main():
+    use_cache = "--no-cache" not in sys.argv[1:]
+    corpus = load_corpus(use_cache=use_cache)
+    stats = corpus.stats
+    print(
+        f"[INFO] 已加载 {len(corpus.events)} 个事件, {len(corpus.people)} 个人物, "
+        f"{len(corpus.storylines)} 条故事线。"
+    )
+    print(
+        f"[INFO] 共 {stats['files']} 个文件: 解析 {stats['parsed']} 个, "
+        f"缓存命中 {stats['cached']} 个, 耗时 {stats['seconds'] * 1000:.1f} ms。"
+    )
+    for path, error in sorted(corpus.errors.items()):
+        print(f"  [ERROR] 无法解析 {path}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+常驻的语料库服务: 只加载一次语料库，之后增量更新，并通过本地 HTTP / JSON-RPC 接口回答查询。
+
+- 启动时通过 load_corpus() / load_references() 加载 (复用磁盘缓存)。
+- 后台线程每隔 --interval 秒检查 assets/events、assets/people、两个索引文件和
+  storylines.json 的 mtime / 大小，只重新解析变化的文件，并更新该文件的引用；
+  影响链图在下一次查询时按需重建。
+- 查询接口 (GET /<方法>?参数=值，或 POST /rpc 发送 JSON-RPC 2.0 请求，params 为对象):
+      status                                    语料库概况
+      events        from, to, field, person, cites   按年份范围、学科、人物、引用筛选事件
+      people        without_events              人物列表 (可只列出没有任何事件的人物)
+      neighborhood  id, hops, direction         影响链邻域 (forward / backward / both)
+      dangling                                  指向不存在的事件或人物的引用
+      verify                                    重新运行 verify_data_links 的检查
+      refresh                                   立即检查文件变化
+  未知的方法返回 404 / -32601，参数错误返回 400 / -32602，
+  查询内部出错返回 500 / -32603 (调用栈打印到 stderr)。
+
+只监听本机地址。
+
+用法:
+    python corpus_daemon.py [--port 8765] [--interval 1.0]
+    curl 'http://127.0.0.1:8765/events?from=1600&to=1700&cites=kepler_laws_1609'
+    curl -d '{"jsonrpc": "2.0", "id": 1, "method": "dangling"}' http://127.0.0.1:8765/rpc
+"""
+
+import argparse
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from corpus import (
+    EVENTS_DIR,
+    EVENTS_INDEX_FILE,
+    PEOPLE_DIR,
+    PEOPLE_INDEX_FILE,
+    STORYLINES_FILE,
+    _parse_file,
+    event_person_ids,
+    load_corpus,
+)
+from influence_graph import InfluenceGraph
+from references import ReferenceTable, extract_references, load_references
+from verify_data_links import unique_in_order, verify_event_links, verify_person_links
+
+# --- 配置 ---
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_INTERVAL = 1.0
+# --- 结束配置 ---
+
+
+class QueryError(Exception):
+    """参数错误，返回 HTTP 400 / JSON-RPC -32602。"""
+
+
+class UnknownMethod(Exception):
+    """未知的方法，返回 HTTP 404 / JSON-RPC -32601。"""
+
+
+def _scan() -> dict:
+    """{Path: (mtime_ns, size)}，覆盖所有被监视的文件。"""
+    files = {}
+    for directory in (EVENTS_DIR, PEOPLE_DIR):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.endswith(".json") and entry.is_file():
+                st = entry.stat()
+                files[directory / entry.name] = (st.st_mtime_ns, st.st_size)
+    for path in (EVENTS_INDEX_FILE, PEOPLE_INDEX_FILE, STORYLINES_FILE):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        files[path] = (st.st_mtime_ns, st.st_size)
+    return files
+
+
+class CorpusState:
+    """内存中的语料库及其派生数据。所有访问都在 lock 内进行。"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.corpus = load_corpus()
+        table = load_references(self.corpus)
+        self.refs_by_doc = {}
+        for ref in table:
+            self.refs_by_doc.setdefault((ref.source_type, ref.source_id), []).append(
+                ref
+            )
+        self.files = _scan()
+        self._references = table
+        self._graph = None
+        self.loaded_at = time.time()
+        self.updates = 0
+
+    # ---------- 增量更新 ----------
+
+    def refresh(self) -> dict:
+        """检查文件变化并应用，返回 {"changed": [...], "removed": [...]}。"""
+        with self.lock:
+            files = _scan()
+            changed = [p for p, sig in files.items() if self.files.get(p) != sig]
+            removed = [p for p in self.files if p not in files]
+            for path in changed:
+                self._reload(path)
+            for path in removed:
+                self._remove(path)
+            self.files = files
+            if changed or removed:
+                self._references = None
+                self._graph = None
+                self.updates += 1
+            return {
+                "changed": sorted(p.as_posix() for p in changed),
+                "removed": sorted(p.as_posix() for p in removed),
+            }
+
+    def _reload(self, path):
+        corpus = self.corpus
+        _, _, digest, data, error = _parse_file(str(path))
+        corpus.errors.pop(path, None)
+        if digest is not None:
+            corpus.digests[path] = digest
+        if error is not None:
+            corpus.errors[path] = error
+            data = None
+
+        if path == EVENTS_INDEX_FILE:
+            corpus.events_index = data
+        elif path == PEOPLE_INDEX_FILE:
+            corpus.people_index = data
+        elif path == STORYLINES_FILE:
+            corpus.storylines = data or {}
+        else:
+            source_type = "event" if path.parent == EVENTS_DIR else "person"
+            documents = corpus.events if source_type == "event" else corpus.people
+            if data is None:
+                documents.pop(path.stem, None)
+                self.refs_by_doc.pop((source_type, path.stem), None)
+            else:
+                documents[path.stem] = data
+                self.refs_by_doc[(source_type, path.stem)] = extract_references(
+                    source_type, path.stem, data
+                )
+
+    def _remove(self, path):
+        corpus = self.corpus
+        corpus.errors.pop(path, None)
+        corpus.digests.pop(path, None)
+        if path == EVENTS_INDEX_FILE:
+            corpus.events_index = None
+        elif path == PEOPLE_INDEX_FILE:
+            corpus.people_index = None
+        elif path == STORYLINES_FILE:
+            corpus.storylines = {}
+        elif path.parent == EVENTS_DIR:
+            corpus.events.pop(path.stem, None)
+            self.refs_by_doc.pop(("event", path.stem), None)
+        else:
+            corpus.people.pop(path.stem, None)
+            self.refs_by_doc.pop(("person", path.stem), None)
+
+    @property
+    def references(self) -> ReferenceTable:
+        if self._references is None:
+            refs = []
+            for key in sorted(self.refs_by_doc):
+                refs.extend(self.refs_by_doc[key])
+            self._references = ReferenceTable(refs)
+        return self._references
+
+    @property
+    def graph(self) -> InfluenceGraph:
+        if self._graph is None:
+            self._graph = InfluenceGraph.from_events(self.corpus.indexed_events())
+        return self._graph
+
+    # ---------- 查询 ----------
+
+    def status(self) -> dict:
+        corpus = self.corpus
+        return {
+            "events": len(corpus.events),
+            "people": len(corpus.people),
+            "storylines": len(corpus.storylines or {}),
+            "references": len(self.references),
+            "errors": {p.as_posix(): e for p, e in sorted(corpus.errors.items())},
+            "loaded_at": self.loaded_at,
+            "updates": self.updates,
+        }
+
+    def events(
+        self, *, from_=None, to=None, field=None, person=None, cites=None
+    ) -> list:
+        year_from = _int_param(from_, "from")
+        year_to = _int_param(to, "to")
+
+        targets = None
+        if cites:
+            # 引用某个人物 = 引用该人物的任意事件 (或直接关联该人物)
+            targets = {cites}
+            person_doc = self.corpus.people.get(cites)
+            if isinstance(person_doc, dict):
+                targets.update(
+                    e for e in person_doc.get("events") or [] if isinstance(e, str)
+                )
+
+        results = []
+        for event_id, event in self.corpus.events.items():
+            year = event.get("year")
+            if year_from is not None or year_to is not None:
+                if not isinstance(year, int):
+                    continue
+                if year_from is not None and year < year_from:
+                    continue
+                if year_to is not None and year > year_to:
+                    continue
+            if field:
+                fields = event.get("field")
+                fields = [fields] if isinstance(fields, str) else fields or []
+                if field not in fields:
+                    continue
+            if person and person not in event_person_ids(event):
+                continue
+            if targets is not None and not any(
+                ref.target_id in targets
+                for ref in self.refs_by_doc.get(("event", event_id), [])
+            ):
+                continue
+            results.append(
+                {
+                    "id": event_id,
+                    "year": year,
+                    "title": event.get("title"),
+                    "title_en": event.get("title_en"),
+                    "is_stub": event.get("is_stub") is True,
+                }
+            )
+        results.sort(
+            key=lambda e: (e["year"] if isinstance(e["year"], int) else 0, e["id"])
+        )
+        return results
+
+    def people(self, *, without_events=None) -> list:
+        without_events = without_events in (True, "1", "true", "yes")
+        referenced = {
+            ref.target_id for ref in self.references if ref.kind == "personIds"
+        }
+        results = []
+        for person_id, person in sorted(self.corpus.people.items()):
+            events = [e for e in person.get("events") or [] if isinstance(e, str)]
+            linked = person_id in referenced
+            if without_events and (events or linked):
+                continue
+            results.append(
+                {
+                    "id": person_id,
+                    "name": person.get("name"),
+                    "name_en": person.get("name_en"),
+                    "events": events,
+                    "referenced_by_events": linked,
+                }
+            )
+        return results
+
+    def neighborhood(self, *, event_id=None, hops=None, direction="both") -> dict:
+        hops = _int_param(hops, "hops")
+        if hops is None:
+            hops = 1
+        if hops < 0:
+            raise QueryError(f"参数 hops 不能为负数: {hops}")
+        if direction not in ("forward", "backward", "both"):
+            raise QueryError("direction 必须是 forward、backward 或 both")
+        graph = self.graph
+        if event_id not in graph.index:
+            raise QueryError(f"未知的事件 ID: {event_id}")
+        node = graph.index[event_id]
+        result = {"id": event_id, "hops": hops}
+        if direction in ("forward", "both"):
+            dist = graph.within_hops(node, hops, forward=True)
+            result["influenced"] = _by_distance(graph, dist)
+        if direction in ("backward", "both"):
+            dist = graph.within_hops(node, hops, forward=False)
+            result["influenced_by"] = _by_distance(graph, dist)
+        return result
+
+    def dangling(self) -> list:
+        events, people = self.corpus.events, self.corpus.people
+        missing = {}
+        for ref in self.references:
+            exists = ref.target_id in (people if ref.kind == "personIds" else events)
+            if not exists:
+                missing.setdefault((ref.target_id, ref.kind), []).append(
+                    {"source": ref.source_id, "pointer": ref.pointer}
+                )
+        return [
+            {"target": target, "kind": kind, "sources": sources}
+            for (target, kind), sources in sorted(missing.items())
+        ]
+
+    def verify(self) -> dict:
+        corpus, references = self.corpus, self.references
+        if not isinstance(corpus.events_index, list) or not isinstance(
+            corpus.people_index, list
+        ):
+            raise QueryError("索引文件缺失或格式错误")
+        valid_event_ids = set(corpus.events_index)
+        valid_person_ids = set(corpus.people_index)
+        lines = []
+        errors = 0
+        for event_id in unique_in_order(corpus.events_index):
+            errors += verify_event_links(
+                corpus,
+                references,
+                event_id,
+                valid_event_ids,
+                valid_person_ids,
+                lines.append,
+            )
+        for person_id in unique_in_order(corpus.people_index):
+            errors += verify_person_links(
+                corpus, references, person_id, valid_event_ids, lines.append
+            )
+        return {"errors": errors, "messages": lines}
+
+    METHODS = ("status", "events", "people", "neighborhood", "dangling", "verify")
+    # 查询参数名 -> 处理函数的参数名 (from 是 Python 关键字，id 与内置函数同名)
+    PARAM_NAMES = {"from": "from_", "id": "event_id"}
+
+    def call(self, method: str, params: dict):
+        """调用查询方法。方法和参数在调用前检查，处理函数内部的异常原样抛出。"""
+        if method != "refresh" and method not in self.METHODS:
+            raise UnknownMethod(method)
+        handler = getattr(self, method)
+        internal = set(self.PARAM_NAMES.values())
+        unknown = sorted(k for k in params if k in internal)
+        if unknown:
+            raise QueryError(f"{method} 的参数错误: 未知的参数 {', '.join(unknown)}")
+        kwargs = {self.PARAM_NAMES.get(k, k): v for k, v in params.items()}
+        try:
+            inspect.signature(handler).bind(**kwargs)
+        except TypeError as e:
+            raise QueryError(f"{method} 的参数错误: {e}")
+        if method == "refresh":
+            return handler(**kwargs)
+        with self.lock:
+            return handler(**kwargs)
+
+
+def _by_distance(graph: InfluenceGraph, dist: dict) -> dict:
+    """{事件 ID: 跳数}，按跳数、再按 ID 排序。"""
+    return {
+        graph.ids[n]: d
+        for n, d in sorted(dist.items(), key=lambda item: (item[1], graph.ids[item[0]]))
+    }
+
+
+def _int_param(value, name: str):
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise QueryError(f"参数 {name} 必须是整数: {value!r}")
+
+
+# ---------- HTTP ----------
+
+
+class Handler(BaseHTTPRequestHandler):
+    state = None  # 由 serve() 设置
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        method = url.path.strip("/") or "status"
+        params = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        try:
+            self._send(200, self.state.call(method, params))
+        except UnknownMethod:
+            self._send(404, {"error": f"未知的方法: {method}"})
+        except QueryError as e:
+            self._send(400, {"error": str(e)})
+        except Exception:
+            _log_internal_error(method)
+            self._send(500, {"error": "Internal error"})
+
+    def do_POST(self):
+        if urllib.parse.urlparse(self.path).path != "/rpc":
+            self._send(404, {"error": "JSON-RPC 请求请发送到 /rpc"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length).decode("utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            self._send(200, _rpc_error(None, -32700, "Parse error"))
+            return
+        if isinstance(request, list):
+            self._send(200, [self._rpc(item) for item in request])
+        else:
+            self._send(200, self._rpc(request))
+
+    def _rpc(self, request) -> dict:
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return _rpc_error(None, -32600, "Invalid Request")
+        request_id = request.get("id")
+        params = request.get("params") or {}
+        if not isinstance(params, dict):
+            return _rpc_error(request_id, -32602, "params 必须是对象")
+        try:
+            result = self.state.call(request["method"], params)
+        except UnknownMethod:
+            return _rpc_error(
+                request_id, -32601, f"Method not found: {request['method']}"
+            )
+        except QueryError as e:
+            return _rpc_error(request_id, -32602, str(e))
+        except Exception:
+            _log_internal_error(request["method"])
+            return _rpc_error(request_id, -32603, "Internal error")
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+def _log_internal_error(method: str):
+    print(f"  [ERROR] 处理 {method} 时出错:", file=sys.stderr)
+    traceback.print_exc()
+
+
+def _rpc_error(request_id, code: int, message: str) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message},
+    }
+
+
+def watch(state: CorpusState, interval: float, stop: threading.Event):
+    while not stop.wait(interval):
+        try:
+            changes = state.refresh()
+        except Exception as e:  # 监视线程不能退出
+            print(f"  [ERROR] 增量更新失败: {e}")
+            continue
+        for path in changes["changed"]:
+            print(f"  [INFO] 已更新: {path}")
+        for path in changes["removed"]:
+            print(f"  [INFO] 已删除: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻的语料库查询服务。")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="检查文件变化的间隔 (秒)",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    state = CorpusState()
+    print(
+        f"[INFO] 已加载 {len(state.corpus.events)} 个事件, {len(state.corpus.people)} 个人物 "
+        f"({(time.perf_counter() - start) * 1000:.0f} ms)。"
+    )
+
+    stop = threading.Event()
+    watcher = threading.Thread(
+        target=watch, args=(state, args.interval, stop), daemon=True
+    )
+    watcher.start()
+
+    Handler.state = state
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"[INFO] 正在监听 http://{args.host}:{args.port}/ (Ctrl+C 退出)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
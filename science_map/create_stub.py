@@ -8,158 +8,83 @@
 3. 将“被引用的ID”与“已知的ID”进行比较，找出“缺失的ID”。
 4. 为所有“缺失的ID”自动创建最小化的 stub json 文件。
 5. 将这些新的 stub ID 添加回 events_index.json。
+
+--report / --sarif / --profile 见 diagnostics.py。
 """
 
+import argparse
 import json
 import sys
-from pathlib import Path
 
-# --- 配置 ---
-EVENTS_INDEX_FILE = Path("assets/events_index.json")
-EVENTS_DIR = Path("assets/events")
-PEOPLE_INDEX_FILE = Path("assets/people_index.json")
-PEOPLE_DIR = Path("assets/people")
-# --- 结束配置 ---
+from corpus import EVENTS_DIR, EVENTS_INDEX_FILE, PEOPLE_INDEX_FILE, Corpus, load_corpus
+from diagnostics import Report, add_arguments
+from references import ReferenceTable, load_references
+
 
+def load_index(corpus: Corpus) -> set:
+    """从已加载的语料库中取出事件索引的所有有效ID。"""
+    if not EVENTS_INDEX_FILE.exists():
+        print(f"[FATAL] 索引文件未找到: {EVENTS_INDEX_FILE}")
+        sys.exit(1)
 
-def load_index(index_file: Path) -> set:
-    """从索引文件加载所有有效的ID。"""
-    if not index_file.exists():
-        print(f"[FATAL] 索引文件未找到: {index_file}")
+    if EVENTS_INDEX_FILE in corpus.errors:
+        print(
+            f"[FATAL] 索引文件 {EVENTS_INDEX_FILE} JSON 格式错误: "
+            f"{corpus.errors[EVENTS_INDEX_FILE]}"
+        )
         sys.exit(1)
 
-    with open(index_file, "r", encoding="utf-8") as f:
-        try:
-            return set(json.load(f))
-        except json.JSONDecodeError as e:
-            print(f"[FATAL] 索引文件 {index_file} JSON 格式错误: {e}")
-            sys.exit(1)
+    return set(corpus.events_index)
 
 
-def find_all_referenced_ids(existing_ids: set) -> set:
-    """遍历所有事件和人物，收集所有被引用的事件 ID。"""
-    import re
+def find_all_referenced_ids(
+    corpus: Corpus, references: ReferenceTable, existing_ids: set
+) -> set:
+    """遍历所有事件和人物，收集所有被引用的事件 ID。
 
+    事件中的 influence_chain 和任意文本里的反引号引用 (如 `event_id`)，
+    以及人物文件中的 events 字段和文本引用，均来自 references.py 的引用表。
+    """
     all_referenced_ids = set()
 
     print(f"[INFO] 正在扫描 {len(existing_ids)} 个现有事件的链接...")
 
     # 1. 检查事件文件中的引用
     for event_id in existing_ids:
-        file_path = EVENTS_DIR / f"{event_id}.json"
-
-        if not file_path.exists():
-            # verify_data_links.py 已经报告过这个错误，这里跳过
-            continue
+        file_path = corpus.event_path(event_id)
 
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception:
+        if file_path in corpus.errors:
             print(f"  (Warning: 无法读取 {file_path}, 跳过)")
             continue
 
-        # 1.1 检查 Event -> Event (influence_chain)
-        chain = data.get("influence_chain", {})
-        if chain:  # 确保 chain 不是 None
-            for item in chain.get("influenced_by", []):
-                link_id = item.get("id")
-                if link_id:
-                    all_referenced_ids.add(link_id)
-
-            for item in chain.get("influenced", []):
-                link_id = item.get("id")
-                if link_id:
-                    all_referenced_ids.add(link_id)
-
-        # 1.2 检查文本字段中的反引号引用 (如 `event_id`)
-        text_fields = [
-            "summary",
-            "story",
-            "simple_explanation",
-            "impact",
-            "applications",
-            "fun_facts",
-            "quiz",
-        ]
-        for field_name in text_fields:
-            field_data = data.get(field_name)
-            if field_data is None:
-                continue
-
-            # 处理字典类型的字段（如 summary, story, impact）
-            if isinstance(field_data, dict):
-                for key in [
-                    "text",
-                    "text_en",
-                    "description",
-                    "description_en",
-                    "question",
-                    "question_en",
-                    "explanation",
-                    "explanation_en",
-                ]:
-                    text = field_data.get(key, "")
-                    if text and isinstance(text, str):
-                        # 查找反引号中的ID (格式: `event_id`)
-                        matches = re.findall(r"`([a-z_]+_[0-9BC]+)`", text)
-                        all_referenced_ids.update(matches)
-
-            # 处理列表类型的字段（如 applications, fun_facts）
-            elif isinstance(field_data, list):
-                for item in field_data:
-                    if isinstance(item, dict):
-                        for key in [
-                            "text",
-                            "text_en",
-                            "title",
-                            "title_en",
-                            "description",
-                            "description_en",
-                        ]:
-                            text = item.get(key, "")
-                            if text and isinstance(text, str):
-                                matches = re.findall(r"`([a-z_]+_[0-9BC]+)`", text)
-                                all_referenced_ids.update(matches)
-
-            # 处理字符串类型的字段
-            elif isinstance(field_data, str):
-                matches = re.findall(r"`([a-z_]+_[0-9BC]+)`", field_data)
-                all_referenced_ids.update(matches)
+        # 缺失的文件 verify_data_links.py 已经报告过，这里没有引用可收集
+        for ref in references.from_event(event_id):
+            if ref.kind != "personIds":
+                all_referenced_ids.add(ref.target_id)
 
     # 2. 检查人物文件中的 events 字段
-    if PEOPLE_INDEX_FILE.exists() and PEOPLE_DIR.exists():
-        try:
-            with open(PEOPLE_INDEX_FILE, "r", encoding="utf-8") as f:
-                person_ids = json.load(f)
-
-            print(f"[INFO] 正在扫描 {len(person_ids)} 个人物文件的事件引用...")
-
-            for person_id in person_ids:
-                person_file = PEOPLE_DIR / f"{person_id}.json"
-                if not person_file.exists():
-                    continue
-
-                try:
-                    with open(person_file, "r", encoding="utf-8") as f:
-                        person_data = json.load(f)
-
-                    # 检查 events 字段
-                    events = person_data.get("events", [])
-                    if isinstance(events, list):
-                        for event_id in events:
-                            if event_id and isinstance(event_id, str):
-                                all_referenced_ids.add(event_id)
-                except Exception:
-                    print(f"  (Warning: 无法读取 {person_file}, 跳过)")
-                    continue
-        except Exception as e:
-            print(f"  (Warning: 无法读取人物索引或文件: {e})")
+    if corpus.people_index is not None:
+        person_ids = corpus.people_index
+
+        print(f"[INFO] 正在扫描 {len(person_ids)} 个人物文件的事件引用...")
+
+        for person_id in person_ids:
+            person_file = corpus.person_path(person_id)
+            if person_file in corpus.errors:
+                print(f"  (Warning: 无法读取 {person_file}, 跳过)")
+                continue
+
+            for ref in references.from_person(person_id):
+                all_referenced_ids.add(ref.target_id)
+    elif PEOPLE_INDEX_FILE in corpus.errors:
+        print(
+            f"  (Warning: 无法读取人物索引或文件: {corpus.errors[PEOPLE_INDEX_FILE]})"
+        )
 
     return all_referenced_ids
 
 
-def create_stub_file(event_id: str):
+def create_stub_file(event_id: str, report: Report = None):
     """为给定的 event_id 创建一个最小化的 stub json 文件。"""
     file_path = EVENTS_DIR / f"{event_id}.json"
     if file_path.exists():
@@ -201,18 +126,40 @@ def create_stub_file(event_id: str):
             json.dump(stub_data, f, ensure_ascii=False, indent=2)
     except Exception as e:
         print(f"  [ERROR] 写入 {file_path} 失败: {e}")
+        if report is not None:
+            report.add("write-failed", "error", str(e), file=file_path)
+        return
+    if report is not None:
+        report.add("stub-created", "note", f"创建了存根: {event_id}", file=file_path)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="为缺失的事件创建存根。")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    report = Report("create_stub")
+    with report.session(args):
+        create_stubs(report)
+
+
+def create_stubs(report: Report):
     print("=" * 60)
     print("开始自动创建缺失的“存根”(Stub)事件...")
     print("=" * 60)
 
     # 1. 加载所有有效的 ID
-    existing_ids = load_index(EVENTS_INDEX_FILE)
+    with report.phase("parse"):
+        corpus = load_corpus()
+    report.record_corpus(corpus)
+    with report.phase("index"):
+        existing_ids = load_index(corpus)
 
     # 2. 查找所有被引用的 ID
-    all_referenced = find_all_referenced_ids(existing_ids)
+    with report.phase("references"):
+        references = load_references(corpus)
+    with report.phase("check"):
+        all_referenced = find_all_referenced_ids(corpus, references, existing_ids)
 
     # 3. 找出差异
     missing_ids = all_referenced - existing_ids
@@ -226,8 +173,9 @@ def main():
     print("-" * 60)
 
     # 4. 为所有“缺失的ID”创建文件
-    for event_id in missing_ids:
-        create_stub_file(event_id)
+    with report.phase("write"):
+        for event_id in missing_ids:
+            create_stub_file(event_id, report)
 
     print("-" * 60)
     print("[INFO] 存根文件创建完毕。")
@@ -237,10 +185,11 @@ def main():
     new_index_list = sorted(list(existing_ids | missing_ids))
 
     try:
-        with open(EVENTS_INDEX_FILE, "w", encoding="utf-8") as f:
+        with report.phase("write"), open(EVENTS_INDEX_FILE, "w", encoding="utf-8") as f:
             json.dump(new_index_list, f, ensure_ascii=False, indent=2)
     except Exception as e:
         print(f"  [ERROR] 写入 {EVENTS_INDEX_FILE} 失败: {e}")
+        report.add("write-failed", "error", str(e), file=EVENTS_INDEX_FILE)
 
     print("\n" + "=" * 60)
     print("✅ 自动存根(Stub)创建完成！")
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+各脚本共用的诊断输出和计时工具。
+
+- Finding: 一条问题记录 (规则 ID、严重级别、文件、JSON 指针、说明)，
+  可以附带建议的修改 fix ({文件: [JSON Patch 操作]})。
+- Report: 收集一次运行中的所有 Finding、各阶段耗时和计数器，
+  可以写成 JSON (--report) 或 SARIF 2.1.0 (--sarif)，供 CI 解析和看板跟踪。
+  原有的控制台输出保持不变。
+- --profile 目录: 同时运行 cProfile 和 tracemalloc，结束时写出
+  <脚本名>.prof (可用 python -m pstats 或 snakeviz 查看) 和
+  <脚本名>.tracemalloc (tracemalloc.Snapshot.load 读取)，并在 stderr 打印摘要。
+
+用法 (在脚本中):
+    report = Report("verify_data_links")
+    add_arguments(parser)
+    with report.session(args):
+        with report.phase("parse"):
+            corpus = load_corpus()
+        report.record_corpus(corpus)
+        report.add("unknown-person", "error", "...", file=path, pointer=ref.pointer)
+
+    python diagnostics.py <report.json>   # 打印某次运行的耗时和计数器
+"""
+
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+from corpus import write_json
+
+# --- 配置 ---
+REPORT_VERSION = 1
+PROFILE_TOP = 15
+# --- 结束配置 ---
+
+Finding = namedtuple(
+    "Finding",
+    ["rule", "severity", "file", "pointer", "message", "fix"],
+    defaults=(None,),
+)
+
+SEVERITIES = ("error", "warning", "note")
+SARIF_LEVELS = {"error": "error", "warning": "warning", "note": "note"}
+
+# 规则 ID -> 说明 (SARIF 的 rules 描述)
+RULES = {
+    "json-syntax": "文件不是合法的 JSON",
+    "missing-file": "索引中的 ID 缺少对应的 JSON 文件",
+    "unknown-person": "事件引用了不存在的人物",
+    "unknown-event": "引用了不存在的事件",
+    "personid-list": "personId 字段是列表，推荐使用 personIds",
+    "missing-event": "被引用但不在事件索引中的事件",
+    "missing-person": "被引用但不在人物索引中的人物",
+    "stub-created": "为缺失的事件创建了存根",
+    "nonstandard-field": "事件使用了非标准学科",
+    "field-standardized": "事件的学科被标准化",
+    "invalid-field": "学科字段无法标准化",
+    "write-failed": "写入文件失败",
+    "schema": "文件结构不符合 schema",
+    "missing-translation": "缺少某种语言的翻译",
+    "translation-mismatch": "各语言的列表长度不一致",
+    "influence-cycle": "影响链成环",
+    "chronology": "影响链的源事件晚于目标事件",
+    "missing-reverse-edge": "影响链只在一端声明",
+    "orphan-event": "事件无法从任何故事线到达",
+}
+
+
+class Report:
+    """一次运行的诊断结果和性能数据。"""
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.findings = []
+        self.timings = {}
+        self.counters = {}
+        self._start = time.perf_counter()
+
+    def add(
+        self,
+        rule: str,
+        severity: str,
+        message: str,
+        file=None,
+        pointer: str = "",
+        fix: dict = None,
+    ):
+        if severity not in SEVERITIES:
+            raise ValueError(f"未知的严重级别: {severity}")
+        if isinstance(file, Path):
+            file = file.as_posix()
+        self.findings.append(Finding(rule, severity, file, pointer, message, fix))
+
+    def extend(self, findings):
+        self.findings.extend(Finding(*finding) for finding in findings)
+
+    @contextmanager
+    def phase(self, name: str):
+        """累计一个阶段的耗时 (同名阶段多次进入时相加)。"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def count(self, name: str, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_corpus(self, corpus):
+        """记录 load_corpus 的文件数、解析数和读取的字节数。"""
+        stats = getattr(corpus, "stats", None) or {}
+        for key in ("files", "parsed", "cached", "bytes_read"):
+            if key in stats:
+                self.count(key, stats[key])
+        if stats.get("seconds"):
+            self.counters["files_per_second"] = round(
+                stats["files"] / stats["seconds"], 1
+            )
+
+    def summary(self) -> dict:
+        return {
+            severity: sum(1 for f in self.findings if f.severity == severity)
+            for severity in SEVERITIES
+        }
+
+    def to_json(self) -> dict:
+        return {
+            "version": REPORT_VERSION,
+            "tool": self.tool,
+            "summary": self.summary(),
+            "findings": [f._asdict() for f in self.findings],
+            "timings": {k: round(v, 6) for k, v in self.timings.items()},
+            "counters": self.counters,
+            "total_seconds": round(time.perf_counter() - self._start, 6),
+        }
+
+    def to_sarif(self) -> dict:
+        rules = sorted({f.rule for f in self.findings})
+        results = []
+        for f in self.findings:
+            result = {
+                "ruleId": f.rule,
+                "ruleIndex": rules.index(f.rule),
+                "level": SARIF_LEVELS[f.severity],
+                "message": {"text": f.message},
+            }
+            if f.file:
+                location = {"physicalLocation": {"artifactLocation": {"uri": f.file}}}
+                if f.pointer:
+                    # JSON 指针没有行列号，用逻辑位置表示
+                    location["logicalLocations"] = [
+                        {"fullyQualifiedName": f.pointer, "kind": "member"}
+                    ]
+                result["locations"] = [location]
+            if f.fix:
+                # SARIF 的 fixes 基于文本替换，JSON Patch 放在 properties 中
+                result["properties"] = {"jsonPatch": f.fix}
+            results.append(result)
+
+        return {
+            "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+            "version": "2.1.0",
+            "runs": [
+                {
+                    "tool": {
+                        "driver": {
+                            "name": self.tool,
+                            "rules": [
+                                {
+                                    "id": rule,
+                                    "shortDescription": {"text": RULES.get(rule, rule)},
+                                }
+                                for rule in rules
+                            ],
+                        }
+                    },
+                    "results": results,
+                    "properties": {
+                        "timings": self.timings,
+                        "counters": self.counters,
+                    },
+                }
+            ],
+        }
+
+    def write(self, args):
+        """按命令行参数写出 JSON 报告和 SARIF。"""
+        if getattr(args, "report", None):
+            write_json(Path(args.report), self.to_json(), indent=2)
+        if getattr(args, "sarif", None):
+            write_json(Path(args.sarif), self.to_sarif(), indent=2)
+
+    @contextmanager
+    def session(self, args):
+        """包住脚本主体: 按需开启性能分析，结束时 (包括 sys.exit) 写出报告。"""
+        profile_dir = getattr(args, "profile", None)
+        profiler = None
+        if profile_dir:
+            tracemalloc.start()
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._save_profile(Path(profile_dir), profiler)
+            self.write(args)
+
+    def _save_profile(self, directory: Path, profiler: cProfile.Profile):
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.counters["peak_traced_bytes"] = peak
+
+        directory.mkdir(parents=True, exist_ok=True)
+        profile_file = directory / f"{self.tool}.prof"
+        memory_file = directory / f"{self.tool}.tracemalloc"
+        profiler.dump_stats(profile_file)
+        snapshot.dump(str(memory_file))
+
+        print(
+            f"\n[INFO] 性能分析已写入 {profile_file} 和 {memory_file}", file=sys.stderr
+        )
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+        print(f"内存分配最多的位置 (峰值 {peak / 1e6:.1f} MB):", file=sys.stderr)
+        for stat in snapshot.statistics("lineno")[:PROFILE_TOP]:
+            print(f"  {stat}", file=sys.stderr)
+
+
+def add_arguments(parser):
+    """为脚本添加 --report / --sarif / --profile 参数。"""
+    group = parser.add_argument_group("诊断输出")
+    group.add_argument("--report", metavar="FILE", help="把问题、耗时和计数器写成 JSON")
+    group.add_argument("--sarif", metavar="FILE", help="把问题写成 SARIF 2.1.0")
+    group.add_argument(
+        "--profile", metavar="DIR", help="用 cProfile 和 tracemalloc 分析本次运行"
+    )
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        data = json.load(f)
+    print(f"[INFO] {data['tool']}: {data['summary']}, 共 {data['total_seconds']:.3f} s")
+    for name, seconds in data["timings"].items():
+        print(f"  {name:<12} {seconds * 1000:10.1f} ms")
+    for name, value in data["counters"].items():
+        print(f"  {name:<20} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+用 Wikipedia REST API 批量为存根事件和缺失人物生成补全草稿。
+
+1. 目标: 所有 is_stub 为 true 的事件，以及被事件引用但不在 people_index.json 中的人物。
+2. 对每个目标并发请求 /page/summary/<标题> (英文用 title_en，中文标题另查中文站点)，
+   用信号量限制同时连接数，用最小请求间隔限制速率。
+3. 响应缓存在 .corpus_cache/wikipedia/ 中: 响应体按内容哈希存储 (objects/<sha1>)，
+   index.json 记录 URL -> ETag / 状态码 / 内容哈希。再次请求时带上 If-None-Match，
+   304 直接使用缓存内容；--offline 只使用缓存、不访问网络。
+4. 草稿 (摘要、坐标、图片) 写入 enrichment_review.json，人工审核后再合并进数据文件，
+   本脚本不修改任何事件或人物文件。
+
+接口地址可以通过 --endpoint / --zh-endpoint 或环境变量 WIKI_API_URL / WIKI_ZH_API_URL
+配置 (与 mcp-wikipedia-server 相同)，测试时可以指向本地的替身服务器。
+
+用法:
+    python enrich_stubs.py
+    python enrich_stubs.py --connections 4 --rate 10
+    python enrich_stubs.py --endpoint http://127.0.0.1:8000/api/rest_v1 --offline
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from corpus import CACHE_DIR, event_person_ids, load_corpus, write_json
+
+# --- 配置 ---
+DEFAULT_ENDPOINT = os.environ.get(
+    "WIKI_API_URL", "https://en.wikipedia.org/api/rest_v1"
+)
+DEFAULT_ZH_ENDPOINT = os.environ.get(
+    "WIKI_ZH_API_URL", "https://zh.wikipedia.org/api/rest_v1"
+)
+WIKI_CACHE_DIR = CACHE_DIR / "wikipedia"
+REVIEW_FILE = "enrichment_review.json"
+DEFAULT_CONNECTIONS = 8
+# 每秒最多请求数 (Wikimedia 对匿名客户端的建议上限远高于此)
+DEFAULT_RATE = 20.0
+USER_AGENT = "science-map-enrichment/1.0"
+# --- 结束配置 ---
+
+CJK = re.compile(r"[一-鿿]")
+
+
+# ---------- 缓存 ----------
+
+
+class ResponseCache:
+    """内容寻址的响应缓存。
+
+    objects/<sha1>  响应体 (相同内容只存一份)
+    index.json      {URL: {"status", "etag", "sha1", "fetched"}}
+    """
+
+    def __init__(self, directory=WIKI_CACHE_DIR):
+        self.directory = directory
+        self.objects = directory / "objects"
+        self.index_file = directory / "index.json"
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self.dirty = False
+
+    def get(self, url: str):
+        """返回 (条目, 响应体)，没有缓存时返回 (None, None)。"""
+        entry = self.index.get(url)
+        if entry is None:
+            return None, None
+        if entry.get("sha1") is None:
+            return entry, None
+        try:
+            return entry, (self.objects / entry["sha1"]).read_bytes()
+        except OSError:
+            return None, None
+
+    def put(self, url: str, status: int, etag, body):
+        digest = None
+        if body is not None:
+            digest = hashlib.sha1(body).hexdigest()
+            path = self.objects / digest
+            if not path.exists():
+                self.objects.mkdir(parents=True, exist_ok=True)
+                tmp_file = path.with_suffix(".tmp")
+                tmp_file.write_bytes(body)
+                tmp_file.replace(path)
+        self.index[url] = {
+            "status": status,
+            "etag": etag,
+            "sha1": digest,
+            "fetched": int(time.time()),
+        }
+        self.dirty = True
+
+    def touch(self, url: str):
+        self.index[url]["fetched"] = int(time.time())
+        self.dirty = True
+
+    def save(self):
+        if self.dirty:
+            write_json(self.index_file, self.index, indent=1)
+
+
+# ---------- 并发请求 ----------
+
+
+class RateLimiter:
+    """保证相邻两次请求的开始时间至少间隔 1 / rate 秒。"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_time = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self.next_time > now:
+                await asyncio.sleep(self.next_time - now)
+                now = self.next_time
+            self.next_time = now + self.interval
+
+
+def _http_get(url: str, etag, timeout: float) -> tuple:
+    """阻塞的 HTTP GET，返回 (状态码, ETag, 响应体)。在线程池中运行。"""
+    headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+    if etag:
+        headers["If-None-Match"] = etag
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.headers.get("ETag"), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers.get("ETag") if e.headers else None, None
+
+
+class WikiClient:
+    def __init__(
+        self,
+        cache: ResponseCache,
+        connections: int,
+        rate: float,
+        offline: bool = False,
+        timeout: float = 30,
+    ):
+        self.cache = cache
+        self.semaphore = asyncio.Semaphore(connections)
+        self.limiter = RateLimiter(rate)
+        self.offline = offline
+        self.timeout = timeout
+        self.stats = {"network": 0, "revalidated": 0, "cached": 0, "failed": 0}
+        # 同一 URL 的并发请求共用一次网络请求
+        self._inflight = {}
+
+    async def get_json(self, url: str):
+        """返回 (状态码, JSON 数据)。网络错误时状态码为 None。"""
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url))
+            self._inflight[url] = task
+        status, body = await task
+        if body is None:
+            return status, None
+        try:
+            return status, json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            return status, None
+
+    async def _fetch(self, url: str) -> tuple:
+        entry, body = self.cache.get(url)
+        if self.offline:
+            if entry is None:
+                return None, None
+            self.stats["cached"] += 1
+            return entry["status"], body
+
+        async with self.semaphore:
+            await self.limiter.wait()
+            etag = entry.get("etag") if entry and body is not None else None
+            try:
+                status, new_etag, new_body = await asyncio.to_thread(
+                    _http_get, url, etag, self.timeout
+                )
+            except (OSError, ValueError) as e:
+                self.stats["failed"] += 1
+                if entry is not None:
+                    # 网络失败时退回到缓存
+                    return entry["status"], body
+                print(f"  [ERROR] {url}: {e}")
+                return None, None
+
+        if status == 304 and entry is not None:
+            self.stats["revalidated"] += 1
+            self.cache.touch(url)
+            return entry["status"], body
+        self.stats["network"] += 1
+        # 只缓存确定的结果 (成功或不存在)，服务器错误下次重试
+        if status == 200 or status == 404:
+            self.cache.put(url, status, new_etag, new_body)
+        return status, new_body
+
+
+# ---------- 目标与草稿 ----------
+
+
+def title_from_id(item_id: str) -> str:
+    """从 ID 猜测标题: 去掉年份后缀，下划线换成空格。"""
+    parts = item_id.split("_")
+    if len(parts) > 1 and re.fullmatch(r"(BC|AD)?\d+", parts[-1], re.IGNORECASE):
+        parts = parts[:-1]
+    return " ".join(part.capitalize() for part in parts)
+
+
+def find_targets(corpus) -> list:
+    """返回 [(类型, ID, 英文查询, 中文查询或 None)]。"""
+    targets = []
+    for event_id, event in sorted(corpus.events.items()):
+        if event.get("is_stub") is not True:
+            continue
+        title_en = event.get("title_en") or title_from_id(event_id)
+        title = event.get("title")
+        title_zh = title if isinstance(title, str) and CJK.search(title) else None
+        targets.append(("event", event_id, title_en, title_zh))
+
+    known_people = set(corpus.people_index or [])
+    missing_people = set()
+    for event in corpus.events.values():
+        missing_people.update(
+            pid for pid in event_person_ids(event) if pid not in known_people
+        )
+    for person_id in sorted(missing_people):
+        targets.append(("person", person_id, title_from_id(person_id), None))
+    return targets
+
+
+def summary_url(endpoint: str, title: str) -> str:
+    title = title.strip().replace(" ", "_")
+    return f"{endpoint.rstrip('/')}/page/summary/{urllib.parse.quote(title, safe='')}"
+
+
+def draft_from_summary(data: dict, lang: str) -> dict:
+    """从 summary 响应中提取可用的字段。"""
+    suffix = "_en" if lang == "en" else ""
+    draft = {}
+    if data.get("title"):
+        draft[f"title{suffix}"] = data["title"]
+    if data.get("extract"):
+        draft[f"summary_text{suffix}"] = data["extract"]
+    if data.get("description"):
+        draft[f"description{suffix}"] = data["description"]
+    coordinates = data.get("coordinates")
+    if isinstance(coordinates, dict) and "lat" in coordinates and "lon" in coordinates:
+        draft["lat"] = coordinates["lat"]
+        draft["lng"] = coordinates["lon"]
+    image = (data.get("originalimage") or data.get("thumbnail") or {}).get("source")
+    if image:
+        draft["image"] = image
+    page = ((data.get("content_urls") or {}).get("desktop") or {}).get("page")
+    if page:
+        draft[f"source{suffix}"] = page
+    return draft
+
+
+async def enrich_target(client: WikiClient, target: tuple, endpoints: dict) -> dict:
+    kind, item_id, query_en, query_zh = target
+    item = {"type": kind, "id": item_id, "queries": {}, "suggestions": {}, "notes": []}
+    queries = [("en", query_en)] + ([("zh", query_zh)] if query_zh else [])
+
+    for lang, query in queries:
+        item["queries"][lang] = query
+        status, data = await client.get_json(summary_url(endpoints[lang], query))
+        if status == 404:
+            item["notes"].append(f"{lang}: 没有找到条目 '{query}'")
+            continue
+        if status != 200 or not isinstance(data, dict):
+            item["notes"].append(f"{lang}: 请求失败 (状态 {status})")
+            continue
+        if data.get("type") == "disambiguation":
+            item["notes"].append(f"{lang}: '{query}' 是消歧义页，需要人工选择")
+            continue
+        draft = draft_from_summary(data, lang)
+        # 英文结果优先提供坐标和图片
+        for key, value in draft.items():
+            item["suggestions"].setdefault(key, value)
+
+    if kind == "person" and "image" in item["suggestions"]:
+        item["suggestions"]["portrait"] = item["suggestions"].pop("image")
+    elif kind == "event" and "image" in item["suggestions"]:
+        item["suggestions"]["event_image"] = item["suggestions"].pop("image")
+    return item
+
+
+async def enrich(targets: list, client: WikiClient, endpoints: dict) -> list:
+    return await asyncio.gather(
+        *(enrich_target(client, target, endpoints) for target in targets)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="用 Wikipedia 为存根和缺失人物生成补全草稿。"
+    )
+    parser.add_argument(
+        "--endpoint", default=DEFAULT_ENDPOINT, help="英文 REST API 地址"
+    )
+    parser.add_argument(
+        "--zh-endpoint", default=DEFAULT_ZH_ENDPOINT, help="中文 REST API 地址"
+    )
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS)
+    parser.add_argument(
+        "--rate", type=float, default=DEFAULT_RATE, help="每秒最多请求数"
+    )
+    parser.add_argument("--offline", action="store_true", help="只使用缓存")
+    parser.add_argument("--limit", type=int, help="最多处理多少个目标")
+    parser.add_argument("--output", default=REVIEW_FILE)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    targets = find_targets(corpus)
+    if args.limit is not None:
+        targets = targets[: args.limit]
+    print(
+        f"[INFO] {sum(t[0] == 'event' for t in targets)} 个存根事件, "
+        f"{sum(t[0] == 'person' for t in targets)} 个缺失人物。"
+    )
+
+    cache = ResponseCache()
+    endpoints = {"en": args.endpoint, "zh": args.zh_endpoint}
+    start = time.perf_counter()
+
+    async def run():
+        client = WikiClient(cache, args.connections, args.rate, offline=args.offline)
+        return await enrich(targets, client, endpoints), client.stats
+
+    items, stats = asyncio.run(run())
+    cache.save()
+    seconds = time.perf_counter() - start
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(
+            {"endpoints": endpoints, "items": items}, f, ensure_ascii=False, indent=2
+        )
+
+    with_summary = sum(
+        1
+        for item in items
+        if "summary_text_en" in item["suggestions"]
+        or "summary_text" in item["suggestions"]
+    )
+    print(
+        f"[INFO] {len(items)} 个目标中 {with_summary} 个有摘要草稿，耗时 {seconds:.1f} s "
+        f"(网络 {stats['network']}, 304 {stats['revalidated']}, "
+        f"仅缓存 {stats['cached']}, 失败 {stats['failed']})。"
+    )
+    print(f"[INFO] 草稿已保存到 {args.output}，请审核后手动合并。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+把语料库导出为规范化的 SQLite 数据库 assets/generated/corpus.sqlite，
+既用于内容流水线中的临时 SQL 分析，也可作为 App 的另一种本地数据源。
+
+表结构 (PRAGMA user_version = SCHEMA_VERSION):
+    events           每个事件一行: 标量字段、学科位掩码 (与 filter_index.json 相同)、
+                     events_hot.json 中的行号 position (未收录为 NULL) 和完整 JSON (data)
+    people           每个人物一行，同上
+    event_people     事件 <-> 人物 (personId / personIds 的顺序)
+    event_fields     事件 <-> 学科 (field / field_en 的顺序)
+    fields           标准学科 (中英文名称及位)
+    influence_edges  source 影响了 target；declared_by 为声明这条边的事件
+                     (同一条边可能被两端各声明一次，目标事件不一定存在)
+    storylines / storyline_events   storylines.json 中的故事线及其事件顺序
+    events_fts       FTS5 全文索引 (标题、城市、summary、key_points)，按语言分列
+    people_fts       FTS5 全文索引 (姓名、简介)
+    events_rtree     R*Tree，按经纬度做范围查询 (rowid 与 events.row 相同)
+    documents        已导出文件的内容哈希，用于增量更新
+
+中文列在写入前按 build_search_index.tokenize 切分为单字 + 双字 (以空格分隔)，
+与 App 搜索索引的切分方式一致；查询时也要用同样的方式切分 (见 fts_query)。
+
+增量导出: 对比 documents 中记录的哈希与 corpus 的解析缓存，只更新新增、修改和
+删除的文件；表结构版本不同或使用 --rebuild 时重新生成整个数据库。
+
+在 App 中使用时需要带 FTS5 和 R*Tree 的 SQLite 构建 (例如 sqlite3_flutter_libs)。
+
+用法:
+    python export_sqlite.py
+    python export_sqlite.py --rebuild
+    python export_sqlite.py --search "万有引力" --locale zh
+    sqlite3 assets/generated/corpus.sqlite "SELECT field, count(*) FROM event_fields GROUP BY field"
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+
+from build_bundle import OUTPUT_DIR
+from build_filter_index import FIELD_BITS, field_mask
+from build_search_index import tokenize
+from corpus import (
+    EVENTS_DIR,
+    EVENTS_INDEX_FILE,
+    PEOPLE_DIR,
+    PEOPLE_INDEX_FILE,
+    STORYLINES_FILE,
+    event_person_ids,
+    load_corpus,
+)
+from standardize_fields import STANDARD_FIELDS_EN, STANDARD_FIELDS_ZH
+
+# --- 配置 ---
+SQLITE_FILE = OUTPUT_DIR / "corpus.sqlite"
+SCHEMA_VERSION = 1
+# --- 结束配置 ---
+
+SCHEMA = """
+CREATE TABLE documents (
+    path TEXT PRIMARY KEY,
+    digest TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE events (
+    row INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    position INTEGER,
+    year INTEGER,
+    lat REAL,
+    lng REAL,
+    title TEXT,
+    title_en TEXT,
+    city TEXT,
+    city_en TEXT,
+    country TEXT,
+    country_en TEXT,
+    is_stub INTEGER NOT NULL DEFAULT 0,
+    field_mask INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX events_year ON events (year);
+CREATE INDEX events_position ON events (position);
+
+CREATE TABLE people (
+    row INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    position INTEGER,
+    name TEXT,
+    name_en TEXT,
+    bio_short TEXT,
+    bio_short_en TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE event_people (
+    event_id TEXT NOT NULL,
+    person_id TEXT NOT NULL,
+    ord INTEGER NOT NULL,
+    PRIMARY KEY (event_id, person_id)
+) WITHOUT ROWID;
+CREATE INDEX event_people_person ON event_people (person_id);
+
+CREATE TABLE event_fields (
+    event_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    field_en TEXT,
+    ord INTEGER NOT NULL,
+    PRIMARY KEY (event_id, ord)
+) WITHOUT ROWID;
+CREATE INDEX event_fields_field ON event_fields (field);
+
+CREATE TABLE fields (
+    field TEXT PRIMARY KEY,
+    field_en TEXT NOT NULL,
+    bit INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE influence_edges (
+    source_id TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    declared_by TEXT NOT NULL,
+    contribution TEXT,
+    contribution_en TEXT,
+    PRIMARY KEY (source_id, target_id, declared_by)
+) WITHOUT ROWID;
+CREATE INDEX influence_edges_target ON influence_edges (target_id);
+CREATE INDEX influence_edges_declared_by ON influence_edges (declared_by);
+
+CREATE TABLE storylines (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    title_en TEXT,
+    emoji TEXT,
+    description TEXT,
+    description_en TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE storyline_events (
+    storyline_id TEXT NOT NULL,
+    ord INTEGER NOT NULL,
+    event_id TEXT NOT NULL,
+    PRIMARY KEY (storyline_id, ord)
+) WITHOUT ROWID;
+CREATE INDEX storyline_events_event ON storyline_events (event_id);
+
+CREATE VIRTUAL TABLE events_fts USING fts5 (
+    text_zh, text_en, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE people_fts USING fts5 (
+    text_zh, text_en, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE events_rtree USING rtree (
+    row, min_lat, max_lat, min_lng, max_lng
+);
+"""
+
+INDEX_FILES = (EVENTS_INDEX_FILE, PEOPLE_INDEX_FILE, STORYLINES_FILE)
+
+# 全文索引的内容: (事件字段, summary 中的子字段)
+EVENT_TEXT_FIELDS = {
+    "zh": (["title", "city", "country"], ["text", "key_points"]),
+    "en": (["title_en", "city_en", "country_en"], ["text_en", "key_points_en"]),
+}
+PERSON_TEXT_FIELDS = {"zh": ["name", "bio_short"], "en": ["name_en", "bio_short_en"]}
+
+
+def _texts(*values) -> list:
+    texts = []
+    for value in values:
+        if isinstance(value, str):
+            texts.append(value)
+        elif isinstance(value, list):
+            texts.extend(item for item in value if isinstance(item, str))
+    return texts
+
+
+def _fts_text(texts: list, locale: str) -> str:
+    """中文按 tokenize 预先切分，英文原样交给 unicode61 分词器。"""
+    if locale == "zh":
+        return " ".join(token for text in texts for token in tokenize(text))
+    return "\n".join(texts)
+
+
+def fts_query(text: str, locale: str) -> str:
+    """把用户输入转换为 FTS5 MATCH 表达式 (所有词项都要出现)。"""
+    tokens = tokenize(text)
+    # 有双字词项时，单个汉字是多余的 (已被双字覆盖)
+    if any(len(t) == 2 and not t.isascii() for t in tokens):
+        tokens = [t for t in tokens if t.isascii() or len(t) == 2]
+    tokens = list(dict.fromkeys(tokens))
+    column = f"text_{locale}"
+    return " AND ".join(f'{column}:"{token}"' for token in tokens)
+
+
+def _number(value):
+    return (
+        value
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+        else None
+    )
+
+
+def _string(value):
+    return value if isinstance(value, str) else None
+
+
+def connect(path=SQLITE_FILE) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = OFF")
+    return conn
+
+
+def create_schema(conn: sqlite3.Connection):
+    conn.executescript(SCHEMA)
+    conn.executemany(
+        "INSERT INTO fields VALUES (?, ?, ?)",
+        [
+            (zh, en, FIELD_BITS[zh])
+            for zh, en in zip(STANDARD_FIELDS_ZH, STANDARD_FIELDS_EN)
+        ],
+    )
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _delete_event(conn, event_id: str):
+    row = conn.execute("SELECT row FROM events WHERE id = ?", (event_id,)).fetchone()
+    if row is None:
+        return
+    conn.execute("DELETE FROM events_fts WHERE rowid = ?", row)
+    conn.execute("DELETE FROM events_rtree WHERE row = ?", row)
+    conn.execute("DELETE FROM events WHERE row = ?", row)
+    conn.execute("DELETE FROM event_people WHERE event_id = ?", (event_id,))
+    conn.execute("DELETE FROM event_fields WHERE event_id = ?", (event_id,))
+    conn.execute("DELETE FROM influence_edges WHERE declared_by = ?", (event_id,))
+
+
+def _delete_person(conn, person_id: str):
+    row = conn.execute("SELECT row FROM people WHERE id = ?", (person_id,)).fetchone()
+    if row is None:
+        return
+    conn.execute("DELETE FROM people_fts WHERE rowid = ?", row)
+    conn.execute("DELETE FROM people WHERE row = ?", row)
+
+
+def upsert_event(conn, event_id: str, event: dict, warnings: list):
+    """写入单个事件及其关联表 (先删除旧行，保持 row 不变)。"""
+    existing = conn.execute(
+        "SELECT row FROM events WHERE id = ?", (event_id,)
+    ).fetchone()
+    _delete_event(conn, event_id)
+    lat, lng = _number(event.get("lat")), _number(event.get("lng"))
+    cursor = conn.execute(
+        "INSERT INTO events (row, id, year, lat, lng, title, title_en, city, city_en,"
+        " country, country_en, is_stub, field_mask, data)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            existing[0] if existing else None,
+            event_id,
+            event.get("year") if isinstance(event.get("year"), int) else None,
+            lat,
+            lng,
+            _string(event.get("title")),
+            _string(event.get("title_en")),
+            _string(event.get("city")),
+            _string(event.get("city_en")),
+            _string(event.get("country")),
+            _string(event.get("country_en")),
+            1 if event.get("is_stub") is True else 0,
+            field_mask(event, warnings),
+            json.dumps(event, ensure_ascii=False),
+        ),
+    )
+    row = cursor.lastrowid
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO event_people VALUES (?, ?, ?)",
+        [(event_id, pid, i) for i, pid in enumerate(event_person_ids(event))],
+    )
+    fields = _texts(event.get("field"))
+    fields_en = _texts(event.get("field_en"))
+    conn.executemany(
+        "INSERT INTO event_fields VALUES (?, ?, ?, ?)",
+        [
+            (event_id, field, fields_en[i] if i < len(fields_en) else None, i)
+            for i, field in enumerate(fields)
+        ],
+    )
+
+    chain = event.get("influence_chain")
+    if isinstance(chain, dict):
+        edges = {}
+        for key, outgoing in (("influenced_by", False), ("influenced", True)):
+            for item in chain.get(key) or []:
+                other = item.get("id") if isinstance(item, dict) else None
+                if not isinstance(other, str) or other == event_id:
+                    continue
+                edge = (event_id, other) if outgoing else (other, event_id)
+                edges.setdefault(
+                    edge,
+                    (
+                        _string(item.get("contribution")),
+                        _string(item.get("contribution_en")),
+                    ),
+                )
+        conn.executemany(
+            "INSERT INTO influence_edges VALUES (?, ?, ?, ?, ?)",
+            [(s, t, event_id, c, c_en) for (s, t), (c, c_en) in edges.items()],
+        )
+
+    texts = {}
+    summary = event.get("summary") if isinstance(event.get("summary"), dict) else {}
+    for locale, (names, summary_names) in EVENT_TEXT_FIELDS.items():
+        values = [event.get(name) for name in names]
+        values += [summary.get(name) for name in summary_names]
+        texts[locale] = _fts_text(_texts(*values), locale)
+    conn.execute(
+        "INSERT INTO events_fts (rowid, text_zh, text_en) VALUES (?, ?, ?)",
+        (row, texts["zh"], texts["en"]),
+    )
+    if lat is not None and lng is not None:
+        conn.execute(
+            "INSERT INTO events_rtree VALUES (?, ?, ?, ?, ?)", (row, lat, lat, lng, lng)
+        )
+
+
+def upsert_person(conn, person_id: str, person: dict):
+    existing = conn.execute(
+        "SELECT row FROM people WHERE id = ?", (person_id,)
+    ).fetchone()
+    _delete_person(conn, person_id)
+    cursor = conn.execute(
+        "INSERT INTO people (row, id, name, name_en, bio_short, bio_short_en, data)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            existing[0] if existing else None,
+            person_id,
+            _string(person.get("name")),
+            _string(person.get("name_en")),
+            _string(person.get("bio_short")),
+            _string(person.get("bio_short_en")),
+            json.dumps(person, ensure_ascii=False),
+        ),
+    )
+    texts = {
+        locale: _fts_text(_texts(*(person.get(name) for name in names)), locale)
+        for locale, names in PERSON_TEXT_FIELDS.items()
+    }
+    conn.execute(
+        "INSERT INTO people_fts (rowid, text_zh, text_en) VALUES (?, ?, ?)",
+        (cursor.lastrowid, texts["zh"], texts["en"]),
+    )
+
+
+def replace_storylines(conn, storylines: dict):
+    conn.execute("DELETE FROM storylines")
+    conn.execute("DELETE FROM storyline_events")
+    for story_id, story in (storylines or {}).items():
+        if not isinstance(story, dict):
+            continue
+        conn.execute(
+            "INSERT INTO storylines VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                story_id,
+                _string(story.get("title_zh") or story.get("title")),
+                _string(story.get("title_en")),
+                _string(story.get("emoji")),
+                _string(story.get("description_zh") or story.get("description")),
+                _string(story.get("description_en")),
+            ),
+        )
+        entries = story.get("events") if isinstance(story.get("events"), list) else []
+        conn.executemany(
+            "INSERT INTO storyline_events VALUES (?, ?, ?)",
+            [(story_id, i, e) for i, e in enumerate(entries) if isinstance(e, str)],
+        )
+
+
+def update_positions(conn, table: str, ids: list):
+    """position = 在 events_hot.json / people.json 中的行号。
+
+    两个文件都按 indexed_events() / indexed_people() 生成: 索引中缺失或无法解析的
+    文件会被跳过，因此行号不能直接取索引文件中的位置。"""
+    conn.execute(f"UPDATE {table} SET position = NULL")
+    conn.executemany(
+        f"UPDATE {table} SET position = ? WHERE id = ?",
+        [(position, doc_id) for position, doc_id in enumerate(ids)],
+    )
+
+
+def export(conn, corpus, warnings: list) -> dict:
+    """按文件哈希增量更新数据库，返回各类变更的数量。"""
+    recorded = dict(conn.execute("SELECT path, digest FROM documents"))
+    current = {path.as_posix(): digest for path, digest in corpus.digests.items()}
+    stats = {
+        "events": 0,
+        "people": 0,
+        "removed": 0,
+        "storylines": False,
+        "index": False,
+    }
+
+    def changed(path) -> bool:
+        return recorded.get(path.as_posix()) != current.get(path.as_posix())
+
+    for event_id, event in corpus.events.items():
+        if changed(corpus.event_path(event_id)):
+            upsert_event(conn, event_id, event, warnings)
+            stats["events"] += 1
+    for person_id, person in corpus.people.items():
+        if changed(corpus.person_path(person_id)):
+            upsert_person(conn, person_id, person)
+            stats["people"] += 1
+
+    for (event_id,) in conn.execute("SELECT id FROM events").fetchall():
+        if event_id not in corpus.events:
+            _delete_event(conn, event_id)
+            stats["removed"] += 1
+    for (person_id,) in conn.execute("SELECT id FROM people").fetchall():
+        if person_id not in corpus.people:
+            _delete_person(conn, person_id)
+            stats["removed"] += 1
+
+    if changed(STORYLINES_FILE):
+        replace_storylines(conn, corpus.storylines)
+        stats["storylines"] = True
+    # 新增的事件也需要行号，因此只要有变化就重新计算
+    if any(stats[k] for k in ("events", "people", "removed")) or any(
+        changed(path) for path in (EVENTS_INDEX_FILE, PEOPLE_INDEX_FILE)
+    ):
+        update_positions(conn, "events", [eid for eid, _ in corpus.indexed_events()])
+        update_positions(conn, "people", [pid for pid, _ in corpus.indexed_people()])
+        stats["index"] = True
+
+    # 只记录成功解析的文件: 解析失败的文件修复后会被重新导出
+    exported = {
+        path.as_posix(): digest
+        for path, digest in corpus.digests.items()
+        if path not in corpus.errors
+        and (path.parent in (EVENTS_DIR, PEOPLE_DIR) or path in INDEX_FILES)
+    }
+    conn.execute("DELETE FROM documents")
+    conn.executemany("INSERT INTO documents VALUES (?, ?)", exported.items())
+    return stats
+
+
+def search(conn, text: str, locale: str, limit: int = 20) -> list:
+    query = fts_query(text, locale)
+    if not query:
+        return []
+    title = "title" if locale == "zh" else "title_en"
+    return conn.execute(
+        f"SELECT e.id, e.year, e.{title} FROM events_fts"
+        " JOIN events e ON e.row = events_fts.rowid"
+        " WHERE events_fts MATCH ? ORDER BY bm25(events_fts) LIMIT ?",
+        (query, limit),
+    ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把语料库导出为 SQLite 数据库。")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="删除并重新生成整个数据库"
+    )
+    parser.add_argument("--search", metavar="TEXT", help="导出后做一次全文检索")
+    parser.add_argument("--locale", choices=["zh", "en"], default="zh")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    corpus = load_corpus()
+    for path, error in sorted(corpus.errors.items()):
+        print(f"  [WARNING] 跳过无法解析的文件 {path}: {error}")
+
+    SQLITE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    conn = connect()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if args.rebuild or version != SCHEMA_VERSION:
+        conn.close()
+        SQLITE_FILE.unlink(missing_ok=True)
+        conn = connect()
+        create_schema(conn)
+        print(f"[INFO] 新建 {SQLITE_FILE} (表结构版本 {SCHEMA_VERSION})")
+
+    warnings = []
+    with conn:
+        stats = export(conn, corpus, warnings)
+    for warning in warnings:
+        print(f"  [WARNING] {warning}")
+
+    totals = {
+        table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+        for table in ("events", "people", "influence_edges", "storylines")
+    }
+    print(
+        f"[INFO] {SQLITE_FILE}: 更新 {stats['events']} 个事件、{stats['people']} 个人物，"
+        f"删除 {stats['removed']} 个文档"
+        f"{'，故事线已更新' if stats['storylines'] else ''} "
+        f"({(time.perf_counter() - start) * 1000:.0f} ms)"
+    )
+    print(
+        f"  共 {totals['events']} 个事件, {totals['people']} 个人物, "
+        f"{totals['influence_edges']} 条影响链, {totals['storylines']} 条故事线"
+    )
+
+    if args.search:
+        for event_id, year, title in search(conn, args.search, args.locale):
+            print(f"  {event_id} ({year}): {title}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
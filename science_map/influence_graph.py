@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+影响链 (influence_chain) 图引擎。
+
+把所有事件的 influenced_by / influenced 条目合并为一张有向图 (A -> B 表示
+A 影响了 B)，用 CSR 风格的数组存储:
+    ids[i]                               稠密 ID i 对应的事件 ID
+    out_targets[out_offsets[i]:out_offsets[i + 1]]   i 直接影响的事件
+    in_targets[in_offsets[i]:in_offsets[i + 1]]      直接影响 i 的事件
+
+并为每个事件预计算祖先集合和后代集合 (传递闭包)，以偏移表的形式导出到
+assets/generated/influence_graph.json，App 的焦点模式可以直接查表，
+不再在 UI 线程上做 BFS + firstWhere。
+
+注意: main.dart 中的 _getRecursiveEventChain 两次遍历共用同一个 visited 集合，
+第二次 (向前) 遍历从已访问的起点开始，实际上不会执行；本模块同时导出
+祖先和后代，焦点链 = 自身 + 祖先 + 后代。
+
+用法:
+    python influence_graph.py build
+    python influence_graph.py path <起点事件ID> <终点事件ID>
+    python influence_graph.py reach <事件ID> [--hops K] [--backward]
+"""
+
+import argparse
+import sys
+from collections import deque
+
+from build_bundle import OUTPUT_DIR
+from corpus import load_corpus, write_json
+
+# --- 配置 ---
+INFLUENCE_GRAPH_FILE = OUTPUT_DIR / "influence_graph.json"
+# --- 结束配置 ---
+
+
+class InfluenceGraph:
+    """CSR 邻接结构。节点为语料库中存在的事件，指向不存在事件的边被忽略。"""
+
+    def __init__(self, ids: list, edges):
+        self.ids = ids
+        self.index = {event_id: i for i, event_id in enumerate(ids)}
+        edges = sorted(set(edges))
+        self.out_offsets, self.out_targets = self._csr(len(ids), edges)
+        self.in_offsets, self.in_targets = self._csr(
+            len(ids), sorted((b, a) for a, b in edges)
+        )
+
+    @staticmethod
+    def _csr(n: int, pairs: list) -> tuple:
+        offsets = [0] * (n + 1)
+        for source, _ in pairs:
+            offsets[source + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        return offsets, [target for _, target in pairs]
+
+    @classmethod
+    def from_events(cls, events: list) -> "InfluenceGraph":
+        """events 为 [(事件 ID, 事件数据)]。"""
+        ids = [event_id for event_id, _ in events]
+        index = {event_id: i for i, event_id in enumerate(ids)}
+        edges = []
+        for event_id, event in events:
+            chain = event.get("influence_chain")
+            if not isinstance(chain, dict):
+                continue
+            me = index[event_id]
+            for item in chain.get("influenced_by") or []:
+                other = index.get(item.get("id")) if isinstance(item, dict) else None
+                if other is not None and other != me:
+                    edges.append((other, me))
+            for item in chain.get("influenced") or []:
+                other = index.get(item.get("id")) if isinstance(item, dict) else None
+                if other is not None and other != me:
+                    edges.append((me, other))
+        return cls(ids, edges)
+
+    def successors(self, node: int) -> list:
+        return self.out_targets[self.out_offsets[node] : self.out_offsets[node + 1]]
+
+    def predecessors(self, node: int) -> list:
+        return self.in_targets[self.in_offsets[node] : self.in_offsets[node + 1]]
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.out_targets)
+
+    # ---------- 传递闭包 ----------
+
+    def strongly_connected_components(self) -> list:
+        """迭代式 Tarjan 算法，返回 comp[节点] = 分量编号 (按逆拓扑序编号)。"""
+        n = len(self.ids)
+        index_of = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        comp = [-1] * n
+        stack = []
+        counter = 0
+        comp_count = 0
+
+        for root in range(n):
+            if index_of[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child = work[-1]
+                if child == 0:
+                    index_of[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                succ = self.successors(node)
+                if child < len(succ):
+                    work[-1] = (node, child + 1)
+                    nxt = succ[child]
+                    if index_of[nxt] == -1:
+                        work.append((nxt, 0))
+                    elif on_stack[nxt]:
+                        low[node] = min(low[node], index_of[nxt])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index_of[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        comp[member] = comp_count
+                        if member == node:
+                            break
+                    comp_count += 1
+        return comp
+
+    def _closure(self, forward: bool) -> list:
+        """返回每个节点可达节点集合的位集 (Python 整数，第 i 位表示节点 i)。
+
+        先把强连通分量缩点，再在 DAG 上按拓扑序做一次位或，整体为
+        O(V + E) 次大整数运算。
+        """
+        comp = self.strongly_connected_components()
+        comp_count = max(comp) + 1 if comp else 0
+        members = [0] * comp_count
+        for node, c in enumerate(comp):
+            members[c] |= 1 << node
+
+        neighbours = self.successors if forward else self.predecessors
+        comp_edges = [set() for _ in range(comp_count)]
+        for node in range(len(self.ids)):
+            for other in neighbours(node):
+                if comp[other] != comp[node]:
+                    comp_edges[comp[node]].add(comp[other])
+
+        # Tarjan 的分量编号是逆拓扑序: 后继分量的编号总是更小。
+        # 反向图中顺序相反，所以按需要的方向排序处理。
+        order = range(comp_count) if forward else range(comp_count - 1, -1, -1)
+        reach = [0] * comp_count
+        for c in order:
+            bits = 0
+            for d in comp_edges[c]:
+                bits |= reach[d] | members[d]
+            # 环内的节点互相可达
+            if members[c] & (members[c] - 1):
+                bits |= members[c]
+            reach[c] = bits
+
+        return [reach[comp[node]] & ~(1 << node) for node in range(len(self.ids))]
+
+    def descendants(self) -> list:
+        return self._closure(forward=True)
+
+    def ancestors(self) -> list:
+        return self._closure(forward=False)
+
+    # ---------- 查询 ----------
+
+    def shortest_path(self, source: int, target: int) -> list:
+        """沿影响方向的最短路径 (节点列表)，不存在时返回 []。"""
+        parent = {source: None}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            if node == target:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parent[node]
+                return path[::-1]
+            for nxt in self.successors(node):
+                if nxt not in parent:
+                    parent[nxt] = node
+                    queue.append(nxt)
+        return []
+
+    def within_hops(self, source: int, hops: int, forward: bool = True) -> dict:
+        """返回 k 跳以内可达的节点 {节点: 跳数} (不含起点)。"""
+        neighbours = self.successors if forward else self.predecessors
+        dist = {source: 0}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            if dist[node] >= hops:
+                continue
+            for nxt in neighbours(node):
+                if nxt not in dist:
+                    dist[nxt] = dist[node] + 1
+                    queue.append(nxt)
+        del dist[source]
+        return dist
+
+
+def bits_to_list(bits: int) -> list:
+    """位集 -> 升序的节点列表。"""
+    digits = bin(bits)[:1:-1]  # 最低位在前
+    nodes = []
+    position = digits.find("1")
+    while position != -1:
+        nodes.append(position)
+        position = digits.find("1", position + 1)
+    return nodes
+
+
+def closure_table(closure: list) -> tuple:
+    """把每个节点的位集转换为 (offsets, targets) 偏移表。"""
+    offsets = [0]
+    targets = []
+    for bits in closure:
+        targets.extend(bits_to_list(bits))
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+def export_graph(graph: InfluenceGraph) -> dict:
+    anc_offsets, anc_targets = closure_table(graph.ancestors())
+    desc_offsets, desc_targets = closure_table(graph.descendants())
+    return {
+        "version": 1,
+        "ids": graph.ids,
+        "out_offsets": graph.out_offsets,
+        "out_targets": graph.out_targets,
+        "in_offsets": graph.in_offsets,
+        "in_targets": graph.in_targets,
+        "ancestor_offsets": anc_offsets,
+        "ancestors": anc_targets,
+        "descendant_offsets": desc_offsets,
+        "descendants": desc_targets,
+    }
+
+
+def load_graph() -> InfluenceGraph:
+    corpus = load_corpus()
+    return InfluenceGraph.from_events(corpus.indexed_events())
+
+
+def _node(graph: InfluenceGraph, event_id: str) -> int:
+    if event_id not in graph.index:
+        print(f"[FATAL] 未知的事件 ID: {event_id}")
+        sys.exit(1)
+    return graph.index[event_id]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="影响链图引擎。")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help=f"导出 CSR 和传递闭包到 {INFLUENCE_GRAPH_FILE}")
+    path_parser = sub.add_parser("path", help="最短影响路径")
+    path_parser.add_argument("source")
+    path_parser.add_argument("target")
+    reach_parser = sub.add_parser("reach", help="k 跳以内影响到的事件")
+    reach_parser.add_argument("event_id")
+    reach_parser.add_argument("--hops", type=int, default=1)
+    reach_parser.add_argument(
+        "--backward", action="store_true", help="反向: 查找影响了该事件的事件"
+    )
+    args = parser.parse_args()
+
+    graph = load_graph()
+
+    if args.command == "build":
+        data = export_graph(graph)
+        changed = write_json(INFLUENCE_GRAPH_FILE, data)
+        print(
+            f"[INFO] {INFLUENCE_GRAPH_FILE}: {len(graph.ids)} 个事件, "
+            f"{graph.edge_count} 条影响边, {len(data['ancestors'])} 条祖先记录, "
+            f"{len(data['descendants'])} 条后代记录{' (已更新)' if changed else ''}"
+        )
+    elif args.command == "path":
+        path = graph.shortest_path(_node(graph, args.source), _node(graph, args.target))
+        if not path:
+            print(f"[INFO] {args.source} 与 {args.target} 之间没有影响路径。")
+            sys.exit(1)
+        print(" -> ".join(graph.ids[node] for node in path))
+    elif args.command == "reach":
+        dist = graph.within_hops(
+            _node(graph, args.event_id), args.hops, forward=not args.backward
+        )
+        for node, hops in sorted(
+            dist.items(), key=lambda kv: (kv[1], graph.ids[kv[0]])
+        ):
+            print(f"{hops}\t{graph.ids[node]}")
+
+
+if __name__ == "__main__":
+    main()
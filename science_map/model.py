@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+语料库的紧凑类型化模型。
+
+load_corpus() 返回的是通用的嵌套 dict，每个事件连同全部双语长文本一起常驻内存。
+本模块把语料库转换为:
+
+- Event / Person / Storyline: 使用 __slots__ 的类，只保留 ID、标题、年份、坐标、
+  学科、人物、故事线和影响链 ID 等结构化字段；ID、学科名、城市名等重复字符串
+  通过 sys.intern 共享。
+- 双语长文本 (summary、story、quiz 等) 在第一次访问 .details 时才从文件读取。
+- EventColumns: 按 Model.events 的顺序排列的 NumPy 列 (year、lat、lng、学科位掩码、
+  是否存根)，"每个世纪每个学科的事件数"、"没有坐标的事件" 这类批量问题可以
+  直接用向量运算回答。
+
+load_model() 逐个文件流式解析: 每个文件解析后立即裁剪为结构化字段并转换为
+Event / Person，完整的 dict 随即释放；不经过 load_corpus()，也不加载
+.corpus_cache/ 中的解析缓存 (它包含所有文件的完整 dict)。峰值内存因此只与
+紧凑模型的大小有关。文件较多时在进程池中解析，工作进程只返回裁剪后的字段。
+
+依赖 NumPy (pip install numpy)。
+
+用法:
+    python model.py            # 打印模型概况和内存占用
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from build_filter_index import FIELD_BITS
+from corpus import (
+    EVENTS_DIR,
+    EVENTS_INDEX_FILE,
+    PARALLEL_THRESHOLD,
+    PEOPLE_DIR,
+    STORYLINES_FILE,
+    _parse_file,
+    event_person_ids,
+)
+from standardize_fields import STANDARD_FIELDS_ZH
+
+_intern = sys.intern
+
+# Event 的结构化字段，其余键都属于懒加载的 details
+EVENT_CORE_KEYS = {
+    "id",
+    "title",
+    "title_en",
+    "year",
+    "lat",
+    "lng",
+    "city",
+    "city_en",
+    "country",
+    "country_en",
+    "field",
+    "field_en",
+    "personId",
+    "personIds",
+    "storyline_id",
+    "storyline_ids",
+    "is_stub",
+}
+PERSON_CORE_KEYS = {"name", "name_en", "events"}
+
+
+def _str_or_none(value):
+    return _intern(value) if isinstance(value, str) else None
+
+
+def _str_tuple(value) -> tuple:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return ()
+    return tuple(_intern(v) for v in value if isinstance(v, str))
+
+
+def _number_or_none(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def _load_details(path, core_keys: set) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {key: value for key, value in data.items() if key not in core_keys}
+
+
+class Event:
+    __slots__ = (
+        "id",
+        "title",
+        "title_en",
+        "year",
+        "lat",
+        "lng",
+        "city",
+        "city_en",
+        "country",
+        "country_en",
+        "fields",
+        "fields_en",
+        "person_ids",
+        "storyline_ids",
+        "is_stub",
+        "influenced_by",
+        "influenced",
+        "_details",
+    )
+
+    def __init__(self, event_id: str, data: dict):
+        self.id = _intern(event_id)
+        self.title = _str_or_none(data.get("title"))
+        self.title_en = _str_or_none(data.get("title_en"))
+        year = data.get("year")
+        self.year = year if type(year) is int else None
+        self.lat = _number_or_none(data.get("lat"))
+        self.lng = _number_or_none(data.get("lng"))
+        self.city = _str_or_none(data.get("city"))
+        self.city_en = _str_or_none(data.get("city_en"))
+        self.country = _str_or_none(data.get("country"))
+        self.country_en = _str_or_none(data.get("country_en"))
+        self.fields = _str_tuple(data.get("field"))
+        self.fields_en = _str_tuple(data.get("field_en"))
+        self.person_ids = tuple(_intern(p) for p in event_person_ids(data))
+        # 与 App 一致: storyline_ids 优先，旧的 storyline_id 作为后备
+        storylines = data.get("storyline_ids")
+        if storylines is None:
+            storylines = data.get("storyline_id")
+        self.storyline_ids = _str_tuple(storylines)
+        self.is_stub = data.get("is_stub") is True
+
+        chain = data.get("influence_chain")
+        chain = chain if isinstance(chain, dict) else {}
+        self.influenced_by = self._chain_ids(chain.get("influenced_by"))
+        self.influenced = self._chain_ids(chain.get("influenced"))
+        self._details = None
+
+    @staticmethod
+    def _chain_ids(items) -> tuple:
+        if not isinstance(items, list):
+            return ()
+        return tuple(
+            _intern(item["id"])
+            for item in items
+            if isinstance(item, dict) and isinstance(item.get("id"), str)
+        )
+
+    @property
+    def path(self):
+        return EVENTS_DIR / f"{self.id}.json"
+
+    @property
+    def details(self) -> dict:
+        """结构化字段以外的所有内容 (summary、story、quiz、influence_chain 等)。"""
+        if self._details is None:
+            self._details = _load_details(self.path, EVENT_CORE_KEYS)
+        return self._details
+
+    def unload(self):
+        """释放已加载的 details。"""
+        self._details = None
+
+    def __repr__(self):
+        return f"Event({self.id!r}, year={self.year})"
+
+
+class Person:
+    __slots__ = ("id", "name", "name_en", "event_ids", "_details")
+
+    def __init__(self, person_id: str, data: dict):
+        self.id = _intern(person_id)
+        self.name = _str_or_none(data.get("name"))
+        self.name_en = _str_or_none(data.get("name_en"))
+        self.event_ids = _str_tuple(data.get("events"))
+        self._details = None
+
+    @property
+    def path(self):
+        return PEOPLE_DIR / f"{self.id}.json"
+
+    @property
+    def details(self) -> dict:
+        """bio_short、portrait 等其余字段。"""
+        if self._details is None:
+            self._details = _load_details(self.path, PERSON_CORE_KEYS)
+        return self._details
+
+    def unload(self):
+        self._details = None
+
+    def __repr__(self):
+        return f"Person({self.id!r})"
+
+
+class Storyline:
+    __slots__ = (
+        "id",
+        "title_zh",
+        "title_en",
+        "emoji",
+        "description_zh",
+        "description_en",
+        "event_ids",
+    )
+
+    def __init__(self, storyline_id: str, data: dict):
+        self.id = _intern(storyline_id)
+        self.title_zh = _str_or_none(data.get("title_zh"))
+        self.title_en = _str_or_none(data.get("title_en"))
+        self.emoji = _str_or_none(data.get("emoji"))
+        self.description_zh = data.get("description_zh")
+        self.description_en = data.get("description_en")
+        self.event_ids = _str_tuple(data.get("events"))
+
+    def __repr__(self):
+        return f"Storyline({self.id!r}, {len(self.event_ids)} events)"
+
+
+class EventColumns:
+    """与 Model.events 顺序一致的列式数组。
+
+    year 缺失时为 YEAR_MISSING，lat / lng 缺失时为 NaN。
+    field_mask 的第 i 位对应 STANDARD_FIELDS_ZH[i] (与 filter_index.json 相同)。
+    """
+
+    YEAR_MISSING = np.iinfo(np.int32).min
+
+    def __init__(self, events: list):
+        n = len(events)
+        self.ids = [event.id for event in events]
+        self.year = np.fromiter(
+            (self.YEAR_MISSING if e.year is None else e.year for e in events),
+            dtype=np.int32,
+            count=n,
+        )
+        self.lat = np.fromiter(
+            (np.nan if e.lat is None else e.lat for e in events),
+            dtype=np.float64,
+            count=n,
+        )
+        self.lng = np.fromiter(
+            (np.nan if e.lng is None else e.lng for e in events),
+            dtype=np.float64,
+            count=n,
+        )
+        self.field_mask = np.fromiter(
+            (
+                sum(FIELD_BITS.get(f, 0) for f in set(e.fields or ("综合",)))
+                for e in events
+            ),
+            dtype=np.uint32,
+            count=n,
+        )
+        self.is_stub = np.fromiter((e.is_stub for e in events), dtype=bool, count=n)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def has_year(self) -> np.ndarray:
+        return self.year != self.YEAR_MISSING
+
+    @property
+    def has_coordinates(self) -> np.ndarray:
+        return ~(np.isnan(self.lat) | np.isnan(self.lng))
+
+    def select(self, mask: np.ndarray) -> list:
+        """布尔掩码 -> 事件 ID 列表。"""
+        return [self.ids[i] for i in np.flatnonzero(mask)]
+
+    def field_counts(self, mask: np.ndarray = None) -> dict:
+        """{学科: 事件数}，可以用布尔掩码限定范围。"""
+        masks = self.field_mask if mask is None else self.field_mask[mask]
+        return {
+            field: int(np.count_nonzero(masks & bit))
+            for field, bit in FIELD_BITS.items()
+        }
+
+    def per_century(self) -> tuple:
+        """每个世纪每个学科的事件数 (不含存根和没有年份的事件)。
+
+        返回 (世纪起始年份数组, 计数矩阵)，计数矩阵形状为
+        (世纪数, len(STANDARD_FIELDS_ZH))。
+        """
+        rows = self.has_year & ~self.is_stub
+        years = self.year[rows].astype(np.int64)
+        masks = self.field_mask[rows]
+        if not len(years):
+            return np.zeros(0, dtype=np.int64), np.zeros(
+                (0, len(STANDARD_FIELDS_ZH)), dtype=np.int64
+            )
+        century = years // 100
+        first = century.min()
+        buckets = century - first
+        bits = (masks[:, None] >> np.arange(len(STANDARD_FIELDS_ZH))) & 1
+        counts = np.zeros((buckets.max() + 1, len(STANDARD_FIELDS_ZH)), dtype=np.int64)
+        np.add.at(counts, buckets, bits)
+        return (np.arange(len(counts)) + first) * 100, counts
+
+    def extent(self, mask: np.ndarray = None) -> tuple:
+        """(最小纬度, 最小经度, 最大纬度, 最大经度)，没有坐标时返回 None。"""
+        rows = self.has_coordinates if mask is None else self.has_coordinates & mask
+        if not rows.any():
+            return None
+        lat, lng = self.lat[rows], self.lng[rows]
+        return float(lat.min()), float(lng.min()), float(lat.max()), float(lng.max())
+
+
+class Model:
+    """events / people / storylines 以 ID 为键，保持语料库的加载顺序。"""
+
+    def __init__(self, events: dict, people: dict, storylines: dict, events_index=None):
+        self.events = events
+        self.people = people
+        self.storylines = storylines
+        self.events_index = events_index
+        self._columns = None
+
+    @classmethod
+    def from_corpus(cls, corpus) -> "Model":
+        events = {eid: Event(eid, data) for eid, data in corpus.events.items()}
+        people = {pid: Person(pid, data) for pid, data in corpus.people.items()}
+        storylines = {}
+        if isinstance(corpus.storylines, dict):
+            storylines = {
+                sid: Storyline(sid, data)
+                for sid, data in corpus.storylines.items()
+                if isinstance(data, dict)
+            }
+        events_index = corpus.events_index
+        if isinstance(events_index, list):
+            events_index = [_intern(e) for e in events_index if isinstance(e, str)]
+        return cls(events, people, storylines, events_index)
+
+    @property
+    def columns(self) -> EventColumns:
+        if self._columns is None:
+            self._columns = EventColumns(list(self.events.values()))
+        return self._columns
+
+    def indexed_events(self) -> list:
+        """按 events_index 顺序返回 Event 列表。"""
+        ids = dict.fromkeys(self.events_index or [])
+        return [self.events[eid] for eid in ids if eid in self.events]
+
+
+def _core_fields(path: str, core_keys: set) -> tuple:
+    """解析单个文件并只保留结构化字段 (影响链只保留 ID)，返回 (core, error)。
+
+    在工作进程中运行时，只有裁剪后的字段会被传回主进程。
+    """
+    _, _, _, data, error = _parse_file(path)
+    if error is not None:
+        return None, error
+    if not isinstance(data, dict):
+        return None, "不是 JSON 对象"
+    core = {key: data[key] for key in core_keys if key in data}
+    chain = data.get("influence_chain")
+    if isinstance(chain, dict):
+        core["influence_chain"] = {
+            direction: [
+                {"id": item["id"]}
+                for item in items
+                if isinstance(item, dict) and isinstance(item.get("id"), str)
+            ]
+            for direction, items in chain.items()
+            if direction in ("influenced_by", "influenced") and isinstance(items, list)
+        }
+    return core, None
+
+
+def _event_core(path: str) -> tuple:
+    return _core_fields(path, EVENT_CORE_KEYS)
+
+
+def _person_core(path: str) -> tuple:
+    return _core_fields(path, PERSON_CORE_KEYS)
+
+
+def _stream(paths: list, parse) -> iter:
+    """逐个产出 (路径, core, error)，文件较多时由进程池按顺序分块解析。"""
+    paths = [str(path) for path in paths]
+    if len(paths) < PARALLEL_THRESHOLD:
+        for path in paths:
+            yield (path,) + parse(path)
+        return
+    workers = os.cpu_count() or 1
+    chunk = max(1, min(256, len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, result in zip(paths, pool.map(parse, paths, chunksize=chunk)):
+            yield (path,) + result
+
+
+def _read_json(path):
+    if not path.exists():
+        return None
+    _, _, _, data, _ = _parse_file(str(path))
+    return data
+
+
+def load_model() -> Model:
+    """流式加载紧凑模型，无法解析的文件被跳过 (与 load_corpus 相同)。"""
+    events = {}
+    for path, core, error in _stream(sorted(EVENTS_DIR.glob("*.json")), _event_core):
+        if error is None:
+            event_id = os.path.basename(path)[: -len(".json")]
+            events[_intern(event_id)] = Event(event_id, core)
+    people = {}
+    for path, core, error in _stream(sorted(PEOPLE_DIR.glob("*.json")), _person_core):
+        if error is None:
+            person_id = os.path.basename(path)[: -len(".json")]
+            people[_intern(person_id)] = Person(person_id, core)
+
+    storylines = {}
+    data = _read_json(STORYLINES_FILE)
+    if isinstance(data, dict):
+        storylines = {
+            sid: Storyline(sid, story)
+            for sid, story in data.items()
+            if isinstance(story, dict)
+        }
+    events_index = _read_json(EVENTS_INDEX_FILE)
+    if isinstance(events_index, list):
+        events_index = [_intern(e) for e in events_index if isinstance(e, str)]
+    else:
+        events_index = None
+    return Model(events, people, storylines, events_index)
+
+
+def main():
+    tracemalloc.start()
+    start = time.perf_counter()
+    model = load_model()
+    columns = model.columns
+    model_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    seconds = time.perf_counter() - start
+    tracemalloc.stop()
+
+    print(
+        f"[INFO] {len(model.events)} 个事件, {len(model.people)} 个人物, "
+        f"{len(model.storylines)} 条故事线 (耗时 {seconds * 1000:.0f} ms)。"
+    )
+    print(
+        f"[INFO] 内存: 紧凑模型 {model_bytes / 1024 / 1024:.1f} MB, "
+        f"加载时峰值 {peak_bytes / 1024 / 1024:.1f} MB。"
+    )
+
+    no_coordinates = columns.select(~columns.has_coordinates & ~columns.is_stub)
+    print(f"[INFO] 没有坐标的非存根事件: {len(no_coordinates)} 个")
+    for event_id in no_coordinates[:20]:
+        print(f"  - {event_id}")
+
+    extent = columns.extent()
+    if extent:
+        print(
+            f"[INFO] 坐标范围: 纬度 {extent[0]:.2f} ~ {extent[2]:.2f}, "
+            f"经度 {extent[1]:.2f} ~ {extent[3]:.2f}"
+        )
+
+    centuries, counts = columns.per_century()
+    print("\n[INFO] 每个世纪各学科的事件数:")
+    print("  世纪起始  " + " ".join(f"{f:>4}" for f in STANDARD_FIELDS_ZH))
+    for year, row in zip(centuries, counts):
+        if row.any():
+            print(f"  {year:>8}  " + " ".join(f"{c:>6}" for c in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+语料库的引用表: 一次遍历提取所有事件和人物文件中的 ID 引用。
+
+每条引用包含:
+    source_type  "event" 或 "person"
+    source_id    引用所在文件的 ID
+    target_id    被引用的 ID
+    kind         引用类型:
+                   personIds       事件 -> 人物 (personIds / personId，字符串或列表)
+                   influence_chain 事件 -> 事件 (influenced_by / influenced)
+                   person.events   人物 -> 事件
+                   backtick        任意文本中的 `event_id` (事件 -> 事件)
+    pointer      引用位置的 JSON Pointer (如 /influence_chain/influenced_by/0/id)
+
+每个文件只遍历一次，所有字符串 (包括 quiz 选项、嵌套列表等) 都用同一个
+预编译的正则匹配反引号引用。提取结果缓存在 .corpus_cache/references.pickle 中，
+以文件内容哈希为键，verify_data_links.py、create_stub.py 和
+find_missing_events_people.py 共用这张表。
+
+用法:
+    python references.py            # 打印统计信息
+    python references.py <ID>       # 列出指向某个 ID 的所有引用
+"""
+
+import os
+import pickle
+import re
+import sys
+from collections import namedtuple
+
+from corpus import CACHE_DIR, Corpus, load_corpus
+
+# --- 配置 ---
+REFERENCES_CACHE_FILE = CACHE_DIR / "references.pickle"
+# --- 结束配置 ---
+
+# 提取规则变化时递增，使缓存失效
+EXTRACTOR_VERSION = 2
+
+BACKTICK_REF = re.compile(r"`([a-z_]+_[0-9BC]+)`")
+
+Reference = namedtuple(
+    "Reference", ["source_type", "source_id", "target_id", "kind", "pointer"]
+)
+
+# 同一文件内的输出顺序: 结构化引用在前，文本引用在后
+KIND_ORDER = ["personIds", "influenced_by", "influenced", "person.events", "backtick"]
+
+
+def _pointer(path: tuple) -> str:
+    return "".join(
+        "/" + str(token).replace("~", "~0").replace("/", "~1") for token in path
+    )
+
+
+def extract_references(source_type: str, source_id: str, data) -> list:
+    """对单个文档做一次 (深度优先、保持文档顺序的) 遍历，返回该文档的所有引用。"""
+    buckets = {kind: [] for kind in KIND_ORDER}
+
+    def add(bucket, target_id, kind, path):
+        buckets[bucket].append(
+            Reference(source_type, source_id, target_id, kind, _pointer(path))
+        )
+
+    # personId 与 personIds 同时存在时，只有 personIds 生效 (见 event_person_ids)
+    person_key = None
+    if source_type == "event" and isinstance(data, dict):
+        if isinstance(data.get("personIds"), list):
+            person_key = "personIds"
+        elif isinstance(data.get("personId"), (str, list)):
+            person_key = "personId"
+
+    stack = [(data, ())]
+    while stack:
+        node, path = stack.pop()
+        if isinstance(node, str):
+            for match in BACKTICK_REF.finditer(node):
+                add("backtick", match.group(1), "backtick", path)
+            continue
+        if isinstance(node, dict):
+            children = list(node.items())
+        elif isinstance(node, list):
+            children = list(enumerate(node))
+        else:
+            continue
+
+        # 结构化引用按文档顺序直接记录，其余子节点逆序压栈，使弹出顺序与文档顺序一致
+        pending = []
+        for key, value in children:
+            child = path + (key,)
+            if isinstance(value, str):
+                if source_type == "event":
+                    if child[0] == person_key and len(child) <= 2:
+                        add("personIds", value, "personIds", child)
+                        continue
+                    if (
+                        len(child) == 4
+                        and child[0] == "influence_chain"
+                        and child[1] in ("influenced_by", "influenced")
+                        and key == "id"
+                    ):
+                        add(child[1], value, "influence_chain", child)
+                        continue
+                elif len(child) == 2 and child[0] == "events":
+                    add("person.events", value, "person.events", child)
+                    continue
+            pending.append((value, child))
+        stack.extend(reversed(pending))
+
+    refs = []
+    for kind in KIND_ORDER:
+        refs.extend(buckets[kind])
+    return refs
+
+
+class ReferenceTable:
+    """整个语料库的引用表。"""
+
+    def __init__(self, references: list):
+        self.references = references
+        self._by_source = {}
+        for ref in references:
+            key = (ref.source_type, ref.source_id)
+            self._by_source.setdefault(key, []).append(ref)
+
+    def __iter__(self):
+        return iter(self.references)
+
+    def __len__(self):
+        return len(self.references)
+
+    def from_event(self, event_id: str) -> list:
+        return self._by_source.get(("event", event_id), [])
+
+    def from_person(self, person_id: str) -> list:
+        return self._by_source.get(("person", person_id), [])
+
+    def of_kind(self, *kinds) -> list:
+        return [ref for ref in self.references if ref.kind in kinds]
+
+    def to(self, target_id: str) -> list:
+        return [ref for ref in self.references if ref.target_id == target_id]
+
+
+def _load_cache() -> dict:
+    try:
+        with open(REFERENCES_CACHE_FILE, "rb") as f:
+            cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != EXTRACTOR_VERSION:
+        return {}
+    return cache.get("entries", {})
+
+
+def _save_cache(entries: dict):
+    REFERENCES_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = REFERENCES_CACHE_FILE.with_suffix(".tmp")
+    try:
+        with open(tmp_file, "wb") as f:
+            pickle.dump(
+                {"version": EXTRACTOR_VERSION, "entries": entries},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_file, REFERENCES_CACHE_FILE)
+    except OSError as e:
+        print(f"  (Warning: 无法写入引用缓存 {REFERENCES_CACHE_FILE}: {e})")
+
+
+def load_references(corpus: Corpus) -> ReferenceTable:
+    """为语料库中所有已解析的事件和人物文件构建引用表 (复用缓存)。"""
+    cache = _load_cache()
+    entries = {}
+    references = []
+    dirty = False
+
+    documents = [
+        ("event", eid, data, corpus.event_path(eid))
+        for eid, data in corpus.events.items()
+    ]
+    documents += [
+        ("person", pid, data, corpus.person_path(pid))
+        for pid, data in corpus.people.items()
+    ]
+
+    for source_type, source_id, data, path in documents:
+        key = str(path)
+        digest = corpus.digests.get(path)
+        cached = cache.get(key)
+        if cached is not None and cached[0] == digest:
+            rows = cached[1]
+        else:
+            # 缓存中存储普通元组，不依赖 Reference 类所在的模块名
+            rows = [tuple(r) for r in extract_references(source_type, source_id, data)]
+            dirty = True
+        entries[key] = (digest, rows)
+        references.extend(map(Reference._make, rows))
+
+    if dirty or entries.keys() != cache.keys():
+        _save_cache(entries)
+    return ReferenceTable(references)
+
+
+def main():
+    corpus = load_corpus()
+    table = load_references(corpus)
+
+    if len(sys.argv) > 1:
+        for ref in table.to(sys.argv[1]):
+            print(f"{ref.source_type}\t{ref.source_id}\t{ref.kind}\t{ref.pointer}")
+        return
+
+    counts = {}
+    for ref in table:
+        counts[ref.kind] = counts.get(ref.kind, 0) + 1
+    print(f"[INFO] 共 {len(table)} 条引用:")
+    for kind, count in sorted(counts.items()):
+        print(f"  - {kind}: {count}")
+
+
+if __name__ == "__main__":
+    main()
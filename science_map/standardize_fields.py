@@ -1,12 +1,23 @@
 #!/usr/bin/env python3
 """
 将所有event的field标准化为11个标准领域
+
+用法:
+    python standardize_fields.py            # 只重写 field 真正发生变化的文件
+    python standardize_fields.py --dry-run  # 只报告计划中的变更，不写任何文件
+    python standardize_fields.py --dry-run --report fields.json  # 见 diagnostics.py
+
+新的 field 集合在进程池中计算，并与原值比较；未变化的文件保持原样
+(不改变 mtime，不产生 git diff)。写入使用临时文件 + 重命名，
+field_standardization_log.json 只记录真正的变更。
 """
 
+import argparse
 import json
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
-EVENTS_DIR = Path("assets/events")
+from corpus import EVENTS_DIR, PARALLEL_THRESHOLD, load_corpus, write_json
+from diagnostics import Report, add_arguments
 
 # 标准field映射
 FIELD_MAPPING_ZH = {
@@ -171,9 +182,11 @@ def map_fields(fields, mapping):
     for field in fields:
         mapped_field = mapping.get(
             field,
-            "综合"
-            if isinstance(field, str) and any(c in field for c in "中文")
-            else "Comprehensive",
+            (
+                "综合"
+                if isinstance(field, str) and any(c in field for c in "中文")
+                else "Comprehensive"
+            ),
         )
         if mapped_field not in ["综合", "Comprehensive"] or len(mapped) == 0:
             mapped.add(mapped_field)
@@ -187,48 +200,128 @@ def map_fields(fields, mapping):
     return sorted(list(mapped))
 
 
-def standardize_event_fields(event_file):
-    """标准化单个event文件的field"""
-    with open(event_file, "r", encoding="utf-8") as f:
-        event_data = json.load(f)
+def standardize_event_fields(item):
+    """计算单个event的标准化field (在工作进程中运行)。
 
-    original_fields_zh = event_data.get("field", [])
-    original_fields_en = event_data.get("field_en", [])
+    item 为 (文件名, 事件 id, field, field_en)，返回 (文件名, 变更记录, 错误信息)。
+    """
+    event_id, data_id, original_fields_zh, original_fields_en = item
+    try:
+        new_fields_zh = map_fields(original_fields_zh, FIELD_MAPPING_ZH)
+        new_fields_en = map_fields(original_fields_en, FIELD_MAPPING_EN)
+    except Exception as e:
+        return event_id, None, str(e)
 
-    # 映射field
-    new_fields_zh = map_fields(original_fields_zh, FIELD_MAPPING_ZH)
-    new_fields_en = map_fields(original_fields_en, FIELD_MAPPING_EN)
+    return (
+        event_id,
+        {
+            "event": data_id,
+            "original_zh": original_fields_zh,
+            "new_zh": new_fields_zh,
+            "original_en": original_fields_en,
+            "new_en": new_fields_en,
+        },
+        None,
+    )
 
-    # 更新event数据
-    event_data["field"] = new_fields_zh
-    event_data["field_en"] = new_fields_en
 
-    # 保存
-    with open(event_file, "w", encoding="utf-8") as f:
-        json.dump(event_data, f, ensure_ascii=False, indent=4)
+def main():
+    parser = argparse.ArgumentParser(description="将所有event的field标准化。")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="只报告计划中的变更，不写入文件"
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
 
-    return {
-        "event": event_data.get("id"),
-        "original_zh": original_fields_zh,
-        "new_zh": new_fields_zh,
-        "original_en": original_fields_en,
-        "new_en": new_fields_en,
-    }
+    report = Report("standardize_fields")
+    with report.session(args):
+        standardize(args, report)
 
 
-# 处理所有event文件
-changes = []
-for event_file in sorted(EVENTS_DIR.glob("*.json")):
-    try:
-        change = standardize_event_fields(event_file)
+def standardize(args, report: Report):
+    with report.phase("parse"):
+        corpus = load_corpus()
+    report.record_corpus(corpus)
+
+    for event_file, error in sorted(corpus.errors.items()):
+        if event_file.parent == EVENTS_DIR:
+            print(f"❌ Error processing {event_file}: {error}")
+            report.add("json-syntax", "error", error, file=event_file)
+
+    # 1. 并行计算新的field
+    items = [
+        (
+            event_id,
+            event_data.get("id"),
+            event_data.get("field", []),
+            event_data.get("field_en", []),
+        )
+        for event_id, event_data in corpus.events.items()
+    ]
+    with report.phase("check"):
+        if len(items) >= PARALLEL_THRESHOLD:
+            with ProcessPoolExecutor() as pool:
+                results = list(pool.map(standardize_event_fields, items, chunksize=64))
+        else:
+            results = [standardize_event_fields(item) for item in items]
+
+    # 2. 只写入真正变化的文件
+    changes = []
+    for event_id, change, error in results:
+        event_file = corpus.event_path(event_id)
+        if error is not None:
+            print(f"❌ Error processing {event_file}: {error}")
+            report.add(
+                "invalid-field", "error", error, file=event_file, pointer="/field"
+            )
+            continue
+        if (
+            change["new_zh"] == change["original_zh"]
+            and change["new_en"] == change["original_en"]
+        ):
+            continue
+
         changes.append(change)
+        report.add(
+            "field-standardized",
+            "note",
+            f"{change['original_zh']} -> {change['new_zh']}",
+            file=event_file,
+            pointer="/field",
+        )
+        if args.dry_run:
+            print(
+                f"[DRY-RUN] {change['event']}: "
+                f"{change['original_zh']} -> {change['new_zh']}"
+            )
+            continue
+
+        event_data = corpus.events[event_id]
+        event_data["field"] = change["new_zh"]
+        event_data["field_en"] = change["new_en"]
+        try:
+            with report.phase("write"):
+                write_json(event_file, event_data, indent=4)
+        except OSError as e:
+            print(f"❌ Error processing {event_file}: {e}")
+            report.add("write-failed", "error", str(e), file=event_file)
+            changes.pop()
+            continue
         print(f"✅ {change['event']}: {change['original_zh']} -> {change['new_zh']}")
-    except Exception as e:
-        print(f"❌ Error processing {event_file}: {e}")
 
-# 保存变更记录
-with open("field_standardization_log.json", "w", encoding="utf-8") as f:
-    json.dump(changes, f, ensure_ascii=False, indent=2)
+    if args.dry_run:
+        print(f"\n[DRY-RUN] 共 {len(results)} 个事件，其中 {len(changes)} 个需要更新。")
+        return
+
+    # 保存变更记录
+    with report.phase("write"), open(
+        "field_standardization_log.json", "w", encoding="utf-8"
+    ) as f:
+        json.dump(changes, f, ensure_ascii=False, indent=2)
+
+    print(f"\n✅ 完成！共检查 {len(results)} 个事件，更新 {len(changes)} 个")
+    print("变更记录已保存到 field_standardization_log.json")
+
 
-print(f"\n✅ 完成！共处理 {len(changes)} 个事件")
-print("变更记录已保存到 field_standardization_log.json")
+if __name__ == "__main__":
+    main()
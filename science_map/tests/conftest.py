@@ -0,0 +1,43 @@
+"""
+测试共用的设置。
+
+各脚本使用相对于 science_map/ 的路径 (assets/events 等)，因此 corpus_dir
+在临时目录中建立一个小语料库并切换到该目录。
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def write_corpus(root: Path, events: dict, people: dict = None, storylines=None):
+    """写出 assets/ 目录结构；storylines 为 None 时不写 storylines.json。"""
+    events_dir = root / "assets" / "events"
+    people_dir = root / "assets" / "people"
+    events_dir.mkdir(parents=True, exist_ok=True)
+    people_dir.mkdir(parents=True, exist_ok=True)
+    people = people or {}
+    for event_id, data in events.items():
+        (events_dir / f"{event_id}.json").write_text(
+            json.dumps(data, ensure_ascii=False), encoding="utf-8"
+        )
+    for person_id, data in people.items():
+        (people_dir / f"{person_id}.json").write_text(
+            json.dumps(data, ensure_ascii=False), encoding="utf-8"
+        )
+    (root / "assets" / "events_index.json").write_text(json.dumps(list(events)))
+    (root / "assets" / "people_index.json").write_text(json.dumps(list(people)))
+    if storylines is not None:
+        (root / "assets" / "storylines.json").write_text(
+            json.dumps(storylines, ensure_ascii=False), encoding="utf-8"
+        )
+
+
+@pytest.fixture
+def corpus_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
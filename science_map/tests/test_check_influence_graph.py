@@ -0,0 +1,159 @@
+import json
+from pathlib import Path
+
+import check_influence_graph
+from check_influence_graph import merge_fixes
+from conftest import write_corpus
+from corpus import load_corpus
+from diagnostics import Finding, Report
+from influence_graph import InfluenceGraph
+
+
+def _finding(fix):
+    return Finding("rule", "warning", "f.json", "", "", fix)
+
+
+def _apply(document, ops):
+    """按顺序应用 JSON Patch 的 add / remove 操作 (测试所需的最小实现)。"""
+    for op in ops:
+        *parents, last = [
+            t.replace("~1", "/").replace("~0", "~") for t in op["path"].split("/")[1:]
+        ]
+        target = document
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if op["op"] == "remove":
+            del target[int(last) if isinstance(target, list) else last]
+        elif isinstance(target, list):
+            index = len(target) if last == "-" else int(last)
+            target.insert(index, op["value"])
+        else:
+            target[last] = op["value"]
+    return document
+
+
+def test_removes_in_same_array_run_from_highest_index():
+    first = {"a.json": [{"op": "remove", "path": "/influence_chain/influenced/0"}]}
+    second = {
+        "a.json": [
+            {"op": "add", "path": "/influence_chain/influenced_by/-", "value": 1},
+            {"op": "remove", "path": "/influence_chain/influenced/10"},
+            {"op": "remove", "path": "/influence_chain/influenced/2"},
+            {"op": "remove", "path": "/influence_chain/influenced_by/1"},
+        ]
+    }
+    merged = merge_fixes([_finding(first), _finding(second), _finding(first)])
+    assert [op["path"] for op in merged["a.json"]] == [
+        "/influence_chain/influenced/10",
+        "/influence_chain/influenced/2",
+        "/influence_chain/influenced/0",
+        "/influence_chain/influenced_by/1",
+        "/influence_chain/influenced_by/-",
+    ]
+
+    document = {
+        "influence_chain": {"influenced": list(range(11)), "influenced_by": [0, 1]}
+    }
+    assert _apply(document, merged["a.json"]) == {
+        "influence_chain": {
+            "influenced": [1, 3, 4, 5, 6, 7, 8, 9],
+            "influenced_by": [0, 1],
+        }
+    }
+
+
+def test_adds_creating_the_same_container_are_merged():
+    fixes = [
+        {"b.json": [{"op": "add", "path": "/influence_chain", "value": {"x": [1]}}]},
+        {"b.json": [{"op": "add", "path": "/influence_chain", "value": {"x": [2]}}]},
+        {"b.json": [{"op": "add", "path": "/influence_chain", "value": {"y": [3]}}]},
+        {"a.json": [{"op": "add", "path": "/list", "value": [1]}]},
+        {"a.json": [{"op": "add", "path": "/list", "value": [2]}]},
+        {"a.json": [{"op": "add", "path": "/items/-", "value": 3}]},
+        {"a.json": [{"op": "add", "path": "/items/-", "value": 4}]},
+    ]
+    merged = merge_fixes([_finding(fix) for fix in fixes])
+
+    assert list(merged) == ["a.json", "b.json"]
+    assert merged["b.json"] == [
+        {"op": "add", "path": "/influence_chain", "value": {"x": [1, 2], "y": [3]}}
+    ]
+    assert merged["a.json"] == [
+        {"op": "add", "path": "/list", "value": [1, 2]},
+        {"op": "add", "path": "/items/-", "value": 3},
+        {"op": "add", "path": "/items/-", "value": 4},
+    ]
+    # 合并不修改原来的建议
+    assert fixes[0]["b.json"][0]["value"] == {"x": [1]}
+
+
+def _link(target, contribution=None):
+    item = {"id": target}
+    if contribution:
+        item["contribution"] = contribution
+    return item
+
+
+def _check(report: Report):
+    corpus = load_corpus(use_cache=False)
+    events = corpus.indexed_events()
+    graph = InfluenceGraph.from_events(events)
+    declarations = check_influence_graph.collect_declarations(events)
+    removing = check_influence_graph.check_cycles(corpus, graph, declarations, report)
+    removing |= check_influence_graph.check_chronology(corpus, declarations, report)
+    check_influence_graph.check_symmetry(corpus, declarations, report, removing)
+
+
+def test_merged_patch_resolves_all_edge_findings(corpus_dir):
+    events = {
+        # 环 a -> b -> c -> a，其中 c -> a 逆序
+        "a_1600": {
+            "year": 1600,
+            "influence_chain": {
+                "influenced": [_link("b_1700"), _link("d_1650")],
+                "influenced_by": [_link("c_1800")],
+            },
+        },
+        "b_1700": {
+            "year": 1700,
+            "influence_chain": {
+                "influenced_by": [_link("a_1600")],
+                "influenced": [_link("c_1800")],
+            },
+        },
+        "c_1800": {
+            "year": 1800,
+            "influence_chain": {
+                "influenced": [_link("a_1600")],
+                "influenced_by": [_link("b_1700"), _link("e_1900", "逆序")],
+            },
+        },
+        # 没有 influence_chain: 补上另一端时需要新建
+        "d_1650": {"year": 1650},
+        "e_1900": {"year": 1900, "influence_chain": {"influenced_by": []}},
+    }
+    for event_id, event in events.items():
+        event["id"] = event_id
+    write_corpus(corpus_dir, events)
+
+    report = Report("check_influence_graph")
+    _check(report)
+    rules = sorted(finding.rule for finding in report.findings)
+    assert rules == [
+        "chronology",
+        "chronology",
+        "influence-cycle",
+        "missing-reverse-edge",
+        "missing-reverse-edge",
+    ]
+
+    for file, ops in merge_fixes(report.findings).items():
+        path = Path(file)
+        document = json.loads(path.read_text(encoding="utf-8"))
+        path.write_text(json.dumps(_apply(document, ops)), encoding="utf-8")
+
+    report = Report("check_influence_graph")
+    _check(report)
+    assert report.findings == []
+    d = json.loads((corpus_dir / "assets/events/d_1650.json").read_text())
+    assert d["influence_chain"] == {"influenced_by": [{"id": "a_1600"}]}
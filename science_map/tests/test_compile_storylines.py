@@ -0,0 +1,55 @@
+import json
+import sys
+
+import pytest
+
+import compile_storylines
+from conftest import write_corpus
+from corpus import load_corpus
+
+EVENTS = {
+    "a_1600": {"id": "a_1600", "title": "A", "year": 1600, "storyline_ids": ["s"]},
+    "b_1700": {"id": "b_1700", "title": "B", "year": 1700, "storyline_ids": ["s"]},
+}
+
+
+def _storyline_ids(root):
+    result = {}
+    for event_id in EVENTS:
+        path = root / "assets" / "events" / f"{event_id}.json"
+        result[event_id] = json.loads(path.read_text(encoding="utf-8")).get(
+            "storyline_ids"
+        )
+    return result
+
+
+@pytest.mark.parametrize("content", [None, "[1, 2]", "{not json"])
+def test_backfill_aborts_without_usable_storylines(corpus_dir, monkeypatch, content):
+    write_corpus(corpus_dir, EVENTS)
+    if content is not None:
+        (corpus_dir / "assets" / "storylines.json").write_text(content)
+    before = _storyline_ids(corpus_dir)
+
+    monkeypatch.setattr(sys, "argv", ["compile_storylines.py"])
+    with pytest.raises(SystemExit) as exc:
+        compile_storylines.main()
+
+    assert exc.value.code == 1
+    assert _storyline_ids(corpus_dir) == before == {"a_1600": ["s"], "b_1700": ["s"]}
+
+
+def test_storylines_error_accepts_valid_file(corpus_dir):
+    write_corpus(
+        corpus_dir, EVENTS, storylines={"s": {"id": "s", "events": ["a_1600"]}}
+    )
+    assert compile_storylines.storylines_error(load_corpus(use_cache=False)) is None
+
+
+def test_backfill_follows_storylines(corpus_dir):
+    write_corpus(
+        corpus_dir, EVENTS, storylines={"s": {"id": "s", "events": ["a_1600"]}}
+    )
+    corpus = load_corpus(use_cache=False)
+    compiled, _ = compile_storylines.compile_storylines(corpus, [])
+    changes = compile_storylines.backfill_storyline_ids(corpus, compiled)
+    assert changes == {"b_1700": (["s"], [])}
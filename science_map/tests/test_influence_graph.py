@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from influence_graph import InfluenceGraph, bits_to_list, closure_table
+
+
+def _random_graph(seed: int, n: int, edge_count: int) -> InfluenceGraph:
+    rng = random.Random(seed)
+    edges = [(rng.randrange(n), rng.randrange(n)) for _ in range(edge_count)]
+    return InfluenceGraph([f"e_{i}" for i in range(n)], edges)
+
+
+def _bfs(graph: InfluenceGraph, node: int, forward: bool) -> list:
+    return sorted(graph.within_hops(node, len(graph.ids), forward=forward))
+
+
+@pytest.mark.parametrize(
+    "seed, n, edge_count",
+    [(0, 1, 0), (1, 8, 0), (2, 10, 12), (3, 40, 60), (4, 40, 160), (5, 200, 400)],
+)
+def test_closure_matches_bfs(seed, n, edge_count):
+    graph = _random_graph(seed, n, edge_count)
+    descendants = graph.descendants()
+    ancestors = graph.ancestors()
+    for node in range(n):
+        assert bits_to_list(descendants[node]) == _bfs(graph, node, forward=True)
+        assert bits_to_list(ancestors[node]) == _bfs(graph, node, forward=False)
+
+
+def test_cycle_members_reach_each_other_but_not_themselves():
+    # 0 -> 1 -> 2 -> 0 构成环，2 -> 3
+    graph = InfluenceGraph(["a", "b", "c", "d"], [(0, 1), (1, 2), (2, 0), (2, 3)])
+    assert [bits_to_list(b) for b in graph.descendants()] == [
+        [1, 2, 3],
+        [0, 2, 3],
+        [0, 1, 3],
+        [],
+    ]
+    assert [bits_to_list(b) for b in graph.ancestors()] == [
+        [1, 2],
+        [0, 2],
+        [0, 1],
+        [0, 1, 2],
+    ]
+
+
+def test_closure_table_offsets():
+    offsets, targets = closure_table([0b110, 0, 0b1])
+    assert offsets == [0, 2, 2, 3]
+    assert targets == [1, 2, 0]
+
+
+def test_from_events_merges_both_directions():
+    events = [
+        ("a_1", {"influence_chain": {"influenced": [{"id": "b_2"}, {"id": "x_9"}]}}),
+        ("b_2", {"influence_chain": {"influenced_by": [{"id": "a_1"}, "bad"]}}),
+        ("c_3", {"influence_chain": {"influenced_by": [{"id": "b_2"}, {"id": "c_3"}]}}),
+    ]
+    graph = InfluenceGraph.from_events(events)
+    # 重复的边合并，指向不存在事件的边和自环被忽略
+    assert graph.edge_count == 2
+    assert graph.successors(0) == [1]
+    assert graph.predecessors(2) == [1]
+    assert graph.shortest_path(0, 2) == [0, 1, 2]
+    assert graph.shortest_path(2, 0) == []
+    assert graph.within_hops(0, 1) == {1: 1}
@@ -0,0 +1,78 @@
+from references import Reference, ReferenceTable, extract_references
+
+
+def _summary(refs):
+    return [(ref.target_id, ref.kind, ref.pointer) for ref in refs]
+
+
+def test_event_references_kinds_and_pointers():
+    event = {
+        "id": "b_1700",
+        "summary": {"text": "见 `a_1600` 与 `c_1800`", "key_points": ["`a_1600`"]},
+        "personIds": ["p1", "p2"],
+        "influence_chain": {
+            "influenced_by": [{"id": "a_1600", "note": "`z_1500`"}],
+            "influenced": [{"id": "c_1800"}],
+        },
+    }
+    refs = extract_references("event", "b_1700", event)
+
+    assert all(ref.source_type == "event" for ref in refs)
+    assert all(ref.source_id == "b_1700" for ref in refs)
+    # 结构化引用在前 (personIds、influenced_by、influenced)，文本引用在后，各自保持文档顺序
+    assert _summary(refs) == [
+        ("p1", "personIds", "/personIds/0"),
+        ("p2", "personIds", "/personIds/1"),
+        ("a_1600", "influence_chain", "/influence_chain/influenced_by/0/id"),
+        ("c_1800", "influence_chain", "/influence_chain/influenced/0/id"),
+        ("a_1600", "backtick", "/summary/text"),
+        ("c_1800", "backtick", "/summary/text"),
+        ("a_1600", "backtick", "/summary/key_points/0"),
+        ("z_1500", "backtick", "/influence_chain/influenced_by/0/note"),
+    ]
+
+
+def test_person_id_is_ignored_when_person_ids_present():
+    event = {"personId": "old", "personIds": ["new"]}
+    assert _summary(extract_references("event", "e_1", event)) == [
+        ("new", "personIds", "/personIds/0")
+    ]
+    assert _summary(extract_references("event", "e_1", {"personId": "solo"})) == [
+        ("solo", "personIds", "/personId")
+    ]
+
+
+def test_person_references():
+    person = {
+        "id": "p1",
+        "events": ["a_1600", 3, "b_1700"],
+        "bio": "参见 `c_1800`",
+        "personIds": ["not_an_event_field"],
+    }
+    refs = extract_references("person", "p1", person)
+    assert _summary(refs) == [
+        ("a_1600", "person.events", "/events/0"),
+        ("b_1700", "person.events", "/events/2"),
+        ("c_1800", "backtick", "/bio"),
+    ]
+
+
+def test_pointer_escapes_json_pointer_tokens():
+    refs = extract_references("event", "e_1", {"a/b": {"c~d": "`x_1`"}})
+    assert _summary(refs) == [("x_1", "backtick", "/a~1b/c~0d")]
+
+
+def test_reference_table_groups_by_source():
+    refs = extract_references("event", "e_1", {"personIds": ["p1"]})
+    refs += extract_references("person", "p1", {"events": ["e_1"]})
+    table = ReferenceTable(refs)
+
+    assert len(table) == 2
+    assert table.from_event("e_1") == [
+        Reference("event", "e_1", "p1", "personIds", "/personIds/0")
+    ]
+    assert table.from_person("p1") == [
+        Reference("person", "p1", "e_1", "person.events", "/events/0")
+    ]
+    assert table.to("p1") == table.from_event("e_1")
+    assert table.from_event("missing") == []
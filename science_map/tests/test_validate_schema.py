@@ -0,0 +1,130 @@
+import validate_schema
+from validate_schema import (
+    List,
+    Object,
+    OneOf,
+    Str,
+    compile_schema,
+    validate_document,
+    validate_documents,
+)
+
+EVENT = {
+    "id": "a_1600",
+    "title": "A",
+    "title_en": "A",
+    "year": 1600,
+    "lat": 10.5,
+    "lng": -20,
+    "city": "C",
+    "city_en": "C",
+    "field": ["物理"],
+    "field_en": ["Physics"],
+}
+
+
+def _issues(kind, doc_id, data):
+    return [
+        (i.severity, i.pointer, i.expected, i.actual, i.message)
+        for i in validate_document(kind, doc_id, "f.json", data)
+    ]
+
+
+def test_valid_event_has_no_issues():
+    assert _issues("event", "a_1600", EVENT) == []
+
+
+def test_type_errors_and_missing_fields():
+    event = {**EVENT, "year": True, "lat": 91, "title": ["A"]}
+    del event["lng"]
+    assert _issues("event", "a_1600", event) == [
+        ("error", "/lng", "present", "missing", "缺少必填字段"),
+        ("error", "/title", "string", "array", "类型错误"),
+        ("error", "/year", "integer", "boolean", "类型错误"),
+        ("error", "/lat", "[-90, 90]", "91", "超出范围"),
+    ]
+
+
+def test_unknown_and_deprecated_fields_are_warnings():
+    event = {**EVENT, "colour": 1, "storyline_id": "s"}
+    severities = {(i[0], i[1], i[4]) for i in _issues("event", "a_1600", event)}
+    assert ("warning", "/colour", "未知字段") in severities
+    assert ("warning", "/storyline_id", "未知字段") not in severities
+    assert all(severity == "warning" for severity, _, _ in severities)
+
+
+def test_one_of_reports_nested_issues_of_matching_branch_once():
+    event = {**EVENT, "story": {"text": 1, "video": {"title": "v"}}}
+    assert _issues("event", "a_1600", event) == [
+        ("error", "/story/text", "string", "integer", "类型错误"),
+        ("error", "/story/video/url", "present", "missing", "缺少必填字段"),
+    ]
+
+
+def test_one_of_without_matching_branch():
+    event = {**EVENT, "story": 3, "field": [1]}
+    assert _issues("event", "a_1600", event) == [
+        ("error", "/field/0", "string", "integer", "类型错误"),
+        ("error", "/story", "object | string", "integer", "类型错误"),
+    ]
+
+
+def test_one_of_branch_is_checked_once(monkeypatch):
+    # 失败的校验会调用 _type_name，用它统计子节点被校验的次数
+    calls = []
+    type_name = validate_schema._type_name
+    monkeypatch.setattr(
+        validate_schema, "_type_name", lambda v: calls.append(v) or type_name(v)
+    )
+    check = compile_schema(OneOf(List(Str()), Str()))
+    issues = []
+
+    assert check([1], "", lambda *issue: issues.append(issue)) is True
+    assert issues == [("error", "/0", "string", "integer", "类型错误")]
+    assert calls == [1]
+
+
+def test_stub_and_event_rules():
+    stub = {"id": "b_1700", "title": "B", "year": 1700, "is_stub": True}
+    assert _issues("event", "b_1700", stub) == []
+    event = {**EVENT, "quiz": {"options": ["x", "y"], "answer": 2}}
+    assert ("error", "/id", "other_1", "a_1600", "id 与文件名不一致") in _issues(
+        "event", "other_1", event
+    )
+    assert _issues("event", "a_1600", event) == [
+        ("error", "/quiz/answer", "[0, 1]", "2", "答案下标超出选项范围")
+    ]
+
+
+def test_person_and_storyline_pointers():
+    person = {"name": "P", "name_en": "P", "bio_short": "", "bio_short_en": ""}
+    assert _issues("person", "p1", {**person, "events": "a_1600"}) == [
+        ("error", "/events", "array", "string", "类型错误")
+    ]
+    storyline = {"id": "s/1", "title_zh": "S", "title_en": "S", "events": []}
+    assert _issues("storyline", "s/1", storyline) == [
+        ("error", "/s~11/events", "non-empty array", "[]", "不能为空")
+    ]
+
+
+def test_object_schema_compiles_required_and_optional():
+    check = compile_schema(Object(required={"a": Str()}, optional={"b": Str()}))
+    issues = []
+    assert check({"b": 1}, "/x", lambda *issue: issues.append(issue)) is True
+    assert issues == [
+        ("error", "/x/a", "present", "missing", "缺少必填字段"),
+        ("error", "/x/b", "string", "integer", "类型错误"),
+    ]
+    assert check([], "/x", lambda *issue: issues.append(issue)) is False
+
+
+def test_parallel_validation_matches_serial(monkeypatch):
+    documents = [
+        ("event", f"e_{i}", f"e_{i}.json", {**EVENT, "id": f"e_{i}", "year": str(i)})
+        for i in range(20)
+    ]
+    serial = validate_documents(documents)
+    monkeypatch.setattr(validate_schema, "PARALLEL_THRESHOLD", 0)
+    monkeypatch.setattr(validate_schema.os, "cpu_count", lambda: 2)
+    assert validate_documents(documents) == serial
+    assert len(serial) == 20
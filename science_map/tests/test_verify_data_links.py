@@ -0,0 +1,87 @@
+import argparse
+import json
+
+import verify_data_links
+from conftest import write_corpus
+from diagnostics import Report
+
+
+def _event(event_id, person_ids=(), influenced=(), text=""):
+    return {
+        "id": event_id,
+        "title": event_id,
+        "personIds": list(person_ids),
+        "influence_chain": {
+            "influenced_by": [],
+            "influenced": [{"id": target} for target in influenced],
+        },
+        "summary": {"text": text},
+    }
+
+
+EVENTS = {
+    "a_1600": _event("a_1600", ["p1"], ["b_1700"]),
+    "b_1700": _event("b_1700", [], ["c_1800"]),
+    "c_1800": _event("c_1800"),
+    "d_1900": _event("d_1900", ["p2"]),
+    "e_2000": _event("e_2000", [], ["x_2100"]),
+}
+PEOPLE = {
+    "p1": {"id": "p1", "name": "P1", "events": ["a_1600"]},
+    "p2": {"id": "p2", "name": "P2", "events": ["c_1800", "d_1900"]},
+}
+
+
+def _run(capsys, incremental: bool) -> tuple:
+    report = Report("verify_data_links")
+    errors = verify_data_links.verify(
+        argparse.Namespace(incremental=incremental), report
+    )
+    out = capsys.readouterr().out
+    return errors, out, report.findings, report.counters["rechecked"]
+
+
+def test_incremental_matches_full_run(corpus_dir, capsys):
+    write_corpus(corpus_dir, EVENTS, PEOPLE)
+    _run(capsys, incremental=False)
+
+    # 删除 c_1800 (影响引用它的 b_1700 和 p2)，修改 d_1900，新增 x_2100
+    events = dict(EVENTS)
+    del events["c_1800"]
+    (corpus_dir / "assets" / "events" / "c_1800.json").unlink()
+    events["d_1900"] = _event("d_1900", ["p2", "p3"], text="changed")
+    events["x_2100"] = _event("x_2100")
+    write_corpus(corpus_dir, events, PEOPLE)
+
+    incremental = _run(capsys, incremental=True)
+    full = _run(capsys, incremental=False)
+
+    assert incremental[:3] == full[:3]
+    assert incremental[0] > 0
+    # a_1600 和 p1 没有变化，也不引用变化的 ID
+    assert incremental[3] == len(events) + len(PEOPLE) - 2
+    assert full[3] == len(events) + len(PEOPLE)
+
+
+def test_incremental_without_changes_reuses_everything(corpus_dir, capsys):
+    write_corpus(corpus_dir, EVENTS, PEOPLE)
+    full = _run(capsys, incremental=False)
+    incremental = _run(capsys, incremental=True)
+
+    assert incremental[:3] == full[:3]
+    assert incremental[3] == 0
+
+
+def test_manifest_records_outgoing_references(corpus_dir, capsys):
+    write_corpus(corpus_dir, EVENTS, PEOPLE)
+    _run(capsys, incremental=False)
+
+    manifest = json.loads(verify_data_links.MANIFEST_FILE.read_text(encoding="utf-8"))
+    assert manifest["events"]["a_1600"]["refs"] == {
+        "events": ["b_1700"],
+        "people": ["p1"],
+    }
+    assert manifest["people"]["p2"]["refs"] == {
+        "events": ["c_1800", "d_1900"],
+        "people": [],
+    }
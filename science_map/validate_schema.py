@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+事件、人物和故事线文件的结构校验。
+
+结构定义 (EVENT_SCHEMA / STUB_SCHEMA / PERSON_SCHEMA / STORYLINE_SCHEMA) 与
+App 中 EventData.fromJson 等解析代码的实际要求一致，在导入时编译为校验函数:
+每个节点的类型元组、必填键集合和子校验函数都预先计算好，校验时不再解释结构定义。
+
+每条问题记录文件、JSON Pointer、期望值和实际值:
+    error    App 解析时会出错或行为不正确 (类型错误、缺少必填字段等)
+    warning  可以工作但不规范 (未知字段、旧格式字段、缺少英文翻译等)
+
+文件数量较多时在进程池中分批校验。
+
+用法:
+    python validate_schema.py            # 有 error 时退出码为 1
+    python validate_schema.py --strict   # 有 warning 也视为失败 (用于 CI)
+    python validate_schema.py --sarif schema.sarif   # 见 diagnostics.py
+"""
+
+import argparse
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus import PARALLEL_THRESHOLD, STORYLINES_FILE, load_corpus
+from diagnostics import Report, add_arguments
+
+SchemaIssue = namedtuple(
+    "SchemaIssue", ["severity", "file", "pointer", "expected", "actual", "message"]
+)
+
+
+# ---------- 结构定义 ----------
+
+
+class Str:
+    pass
+
+
+class Int:
+    pass
+
+
+class Num:
+    def __init__(self, minimum=None, maximum=None):
+        self.minimum = minimum
+        self.maximum = maximum
+
+
+class Bool:
+    pass
+
+
+class List:
+    def __init__(self, item, non_empty: bool = False):
+        self.item = item
+        self.non_empty = non_empty
+
+
+class Object:
+    """required / optional 为 {键: 结构}。warn_missing 中的键缺失时只产生 warning。
+
+    deprecated 为 {键: 说明}，出现时产生 warning。
+    """
+
+    def __init__(self, required=None, optional=None, warn_missing=(), deprecated=None):
+        self.required = required or {}
+        self.optional = optional or {}
+        self.warn_missing = set(warn_missing)
+        self.deprecated = deprecated or {}
+
+
+class OneOf:
+    def __init__(self, *options):
+        self.options = options
+
+
+def _bilingual(*keys) -> dict:
+    """{key: Str, key_en: Str}"""
+    result = {}
+    for key in keys:
+        result[key] = Str()
+        result[f"{key}_en"] = Str()
+    return result
+
+
+VIDEO = Object(
+    required={"url": Str()},
+    optional={**_bilingual("title"), "duration": Str()},
+)
+TEXT_BLOCK = Object(
+    optional={**_bilingual("text"), "diagram": Str(), "image": Str(), "video": VIDEO},
+)
+INFLUENCE_ITEM = Object(
+    required={"id": Str()},
+    optional=_bilingual("contribution"),
+    warn_missing=("contribution_en",),
+)
+
+EVENT_SCHEMA = Object(
+    required={
+        "id": Str(),
+        "title": Str(),
+        "year": Int(),
+        "lat": Num(-90, 90),
+        "lng": Num(-180, 180),
+    },
+    optional={
+        "title_en": Str(),
+        **_bilingual("city", "country"),
+        "field": OneOf(List(Str()), Str()),
+        "field_en": OneOf(List(Str()), Str()),
+        "personId": OneOf(Str(), List(Str())),
+        "personIds": List(Str()),
+        "storyline_ids": List(Str()),
+        "storyline_id": OneOf(Str(), List(Str())),
+        "media": Object(optional={"event_image": Str(), "video": VIDEO}),
+        "summary": Object(
+            optional={
+                **_bilingual("text"),
+                "key_points": List(Str()),
+                "key_points_en": List(Str()),
+            },
+        ),
+        "story": OneOf(TEXT_BLOCK, Str()),
+        "simple_explanation": OneOf(TEXT_BLOCK, Str()),
+        "fun_facts": List(
+            Object(optional={"icon": Str(), "diagram": Str(), **_bilingual("text")})
+        ),
+        "principle": OneOf(
+            Object(
+                optional={
+                    **_bilingual("title"),
+                    "diagram": Str(),
+                    "video": OneOf(Str(), VIDEO),
+                    "key_points": List(
+                        Object(optional={"icon": Str(), **_bilingual("title", "text")})
+                    ),
+                }
+            ),
+            Str(),
+        ),
+        "applications": List(
+            Object(
+                optional={"icon": Str(), "image": Str(), **_bilingual("title", "text")}
+            )
+        ),
+        "experiment": Object(
+            optional={
+                **_bilingual("title", "description", "why"),
+                "video": OneOf(Str(), VIDEO),
+                "image": Str(),
+                "materials": List(Str()),
+                "materials_en": List(Str()),
+            }
+        ),
+        "related_concepts": List(Str()),
+        "related_concepts_en": List(Str()),
+        "impact": OneOf(
+            Object(
+                optional={
+                    **_bilingual("text"),
+                    "stats": List(
+                        Object(
+                            required={"number": OneOf(Str(), Int())},
+                            optional=_bilingual("label"),
+                        )
+                    ),
+                }
+            ),
+            Str(),
+        ),
+        "influence_chain": Object(
+            optional={
+                "influenced_by": List(INFLUENCE_ITEM),
+                "influenced": List(INFLUENCE_ITEM),
+                **_bilingual("legacy_text"),
+            }
+        ),
+        "quiz": Object(
+            required={"options": List(Str(), non_empty=True), "answer": Int()},
+            optional={
+                **_bilingual("question", "explanation"),
+                "options_en": List(Str(), non_empty=True),
+                "image": Str(),
+            },
+        ),
+        "is_stub": Bool(),
+    },
+    warn_missing=("title_en", "city", "city_en", "field", "field_en"),
+    deprecated={
+        "storyline_id": "旧字段，App 只在没有 storyline_ids 时读取它，应改为 storyline_ids",
+    },
+)
+
+# 存根只需要基本信息，其余字段可选
+STUB_SCHEMA = Object(
+    required={"id": Str(), "title": Str(), "year": Int(), "is_stub": Bool()},
+    optional={
+        key: schema for key, schema in EVENT_SCHEMA.optional.items() if key != "is_stub"
+    },
+    deprecated=EVENT_SCHEMA.deprecated,
+)
+STUB_SCHEMA.optional["lat"] = Num(-90, 90)
+STUB_SCHEMA.optional["lng"] = Num(-180, 180)
+
+PERSON_SCHEMA = Object(
+    required={"name": Str(), "events": List(Str())},
+    optional={"name_en": Str(), **_bilingual("bio_short"), "portrait": Str()},
+    warn_missing=("name_en", "bio_short", "bio_short_en"),
+)
+
+STORYLINE_SCHEMA = Object(
+    required={"id": Str(), "title_zh": Str(), "events": List(Str(), non_empty=True)},
+    optional={
+        "title_en": Str(),
+        "emoji": Str(),
+        "description_zh": Str(),
+        "description_en": Str(),
+    },
+    warn_missing=("title_en",),
+)
+
+
+# ---------- 编译 ----------
+
+_TYPE_NAMES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    list: "array",
+    dict: "object",
+    type(None): "null",
+}
+
+
+def _type_name(value) -> str:
+    return _TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def _escape(token) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _describe(schema) -> str:
+    if isinstance(schema, Str):
+        return "string"
+    if isinstance(schema, Int):
+        return "integer"
+    if isinstance(schema, Num):
+        return "number"
+    if isinstance(schema, Bool):
+        return "boolean"
+    if isinstance(schema, List):
+        return f"array of {_describe(schema.item)}"
+    if isinstance(schema, Object):
+        return "object"
+    return " | ".join(_describe(option) for option in schema.options)
+
+
+def compile_schema(schema):
+    """把结构定义编译为 check(value, pointer, report) -> bool。
+
+    report(severity, pointer, expected, actual, message) 收集问题；
+    返回值表示该值的类型是否匹配 (OneOf 用它选择分支)。
+    """
+    if isinstance(schema, Str):
+
+        def check(value, pointer, report):
+            if type(value) is str:
+                return True
+            report("error", pointer, "string", _type_name(value), "类型错误")
+            return False
+
+        return check
+
+    if isinstance(schema, Bool):
+
+        def check(value, pointer, report):
+            if type(value) is bool:
+                return True
+            report("error", pointer, "boolean", _type_name(value), "类型错误")
+            return False
+
+        return check
+
+    if isinstance(schema, Int):
+
+        def check(value, pointer, report):
+            if type(value) is int:
+                return True
+            report("error", pointer, "integer", _type_name(value), "类型错误")
+            return False
+
+        return check
+
+    if isinstance(schema, Num):
+        low, high = schema.minimum, schema.maximum
+
+        def check(value, pointer, report):
+            if type(value) not in (int, float):
+                report("error", pointer, "number", _type_name(value), "类型错误")
+                return False
+            if (low is not None and value < low) or (high is not None and value > high):
+                report("error", pointer, f"[{low}, {high}]", repr(value), "超出范围")
+            return True
+
+        return check
+
+    if isinstance(schema, List):
+        check_item = compile_schema(schema.item)
+        non_empty = schema.non_empty
+
+        def check(value, pointer, report):
+            if type(value) is not list:
+                report("error", pointer, "array", _type_name(value), "类型错误")
+                return False
+            if non_empty and not value:
+                report("error", pointer, "non-empty array", "[]", "不能为空")
+            for i, item in enumerate(value):
+                check_item(item, f"{pointer}/{i}", report)
+            return True
+
+        return check
+
+    if isinstance(schema, OneOf):
+        checks = [compile_schema(option) for option in schema.options]
+        expected = _describe(schema)
+
+        def check(value, pointer, report):
+            # 每个分支只校验一次: 问题先暂存，选中类型匹配的分支后再报告
+            for option in checks:
+                issues = []
+                if option(value, pointer, lambda *issue: issues.append(issue)):
+                    for issue in issues:
+                        report(*issue)
+                    return True
+            report("error", pointer, expected, _type_name(value), "类型错误")
+            return False
+
+        return check
+
+    # Object
+    children = {
+        key: compile_schema(child)
+        for key, child in {**schema.optional, **schema.required}.items()
+    }
+    required = tuple(schema.required)
+    warn_missing = tuple(schema.warn_missing)
+    deprecated = schema.deprecated
+
+    def check(value, pointer, report):
+        if type(value) is not dict:
+            report("error", pointer, "object", _type_name(value), "类型错误")
+            return False
+        for key in required:
+            if key not in value:
+                report(
+                    "error",
+                    f"{pointer}/{_escape(key)}",
+                    "present",
+                    "missing",
+                    "缺少必填字段",
+                )
+        for key in warn_missing:
+            if key not in value:
+                report(
+                    "warning",
+                    f"{pointer}/{_escape(key)}",
+                    "present",
+                    "missing",
+                    "缺少字段",
+                )
+        for key, item in value.items():
+            child_pointer = f"{pointer}/{_escape(key)}"
+            child = children.get(key)
+            if child is None:
+                report(
+                    "warning", child_pointer, "known key", _type_name(item), "未知字段"
+                )
+                continue
+            if key in deprecated:
+                report(
+                    "warning",
+                    child_pointer,
+                    "absent",
+                    _type_name(item),
+                    deprecated[key],
+                )
+            child(item, child_pointer, report)
+        return True
+
+    return check
+
+
+CHECK_EVENT = compile_schema(EVENT_SCHEMA)
+CHECK_STUB = compile_schema(STUB_SCHEMA)
+CHECK_PERSON = compile_schema(PERSON_SCHEMA)
+CHECK_STORYLINE = compile_schema(STORYLINE_SCHEMA)
+
+
+# ---------- 语义检查 (结构定义无法表达的规则) ----------
+
+
+def _check_event_rules(doc_id: str, data: dict, report):
+    if data.get("id") != doc_id and isinstance(data.get("id"), str):
+        report("error", "/id", doc_id, data["id"], "id 与文件名不一致")
+    if "personIds" in data and "personId" in data:
+        report(
+            "warning",
+            "/personId",
+            "absent",
+            "present",
+            "personIds 存在时 personId 被忽略",
+        )
+    elif isinstance(data.get("personId"), list):
+        report(
+            "warning",
+            "/personId",
+            "string",
+            "array",
+            "App 只识别字符串形式的 personId，列表应改为 personIds",
+        )
+    if "storyline_id" in data and "storyline_ids" in data:
+        report(
+            "warning",
+            "/storyline_id",
+            "absent",
+            "present",
+            "storyline_ids 存在时 storyline_id 被忽略",
+        )
+
+    quiz = data.get("quiz")
+    if isinstance(quiz, dict) and isinstance(quiz.get("options"), list):
+        answer = quiz.get("answer")
+        if type(answer) is int and not 0 <= answer < len(quiz["options"]):
+            report(
+                "error",
+                "/quiz/answer",
+                f"[0, {len(quiz['options']) - 1}]",
+                str(answer),
+                "答案下标超出选项范围",
+            )
+        options_en = quiz.get("options_en")
+        if isinstance(options_en, list) and len(options_en) != len(quiz["options"]):
+            report(
+                "error",
+                "/quiz/options_en",
+                f"{len(quiz['options'])} items",
+                f"{len(options_en)} items",
+                "中英文选项数量不一致",
+            )
+
+    for key in ("field", "related_concepts"):
+        zh, en = data.get(key), data.get(f"{key}_en")
+        if isinstance(zh, list) and isinstance(en, list) and len(zh) != len(en):
+            report(
+                "warning",
+                f"/{key}_en",
+                f"{len(zh)} items",
+                f"{len(en)} items",
+                "中英文列表长度不一致",
+            )
+
+
+# ---------- 批量校验 ----------
+
+
+def validate_document(kind: str, doc_id: str, file: str, data) -> list:
+    """校验单个文档，返回 SchemaIssue 列表。kind 为 event / person / storyline。"""
+    issues = []
+
+    def report(severity, pointer, expected, actual, message):
+        issues.append(SchemaIssue(severity, file, pointer, expected, actual, message))
+
+    if kind == "event":
+        if isinstance(data, dict) and data.get("is_stub") is True:
+            CHECK_STUB(data, "", report)
+        else:
+            CHECK_EVENT(data, "", report)
+        if isinstance(data, dict):
+            _check_event_rules(doc_id, data, report)
+    elif kind == "person":
+        CHECK_PERSON(data, "", report)
+    else:
+        pointer = f"/{_escape(doc_id)}"
+        CHECK_STORYLINE(data, pointer, report)
+        if isinstance(data, dict) and data.get("id") not in (None, doc_id):
+            report(
+                "error", f"{pointer}/id", doc_id, str(data.get("id")), "id 与键名不一致"
+            )
+    return issues
+
+
+def _validate_batch(batch: list) -> list:
+    issues = []
+    for kind, doc_id, file, data in batch:
+        issues.extend(validate_document(kind, doc_id, file, data))
+    return issues
+
+
+def validate_documents(documents: list) -> list:
+    """documents 为 [(kind, ID, 文件名, 数据)]，数量多时并行校验。"""
+    if len(documents) < PARALLEL_THRESHOLD:
+        return _validate_batch(documents)
+    workers = os.cpu_count() or 1
+    if workers == 1:
+        return _validate_batch(documents)
+    chunk = max(1, len(documents) // (workers * 4))
+    batches = [documents[i : i + chunk] for i in range(0, len(documents), chunk)]
+    issues = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch_issues in pool.map(_validate_batch, batches):
+            issues.extend(batch_issues)
+    return issues
+
+
+def validate_corpus(corpus) -> list:
+    documents = [
+        ("event", eid, corpus.event_path(eid).as_posix(), data)
+        for eid, data in corpus.events.items()
+    ]
+    documents += [
+        ("person", pid, corpus.person_path(pid).as_posix(), data)
+        for pid, data in corpus.people.items()
+    ]
+    if isinstance(corpus.storylines, dict):
+        documents += [
+            ("storyline", sid, STORYLINES_FILE.as_posix(), data)
+            for sid, data in corpus.storylines.items()
+        ]
+
+    issues = [
+        SchemaIssue("error", path.as_posix(), "", "valid JSON", "invalid", error)
+        for path, error in sorted(corpus.errors.items())
+    ]
+    if not isinstance(corpus.storylines, dict):
+        issues.append(
+            SchemaIssue(
+                "error",
+                STORYLINES_FILE.as_posix(),
+                "",
+                "object",
+                _type_name(corpus.storylines),
+                "类型错误",
+            )
+        )
+    issues.extend(validate_documents(documents))
+    return issues
+
+
+def main():
+    parser = argparse.ArgumentParser(description="校验事件、人物和故事线文件的结构。")
+    parser.add_argument(
+        "--strict", action="store_true", help="warning 也视为失败 (用于 CI)"
+    )
+    parser.add_argument("--quiet", action="store_true", help="不打印 warning")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    report = Report("validate_schema")
+    with report.session(args):
+        with report.phase("parse"):
+            corpus = load_corpus()
+        report.record_corpus(corpus)
+        with report.phase("check"):
+            issues = validate_corpus(corpus)
+        for issue in issues:
+            report.add(
+                "schema",
+                issue.severity,
+                f"{issue.message} (期望 {issue.expected}, 实际 {issue.actual})",
+                file=issue.file,
+                pointer=issue.pointer,
+            )
+    errors = [i for i in issues if i.severity == "error"]
+    warnings = [i for i in issues if i.severity == "warning"]
+
+    for issue in sorted(issues, key=lambda i: (i.file, i.pointer)):
+        if issue.severity == "warning" and args.quiet and not args.strict:
+            continue
+        tag = "ERROR" if issue.severity == "error" else "WARNING"
+        print(
+            f"  [{tag}] {issue.file}#{issue.pointer}: {issue.message} "
+            f"(期望 {issue.expected}, 实际 {issue.actual})"
+        )
+
+    n_docs = len(corpus.events) + len(corpus.people) + len(corpus.storylines or {})
+    print(
+        f"\n[INFO] 已校验 {n_docs} 个文档: {len(errors)} 个错误, {len(warnings)} 个警告。"
+    )
+    if errors or (args.strict and warnings):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
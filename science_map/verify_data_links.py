@@ -6,151 +6,384 @@
 1. (Event -> Person): 确保 event.personIds 或 event.personId 在 people_index 中。
 2. (Person -> Event): 确保 person.events 数组中的所有 ID 都在 events_index 中。
 3. (Event -> Event): 确保 event.influence_chain 中的所有 ID 都在 events_index 中。
+
+用法:
+    python verify_data_links.py                # 完整验证
+    python verify_data_links.py --incremental  # 增量验证
+    python verify_data_links.py --report report.json --sarif links.sarif
+
+增量模式读取 .corpus_cache/verify_manifest.json (记录每个文件的内容哈希、
+出站引用和上次的验证输出)，只重新验证内容变化的文件，以及引用了
+新增 / 重命名 / 删除的 ID 的文件；其余文件直接复用上次的输出。
+输出与完整验证完全一致。每次运行 (包括完整验证) 都会更新清单。
+
+--report / --sarif / --profile 见 diagnostics.py。
 """
 
+import argparse
 import json
+import os
 import sys
 from pathlib import Path
 
+from corpus import (
+    CACHE_DIR,
+    EVENTS_INDEX_FILE,
+    PEOPLE_INDEX_FILE,
+    Corpus,
+    load_corpus,
+)
+from diagnostics import Finding, Report, add_arguments
+from references import ReferenceTable, load_references
+
 # --- 配置 ---
-# (根据您在 main.dart 和 pubspec.yaml 中的修复更新路径)
-EVENTS_INDEX_FILE = Path("assets/events_index.json")
-PEOPLE_INDEX_FILE = Path("assets/people_index.json")
-EVENTS_DIR = Path("assets/events")
-PEOPLE_DIR = Path("assets/people")
+MANIFEST_FILE = CACHE_DIR / "verify_manifest.json"
 # --- 结束配置 ---
 
+# 清单格式变化时递增
+MANIFEST_VERSION = 2
+
 
-def load_index(index_file: Path) -> set:
-    """从索引文件加载所有有效的ID到
+def load_index(corpus: Corpus, index_file: Path) -> set:
+    """从已加载的语料库中取出索引文件的所有有效ID到
     一个 set 中，以便快速查找。"""
     if not index_file.exists():
         print(f"[FATAL] 索引文件未找到: {index_file}")
         print("  请确保您在 main.dart 中引用的文件路径与此脚本中的路径一致。")
         sys.exit(1)
 
-    with open(index_file, "r", encoding="utf-8") as f:
-        try:
-            return set(json.load(f))
-        except json.JSONDecodeError as e:
-            print(f"[FATAL] 索引文件 {index_file} JSON 格式错误: {e}")
-            sys.exit(1)
+    if index_file in corpus.errors:
+        print(
+            f"[FATAL] 索引文件 {index_file} JSON 格式错误: {corpus.errors[index_file]}"
+        )
+        sys.exit(1)
+
+    if index_file == EVENTS_INDEX_FILE:
+        return set(corpus.events_index)
+    return set(corpus.people_index)
+
+
+def unique_in_order(ids: list) -> list:
+    """去重并保持索引文件中的顺序，使每次运行的输出顺序稳定。"""
+    return list(dict.fromkeys(ids))
+
+
+def _record(findings, rule, severity, file_path, message, pointer=""):
+    """findings 不为 None 时，同时记录一条结构化的问题。"""
+    if findings is not None:
+        findings.append(Finding(rule, severity, file_path.as_posix(), pointer, message))
 
 
 def verify_event_links(
-    event_id: str, valid_event_ids: set, valid_person_ids: set
+    corpus: Corpus,
+    references: ReferenceTable,
+    event_id: str,
+    valid_event_ids: set,
+    valid_person_ids: set,
+    log=print,
+    findings: list = None,
 ) -> int:
     """检查单个事件文件的所有内部链接。"""
     errors = 0
-    file_path = EVENTS_DIR / f"{event_id}.json"
+    file_path = corpus.event_path(event_id)
 
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        print(f"  [ERROR] 事件索引中的 '{event_id}' 缺少对应的 JSON 文件: {file_path}")
-        return 1  # 计为1个错误
-    except json.JSONDecodeError as e:
-        print(f"  [ERROR] 事件文件 {file_path} JSON 格式错误: {e}")
+    data = corpus.events.get(event_id)
+    if file_path in corpus.errors:
+        log(f"  [ERROR] 事件文件 {file_path} JSON 格式错误: {corpus.errors[file_path]}")
+        _record(findings, "json-syntax", "error", file_path, corpus.errors[file_path])
         return 1
+    if data is None:
+        log(f"  [ERROR] 事件索引中的 '{event_id}' 缺少对应的 JSON 文件: {file_path}")
+        _record(
+            findings,
+            "missing-file",
+            "error",
+            file_path,
+            f"事件索引中的 '{event_id}' 缺少对应的 JSON 文件",
+        )
+        return 1  # 计为1个错误
 
-    # --- (已更新) 检查 Event -> Person (personId 或 personIds) ---
-    person_id_list = []
-    p_ids = data.get("personIds")  # 查找复数 "personIds"
-    p_id = data.get("personId")  # 查找单数 "personId"
-
-    if isinstance(p_ids, list):
-        person_id_list = p_ids
-    elif isinstance(p_id, str):
-        person_id_list = [p_id]
-    elif isinstance(p_id, list):
-        # 处理像 lummer_black_body_1899.json 这样的特殊情况
-        print(f"  [INFO] 事件 '{event_id}' 正在使用 'personId' 字段的列表。")
-        print(f"         推荐使用 'personIds' (复数) 字段以保持一致性。")
-        person_id_list = p_id
-
-    # 现在，验证列表中的每一个 ID
-    if person_id_list:
-        for pid in person_id_list:
-            if pid not in valid_person_ids:
-                print(f"  [ERROR] 事件 '{event_id}' 引用了不存在的人物 ID: {pid}")
-                errors += 1
-    # --- (更新结束) ---
-
-    # 2. 检查 Event -> Event (influence_chain) - (此逻辑不变)
-    chain = data.get("influence_chain", {})
-    if chain:  # 确保 chain 不是 None
-        # 检查 'influenced_by'
-        for item in chain.get("influenced_by", []):
-            link_id = item.get("id")
-            if link_id and link_id not in valid_event_ids:
-                print(
-                    f"  [ERROR] 事件 '{event_id}' (influenced_by) 引用了不存在的事件: {link_id}"
+    # personId 是列表时: 处理像 lummer_black_body_1899.json 这样的特殊情况
+    if not isinstance(data.get("personIds"), list) and isinstance(
+        data.get("personId"), list
+    ):
+        log(f"  [INFO] 事件 '{event_id}' 正在使用 'personId' 字段的列表。")
+        log(f"         推荐使用 'personIds' (复数) 字段以保持一致性。")
+        _record(
+            findings,
+            "personid-list",
+            "note",
+            file_path,
+            "personId 是列表，推荐使用 'personIds' (复数) 字段",
+            "/personId",
+        )
+
+    # 引用表中同一文件的引用顺序为: 人物, influenced_by, influenced
+    for ref in references.from_event(event_id):
+        # 1. 检查 Event -> Person (personId 或 personIds)
+        if ref.kind == "personIds":
+            if ref.target_id not in valid_person_ids:
+                message = f"事件 '{event_id}' 引用了不存在的人物 ID: {ref.target_id}"
+                log(f"  [ERROR] {message}")
+                _record(
+                    findings, "unknown-person", "error", file_path, message, ref.pointer
                 )
                 errors += 1
 
-        # 检查 'influenced'
-        for item in chain.get("influenced", []):
-            link_id = item.get("id")
-            if link_id and link_id not in valid_event_ids:
-                print(
-                    f"  [ERROR] 事件 '{event_id}' (influenced) 引用了不存在的事件: {link_id}"
+        # 2. 检查 Event -> Event (influence_chain)
+        elif ref.kind == "influence_chain":
+            if ref.target_id not in valid_event_ids:
+                direction = ref.pointer.split("/")[2]
+                message = f"事件 '{event_id}' ({direction}) 引用了不存在的事件: {ref.target_id}"
+                log(f"  [ERROR] {message}")
+                _record(
+                    findings, "unknown-event", "error", file_path, message, ref.pointer
                 )
                 errors += 1
 
     return errors
 
 
-def verify_person_links(person_id: str, valid_event_ids: set) -> int:
+def verify_person_links(
+    corpus: Corpus,
+    references: ReferenceTable,
+    person_id: str,
+    valid_event_ids: set,
+    log=print,
+    findings: list = None,
+) -> int:
     """检查单个人物文件的所有内部链接。"""
     errors = 0
-    file_path = PEOPLE_DIR / f"{person_id}.json"
+    file_path = corpus.person_path(person_id)
 
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        print(f"  [ERROR] 人物索引中的 '{person_id}' 缺少对应的 JSON 文件: {file_path}")
+    data = corpus.people.get(person_id)
+    if file_path in corpus.errors:
+        log(f"  [ERROR] 人物文件 {file_path} JSON 格式错误: {corpus.errors[file_path]}")
+        _record(findings, "json-syntax", "error", file_path, corpus.errors[file_path])
         return 1
-    except json.JSONDecodeError as e:
-        print(f"  [ERROR] 人物文件 {file_path} JSON 格式错误: {e}")
+    if data is None:
+        log(f"  [ERROR] 人物索引中的 '{person_id}' 缺少对应的 JSON 文件: {file_path}")
+        _record(
+            findings,
+            "missing-file",
+            "error",
+            file_path,
+            f"人物索引中的 '{person_id}' 缺少对应的 JSON 文件",
+        )
         return 1
 
-    # 1. 检查 Person -> Event (events 数组) - (此逻辑不变)
-    event_links = data.get("events", [])
-    for event_id in event_links:
-        if event_id not in valid_event_ids:
-            print(f"  [ERROR] 人物 '{person_id}' 引用了不存在的事件: {event_id}")
+    # 1. 检查 Person -> Event (events 数组)
+    for ref in references.from_person(person_id):
+        if ref.kind == "person.events" and ref.target_id not in valid_event_ids:
+            message = f"人物 '{person_id}' 引用了不存在的事件: {ref.target_id}"
+            log(f"  [ERROR] {message}")
+            _record(findings, "unknown-event", "error", file_path, message, ref.pointer)
             errors += 1
 
     return errors
 
 
-def main():
-    print("=" * 60)
-    print("开始验证知识图谱链接 (v2 - 支持多人)...")
-    print("=" * 60)
+def outgoing_refs(references: ReferenceTable, kind: str, item_id: str) -> dict:
+    """一个事件或人物文件的出站引用 (验证结果只依赖于这些 ID 是否存在)。"""
+    refs = {"events": set(), "people": set()}
+    if kind == "events":
+        source_refs = references.from_event(item_id)
+    else:
+        source_refs = references.from_person(item_id)
+    for ref in source_refs:
+        if ref.kind == "personIds":
+            refs["people"].add(ref.target_id)
+        elif ref.kind in ("influence_chain", "person.events"):
+            refs["events"].add(ref.target_id)
+    return refs
+
 
+def load_manifest() -> dict:
+    """读取上次运行的验证清单，格式不符时返回 None。"""
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(manifest: dict):
+    MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = MANIFEST_FILE.with_suffix(".tmp")
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_file, MANIFEST_FILE)
+    except OSError as e:
+        print(f"  (Warning: 无法写入验证清单 {MANIFEST_FILE}: {e})")
+
+
+def verify_all(
+    corpus: Corpus,
+    references: ReferenceTable,
+    kind: str,
+    ids: list,
+    verify,
+    previous: dict,
+    changed_event_ids: set,
+    changed_person_ids: set,
+    report: Report,
+) -> tuple:
+    """验证一组事件或人物，尽可能复用上次清单中的结果。
+
+    kind 为 "events" 或 "people"。previous 为上次清单中同类条目
+    ({ID: 条目})，完整验证时为空。verify(ID, log, findings) 检查单个文件，
+    结构化的问题 (包括复用的) 记录到 report。返回 (错误数, 新条目, 重新验证的数量)。
+    """
+    path_of = corpus.event_path if kind == "events" else corpus.person_path
+    total_errors = 0
+    entries = {}
+    rechecked = 0
+
+    for item_id in ids:
+        digest = corpus.digests.get(path_of(item_id))
+        entry = previous.get(item_id)
+        if (
+            entry is None
+            or entry["hash"] != digest
+            or not changed_event_ids.isdisjoint(entry["refs"]["events"])
+            or not changed_person_ids.isdisjoint(entry["refs"]["people"])
+        ):
+            lines = []
+            findings = []
+            errors = verify(item_id, lines.append, findings)
+            refs = outgoing_refs(references, kind, item_id)
+            entry = {
+                "hash": digest,
+                "refs": {key: sorted(value) for key, value in refs.items()},
+                "lines": lines,
+                "findings": [list(finding) for finding in findings],
+                "errors": errors,
+            }
+            rechecked += 1
+
+        for line in entry["lines"]:
+            print(line)
+        report.extend(entry["findings"])
+        total_errors += entry["errors"]
+        entries[item_id] = entry
+
+    return total_errors, entries, rechecked
+
+
+def verify(args, report: Report) -> int:
+    """运行一次 (完整或增量) 验证，返回错误总数。"""
     total_errors = 0
+    with report.phase("parse"):
+        corpus = load_corpus()
+    report.record_corpus(corpus)
+    with report.phase("references"):
+        references = load_references(corpus)
 
     # 1. 加载所有有效的 ID
-    print(f"[INFO] 正在从 {EVENTS_INDEX_FILE} 加载事件索引...")
-    valid_event_ids = load_index(EVENTS_INDEX_FILE)
-    print(f"[INFO] 找到 {len(valid_event_ids)} 个有效的事件 ID。")
+    with report.phase("index"):
+        print(f"[INFO] 正在从 {EVENTS_INDEX_FILE} 加载事件索引...")
+        valid_event_ids = load_index(corpus, EVENTS_INDEX_FILE)
+        print(f"[INFO] 找到 {len(valid_event_ids)} 个有效的事件 ID。")
+
+        print(f"[INFO] 正在从 {PEOPLE_INDEX_FILE} 加载人物索引...")
+        valid_person_ids = load_index(corpus, PEOPLE_INDEX_FILE)
+        print(f"[INFO] 找到 {len(valid_person_ids)} 个有效的人物 ID。")
 
-    print(f"[INFO] 正在从 {PEOPLE_INDEX_FILE} 加载人物索引...")
-    valid_person_ids = load_index(PEOPLE_INDEX_FILE)
-    print(f"[INFO] 找到 {len(valid_person_ids)} 个有效的人物 ID。")
+    # 增量模式: 新增、删除 (重命名即 删除 + 新增) 的 ID 会影响引用它们的文件
+    manifest = load_manifest() if args.incremental else None
+    if manifest is None:
+        manifest = {"event_ids": [], "person_ids": [], "events": {}, "people": {}}
+        changed_event_ids = set()
+        changed_person_ids = set()
+    else:
+        changed_event_ids = valid_event_ids ^ set(manifest["event_ids"])
+        changed_person_ids = valid_person_ids ^ set(manifest["person_ids"])
 
     # 2. 验证每个事件文件
     print("\n" + "-" * 20 + " 正在检查事件文件 " + "-" * 20)
-    for event_id in valid_event_ids:
-        total_errors += verify_event_links(event_id, valid_event_ids, valid_person_ids)
+    with report.phase("check"):
+        event_errors, event_entries, events_rechecked = verify_all(
+            corpus,
+            references,
+            "events",
+            unique_in_order(corpus.events_index),
+            lambda event_id, log, findings: verify_event_links(
+                corpus,
+                references,
+                event_id,
+                valid_event_ids,
+                valid_person_ids,
+                log,
+                findings,
+            ),
+            manifest["events"],
+            changed_event_ids,
+            changed_person_ids,
+            report,
+        )
+    total_errors += event_errors
 
     # 3. 验证每个人物文件
     print("\n" + "-" * 20 + " 正在检查人物文件 " + "-" * 20)
-    for person_id in valid_person_ids:
-        total_errors += verify_person_links(person_id, valid_event_ids)
+    with report.phase("check"):
+        person_errors, person_entries, people_rechecked = verify_all(
+            corpus,
+            references,
+            "people",
+            unique_in_order(corpus.people_index),
+            lambda person_id, log, findings: verify_person_links(
+                corpus, references, person_id, valid_event_ids, log, findings
+            ),
+            manifest["people"],
+            changed_event_ids,
+            changed_person_ids,
+            report,
+        )
+    total_errors += person_errors
+    report.count("events_checked", len(event_entries))
+    report.count("people_checked", len(person_entries))
+    report.count("rechecked", events_rechecked + people_rechecked)
+
+    with report.phase("write"):
+        save_manifest(
+            {
+                "version": MANIFEST_VERSION,
+                "event_ids": sorted(valid_event_ids),
+                "person_ids": sorted(valid_person_ids),
+                "events": event_entries,
+                "people": person_entries,
+            }
+        )
+    if args.incremental:
+        print(
+            f"\n[INFO] 增量验证: 重新检查了 {events_rechecked} 个事件和 "
+            f"{people_rechecked} 个人物，其余复用 {MANIFEST_FILE}。",
+            file=sys.stderr,
+        )
+    return total_errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="验证科学地图的数据链接完整性。")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"只重新验证相对于 {MANIFEST_FILE} 发生变化的文件",
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("开始验证知识图谱链接 (v2 - 支持多人)...")
+    print("=" * 60)
+
+    report = Report("verify_data_links")
+    with report.session(args):
+        total_errors = verify(args, report)
 
     # 4. 总结报告
     print("\n" + "=" * 60)